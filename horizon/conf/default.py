@@ -16,6 +16,24 @@ HORIZON_CONFIG = {
     'ajax_queue_limit': 10,
     'ajax_poll_interval': 2500,
 
+    # Event bus pushing changes to the browser (disabled if None), and the
+    # number of seconds a browser's request for events is held open for.
+    'event_bus': None,
+    'event_timeout': 25,
+
+    # Size of the thread pool used for concurrent data loading.
+    'concurrent_workers': 10,
+
+    # Number of threads running background jobs, and number of jobs which
+    # may wait for one of them.
+    'background_workers': 4,
+    'background_queue_size': 100,
+
+    # Recording of the API calls made by each request, and whether they are
+    # reported in the responses (by default only when DEBUG is on).
+    'instrumentation': True,
+    'instrumentation_debug': None,
+
     # URL for additional help with this site.
     'help_url': None,
 
@@ -0,0 +1,201 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+A publish/subscribe event bus through which the server can push changes to
+the browser as they're made, rather than the browser only finding them the
+next time it polls. Only the changes published by the dashboard itself are
+pushed, so the tables keep polling, less often, for the others.
+
+Events are published on named channels and delivered to the browser by the
+long-polling ``horizon:events`` view. Two kinds of events are used:
+
+* ``"row"`` events tell the tables subscribed to a channel that the object
+  with the given ``obj_id`` has changed, upon which the browser fetches the
+  updated row. They carry no other data, since the channels of a project
+  are open to all of its members.
+* ``"message"`` events carry a message for a single user, such as the
+  outcome of a background task which finished after its request did.
+
+The bus is set with the ``event_bus`` key of ``HORIZON_CONFIG`` and is
+disabled by default. :class:`LocalEventBus` delivers the events published
+within the server process; backends which share events between processes
+(for instance on top of a message queue or a notification listener) only
+need to implement :meth:`~EventBus.publish` and :meth:`~EventBus.wait`.
+"""
+
+import collections
+import threading
+import time
+
+from django.utils.encoding import force_unicode
+from django.utils.importlib import import_module
+from django.utils.safestring import SafeData
+
+from horizon import conf
+
+
+class EventBus(object):
+    """ The interface of event bus backends. """
+    def publish(self, channel, event_type, data):
+        """
+        Publishes an event of ``event_type`` with the JSON serializable
+        ``data`` on ``channel``, and returns its id.
+        """
+        raise NotImplementedError
+
+    def wait(self, channels, last_id, timeout):
+        """
+        Waits up to ``timeout`` seconds for events to be published on any of
+        ``channels`` after the event with the id ``last_id``.
+
+        Returns a tuple of the id to resume waiting from, the list of events
+        (dicts with ``id``, ``channel``, ``type`` and ``data`` keys) and
+        whether events may have been missed since ``last_id``. A
+        ``last_id`` of ``None`` returns straight away with the current id.
+        """
+        raise NotImplementedError
+
+
+class LocalEventBus(EventBus):
+    """
+    Delivers the events published within the current process. The most
+    recent ``max_events`` events are kept for the clients which are between
+    two polls.
+    """
+    def __init__(self, max_events=1000):
+        self.events = collections.deque(maxlen=max_events)
+        self.last_id = 0
+        self.condition = threading.Condition()
+
+    def publish(self, channel, event_type, data):
+        with self.condition:
+            self.last_id += 1
+            self.events.append({'id': self.last_id,
+                                'channel': channel,
+                                'type': event_type,
+                                'data': data})
+            self.condition.notify_all()
+            return self.last_id
+
+    def wait(self, channels, last_id, timeout):
+        channels = set(channels)
+        deadline = time.time() + timeout
+        with self.condition:
+            if last_id is None:
+                return self.last_id, [], False
+            if last_id > self.last_id:
+                # The client was polling another process, or one which
+                # has since been restarted.
+                return self.last_id, [], True
+            while True:
+                missed = bool(self.events) and \
+                         self.events[0]['id'] > last_id + 1
+                events = [event for event in self.events
+                          if event['id'] > last_id and
+                          event['channel'] in channels]
+                remaining = deadline - time.time()
+                if events or missed or remaining <= 0:
+                    return self.last_id, events, missed
+                self.condition.wait(remaining)
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus():
+    """
+    Returns the event bus set by the ``event_bus`` key of ``HORIZON_CONFIG``
+    (an :class:`EventBus` class, or the dotted path to one), or ``None``
+    if events are disabled.
+    """
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            backend = conf.HORIZON_CONFIG['event_bus']
+            if _bus is None and backend:
+                if isinstance(backend, basestring):
+                    mod, cls = backend.rsplit(".", 1)
+                    backend = getattr(import_module(mod), cls)
+                _bus = backend()
+    return _bus
+
+
+def set_event_bus(bus):
+    """
+    Replaces the process-wide event bus, e.g. with a stand-in in tests.
+    Passing ``None`` reverts to the configured bus.
+    """
+    global _bus
+    _bus = bus
+
+
+def user_channel(user_id):
+    """ Returns the name of the channel of the user's messages. """
+    return "user.%s" % user_id
+
+
+def project_channel(tenant_id, name):
+    """ Returns the name of the ``name`` channel of a project. """
+    return "project.%s.%s" % (tenant_id, name)
+
+
+def can_subscribe(user, channel):
+    """
+    Returns whether ``user`` may receive the events of ``channel``: the
+    channels of the user's current project, and also the cloud-wide
+    channels (those not scoped to a project or user) for administrators.
+    """
+    scope = channel.split(".", 1)[0]
+    if scope == "user":
+        return channel == user_channel(user.id)
+    if scope == "project":
+        tenant_id = getattr(user, 'tenant_id', None)
+        return bool(tenant_id) and \
+               channel.startswith(project_channel(tenant_id, ""))
+    return user.is_superuser
+
+
+def publish(channel, event_type, data):
+    """
+    Publishes an event on the configured bus. Does nothing (and returns
+    ``None``) if events are disabled.
+    """
+    bus = get_event_bus()
+    if bus is not None:
+        return bus.publish(channel, event_type, data)
+
+
+def publish_change(name, obj_id, tenant_id=None):
+    """
+    Tells the tables listening on the ``name`` channel that the object with
+    the id ``obj_id`` has changed. The event is published on the project's
+    channel when ``tenant_id`` is given as well as on the cloud-wide one.
+    """
+    data = {'obj_id': force_unicode(obj_id)}
+    if tenant_id:
+        publish(project_channel(tenant_id, name), "row", data)
+    publish(name, "row", data)
+
+
+def publish_message(user_id, tag, message, extra_tags=''):
+    """
+    Sends a message to the browsers of the user with the id ``user_id``,
+    in the format of the ``X-Horizon-Messages`` header.
+    """
+    if isinstance(message, SafeData):
+        extra_tags = extra_tags + ' safe'
+    publish(user_channel(user_id), "message",
+            [tag, force_unicode(message), extra_tags])
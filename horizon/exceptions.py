@@ -172,6 +172,19 @@ class AlreadyExists(HorizonException):
         return _(self.msg) % self.attrs
 
 
+class JobQueueFull(HorizonException):
+    """
+    Raised when a background job is submitted while the queue of jobs
+    waiting for a worker is full.
+    """
+    def __str__(self):
+        return self.__unicode__().encode('utf-8')
+
+    def __unicode__(self):
+        return _("Too many tasks are already running in the background, "
+                 "please try again later.")
+
+
 class WorkflowError(HorizonException):
     """ Exception to be raised when something goes wrong in a workflow. """
     pass
@@ -196,7 +209,7 @@ class HandledException(HorizonException):
 
 UNAUTHORIZED = tuple(HORIZON_CONFIG['exceptions']['unauthorized'])
 NOT_FOUND = tuple(HORIZON_CONFIG['exceptions']['not_found'])
-RECOVERABLE = (AlreadyExists,)
+RECOVERABLE = (AlreadyExists, JobQueueFull)
 RECOVERABLE += tuple(HORIZON_CONFIG['exceptions']['recoverable'])
 
 
@@ -0,0 +1,353 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Records the API calls made while serving each request, to tell which of
+them make a page slow.
+
+The API wrappers are wrapped with :func:`instrument`, which records the
+service, operation, duration and result size of each call (and whether it
+was answered from a cache, see :func:`mark_cache`) in the
+:class:`RequestTrace` of the request being served. Calls made by the worker
+threads of :mod:`horizon.utils.concurrency` are recorded in the trace of the
+request which submitted them.
+
+When a request is finished its trace is logged by the
+``horizon.instrumentation`` logger and its timings are added to the
+in-process :data:`metrics`, which the ``horizon:metrics`` view reports to
+administrators. With ``instrumentation_debug`` on, the calls are also sent in
+the ``Server-Timing`` header and listed in a panel at the foot of pages.
+
+Instrumentation is set with the ``instrumentation`` key of
+``HORIZON_CONFIG`` and enabled by default.
+"""
+
+import bisect
+import contextlib
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.encoding import smart_str
+
+from horizon import conf
+
+
+LOG = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def is_enabled():
+    return conf.HORIZON_CONFIG['instrumentation']
+
+
+def is_debug():
+    debug = conf.HORIZON_CONFIG['instrumentation_debug']
+    if debug is None:
+        return settings.DEBUG
+    return debug
+
+
+class RequestTrace(object):
+    """ The API calls made while serving a request. """
+    def __init__(self):
+        self.start = time.time()
+        self.view = None
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def add(self, call):
+        with self._lock:
+            self.calls.append(call)
+
+    @property
+    def api_seconds(self):
+        return sum(call['seconds'] for call in self.calls)
+
+    def summary(self):
+        """
+        Returns the duration, number and total duration of the calls of
+        each ``service.operation``, slowest first.
+        """
+        operations = {}
+        for call in self.calls:
+            name = "%s.%s" % (call['service'], call['operation'])
+            operation = operations.setdefault(name, {'name': name,
+                                                     'count': 0,
+                                                     'seconds': 0,
+                                                     'cache_hits': 0})
+            operation['count'] += 1
+            operation['seconds'] += call['seconds']
+            if call['cache'] == 'hit':
+                operation['cache_hits'] += 1
+        return sorted(operations.values(), key=lambda op: op['seconds'],
+                      reverse=True)
+
+
+def current():
+    """ Returns the trace of the request served by the current thread. """
+    return getattr(_local, 'trace', None)
+
+
+@contextlib.contextmanager
+def activate(trace):
+    """
+    Context manager which records the API calls made by the current thread
+    in ``trace``, e.g. while it runs a task for the request it belongs to.
+    """
+    previous = current()
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+def _result_size(result):
+    # Paginated listings return a (results, has_more_data) tuple.
+    if isinstance(result, tuple) and len(result) == 2 and \
+            isinstance(result[0], (list, tuple)):
+        result = result[0]
+    if result is None:
+        return 0
+    if isinstance(result, basestring):
+        return len(result)
+    try:
+        return len(result)
+    except TypeError:
+        return 1
+
+
+def instrument(func, service):
+    """
+    Wraps an API wrapper function so that its calls are recorded as
+    operations of ``service``.
+
+    Only the outermost call of the current thread is recorded, wrappers
+    calling one another count as one operation. Calls which neither use an
+    API client (see :func:`mark_client`) nor a cache, like the helpers which
+    merely read the settings, are left out.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        trace = current()
+        if trace is None or getattr(_local, 'call', None) is not None:
+            return func(*args, **kwargs)
+        call = {'service': service,
+                'operation': func.__name__,
+                'seconds': 0,
+                'size': None,
+                'cache': None,
+                'error': None,
+                'client': False}
+        _local.call = call
+        start = time.time()
+        try:
+            result = func(*args, **kwargs)
+            call['size'] = _result_size(result)
+            return result
+        except Exception, e:
+            call['error'] = e.__class__.__name__
+            raise
+        finally:
+            call['seconds'] = time.time() - start
+            _local.call = None
+            if call.pop('client') or call['cache']:
+                trace.add(call)
+    wrapper.instrumented = True
+    return wrapper
+
+
+def instrument_module(module, service, exclude=()):
+    """
+    Wraps the public functions defined in ``module`` with :func:`instrument`,
+    other than those named in ``exclude`` (e.g. its client factories).
+    """
+    for name, func in inspect.getmembers(module, inspect.isfunction):
+        if name.startswith('_') or name in exclude or \
+                func.__module__ != module.__name__ or \
+                getattr(func, 'instrumented', False):
+            continue
+        setattr(module, name, instrument(func, service))
+
+
+def mark_client():
+    """ Notes that the operation being recorded uses an API client. """
+    call = getattr(_local, 'call', None)
+    if call is not None:
+        call['client'] = True
+
+
+def mark_cache(outcome):
+    """
+    Notes whether the operation being recorded was answered from a cache,
+    with an ``outcome`` of ``"hit"`` or ``"miss"``. A miss doesn't override
+    a hit, as operations may look up several entries.
+    """
+    call = getattr(_local, 'call', None)
+    if call is not None and call['cache'] != 'hit':
+        call['cache'] = outcome
+
+
+class Histogram(object):
+    """
+    Counts durations in buckets of fixed boundaries, so that percentiles can
+    be estimated from any number of them in a constant amount of memory.
+    """
+    # Upper bounds of the buckets, in milliseconds.
+    bounds = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000,
+              20000, 60000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, percent):
+        """
+        Returns the upper bound of the bucket holding the given percentile,
+        or the longest duration for the last bucket.
+        """
+        if not self.count:
+            return None
+        rank = self.count * percent / 100.0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index < len(self.bounds):
+                    return min(self.bounds[index], self.max)
+                break
+        return self.max
+
+    def summary(self):
+        return {'count': self.count,
+                'mean_ms': self.total / self.count if self.count else None,
+                'max_ms': self.max,
+                'p50_ms': self.percentile(50),
+                'p90_ms': self.percentile(90),
+                'p99_ms': self.percentile(99)}
+
+
+class Metrics(object):
+    """
+    In-process histograms of the duration of views and API operations,
+    reset when the process restarts.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def add(self, kind, name, seconds):
+        with self._lock:
+            histograms = self.histograms.setdefault(kind, {})
+            histogram = histograms.get(name)
+            if histogram is None:
+                histogram = histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    def add_trace(self, trace, seconds):
+        self.add('views', trace.view or 'unknown', seconds)
+        for call in trace.calls:
+            self.add('api', "%s.%s" % (call['service'], call['operation']),
+                     call['seconds'])
+
+    def summary(self):
+        with self._lock:
+            return dict((kind, dict((name, histogram.summary())
+                                    for name, histogram in histograms.items()))
+                        for kind, histograms in self.histograms.items())
+
+    def clear(self):
+        with self._lock:
+            self.histograms = {'views': {}, 'api': {}}
+
+
+metrics = Metrics()
+
+
+def view_name(view_func):
+    # The functions returned by as_view() take the name of their class.
+    return "%s.%s" % (getattr(view_func, '__module__', None),
+                      getattr(view_func, '__name__', view_func))
+
+
+def server_timing(trace, seconds):
+    """ Returns the ``Server-Timing`` header value of a trace. """
+    timings = ['total;dur=%.1f' % (seconds * 1000)]
+    for index, operation in enumerate(trace.summary()):
+        timings.append('api%d;dur=%.1f;desc="%s x%d"'
+                       % (index, operation['seconds'] * 1000,
+                          operation['name'], operation['count']))
+    return ", ".join(timings)
+
+
+def start(request):
+    """ Starts recording the API calls made for ``request``. """
+    request.horizon['trace'] = _local.trace = RequestTrace()
+
+
+def finish(request, response):
+    """
+    Logs the trace of a finished request, adds it to the metrics and, with
+    ``instrumentation_debug`` on, reports its calls in the response.
+    """
+    trace = getattr(request, 'horizon', {}).get('trace')
+    if trace is None:
+        return response
+    if current() is trace:
+        _local.trace = None
+    seconds = time.time() - trace.start
+    metrics.add_trace(trace, seconds)
+    LOG.info(json.dumps({'path': request.path,
+                         'view': trace.view,
+                         'status': response.status_code,
+                         'seconds': round(seconds, 4),
+                         'api_seconds': round(trace.api_seconds, 4),
+                         'api_calls': [dict(call,
+                                            seconds=round(call['seconds'], 4))
+                                       for call in trace.calls]}))
+    if not is_debug():
+        return response
+    response['Server-Timing'] = server_timing(trace, seconds)
+    # The panel goes into complete pages only, not into streamed responses
+    # or the fragments loaded with AJAX.
+    if getattr(response, '_base_content_is_iter', False) or \
+            request.is_ajax() or \
+            not response.get('Content-Type', '').startswith('text/html'):
+        return response
+    content = response.content
+    index = content.rfind('</body>')
+    if index >= 0:
+        panel = render_to_string('horizon/_api_calls.html',
+                                 {'trace': trace,
+                                  'seconds': seconds,
+                                  'operations': trace.summary()})
+        response.content = content[:index] + smart_str(panel) + \
+            content[index:]
+    return response
@@ -19,16 +19,50 @@ Drop-in replacement for django.contrib.messages which handles Horizon's
 messaging needs (e.g. AJAX communication, etc.).
 """
 
+from contextlib import contextmanager
+import threading
+
 from django.contrib import messages as _messages
 from django.contrib.messages import constants
 from django.utils.encoding import force_unicode
 from django.utils.safestring import SafeData
 
+from horizon import events
+
+
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred(queue):
+    """
+    Context manager which collects the messages added by the current thread
+    in the ``queue`` list instead of adding them to the request. Each item
+    is a tuple of the arguments passed to :func:`add_message`, so the
+    messages can be added later on in a predictable order.
+    """
+    previous = getattr(_deferred, 'queue', None)
+    _deferred.queue = queue
+    try:
+        yield queue
+    finally:
+        _deferred.queue = previous
+
 
 def add_message(request, level, message, extra_tags='', fail_silently=False):
     """
     Attempts to add a message to the request using the 'messages' app.
     """
+    queue = getattr(_deferred, 'queue', None)
+    if queue is not None:
+        queue.append((request, level, message, extra_tags, fail_silently))
+        return
+    if getattr(request, 'horizon', {}).get('finished'):
+        # The response has been sent already (e.g. the message comes from a
+        # background thread), so it can only reach the user as an event.
+        events.publish_message(request.user.id, constants.DEFAULT_TAGS[level],
+                               message, extra_tags)
+        return
     if request.is_ajax():
         tag = constants.DEFAULT_TAGS[level]
         # if message is marked as safe, pass "safe" tag as extra_tags so that
@@ -34,6 +34,8 @@ from django.utils import timezone
 from django.utils.encoding import iri_to_uri
 
 from horizon import exceptions
+from horizon import instrumentation
+from horizon.utils import memoized
 
 
 LOG = logging.getLogger(__name__)
@@ -52,6 +54,13 @@ class HorizonMiddleware(object):
         request.horizon = {'dashboard': None,
                            'panel': None,
                            'async_messages': []}
+        if instrumentation.is_enabled():
+            instrumentation.start(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        trace = getattr(request, 'horizon', {}).get('trace')
+        if trace is not None:
+            trace.view = instrumentation.view_name(view_func)
 
     def process_exception(self, request, exception):
         """
@@ -92,6 +101,11 @@ class HorizonMiddleware(object):
         Convert HttpResponseRedirect to HttpResponse if request is via ajax
         to allow ajax request to redirect url
         """
+        # Free anything memoized for this request now that it's finished.
+        memoized.clear_request_cache(request)
+        if hasattr(request, 'horizon'):
+            request.horizon['finished'] = True
+            response = instrumentation.finish(request, response)
         if request.is_ajax():
             queued_msgs = request.horizon['async_messages']
             if type(response) == http.HttpResponseRedirect:
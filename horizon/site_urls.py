@@ -24,7 +24,11 @@ from django.conf import settings
 
 
 urlpatterns = patterns('horizon.views',
-    url(r'home/$', 'user_home', name='user_home')
+    url(r'home/$', 'user_home', name='user_home'),
+    url(r'^events/$', 'events', name='events'),
+    url(r'^batch/$', 'batch_progress', name='batch_progress'),
+    url(r'^jobs/$', 'jobs', name='jobs'),
+    url(r'^metrics/$', 'metrics', name='metrics')
 )
 
 # Client-side i18n URLconf.
@@ -5,6 +5,7 @@ horizon.conf = {
   ajax: {
     queue_limit: null
   },
+  events_url: null,
 
   // Config options which may be overridden.
   spinner_options: {
@@ -0,0 +1,81 @@
+/* Receives the events the server pushes through its event bus by
+ * long-polling horizon.conf.events_url, and dispatches them to the handlers
+ * registered for their type.
+ */
+horizon.events = {
+  connected: false,
+  last_id: null,
+  retry_interval: 5000,
+  _handlers: {},
+
+  // Registers a function called with the data and channel of each event of
+  // the given type.
+  on: function (type, handler) {
+    if (!horizon.events._handlers[type]) {
+      horizon.events._handlers[type] = [];
+    }
+    horizon.events._handlers[type].push(handler);
+  },
+
+  // Calls the handlers of an event type. Handlers are passed null data when
+  // events may have been missed, and should refresh everything instead.
+  _dispatch: function (type, data, channel) {
+    $.each(horizon.events._handlers[type] || [], function (index, handler) {
+      handler(data, channel);
+    });
+  },
+
+  channels: function () {
+    var channels = {};
+    $('[data-event-channel]').each(function () {
+      channels[$(this).attr('data-event-channel')] = true;
+    });
+    return _.keys(channels);
+  },
+
+  poll: function () {
+    // The request is held open by the server, so it bypasses the AJAX
+    // queue rather than taking up one of its slots.
+    $.ajax({
+      url: horizon.conf.events_url,
+      data: {channel: horizon.events.channels(),
+             last_id: horizon.events.last_id},
+      traditional: true,
+      dataType: 'json',
+      global: false,
+      cache: false,
+      success: function (data, textStatus, jqXHR) {
+        var missed = data.missed && horizon.events.last_id !== null;
+        horizon.events.connected = true;
+        horizon.events.last_id = data.last_id;
+        if (missed) {
+          $.each(_.keys(horizon.events._handlers), function (index, type) {
+            horizon.events._dispatch(type, null, null);
+          });
+        }
+        $.each(data.events, function (index, event) {
+          horizon.events._dispatch(event.type, event.data, event.channel);
+        });
+        horizon.events.poll();
+      },
+      error: function (jqXHR, textStatus, errorThrown) {
+        horizon.events.connected = false;
+        if (jqXHR.status !== 401 && jqXHR.status !== 404) {
+          setTimeout(horizon.events.poll, horizon.events.retry_interval);
+        }
+      }
+    });
+  }
+};
+
+horizon.addInitFunction(function () {
+  horizon.events.on('message', function (data, channel) {
+    if (data) {
+      horizon.alert(data[0], data[1], data[2]);
+    }
+  });
+
+  if (horizon.conf.events_url) {
+    horizon.events.poll();
+  }
+});
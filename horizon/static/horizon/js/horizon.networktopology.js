@@ -17,24 +17,69 @@ horizon.network_topology = {
   network_lightness: 0.7,
   reload_duration: 10000,
   spinner:null,
+  collections: ['servers', 'networks', 'subnets', 'ports', 'routers'],
   init:function(){
     var self = this;
     $("#topologyCanvas").spin(horizon.conf.spinner_options.modal);
     self.retrieve_network_info();
-    setInterval(function(){
-      self.retrieve_network_info();
-    }, self.reload_duration);
   },
   retrieve_network_info: function(){
     var self = this;
     if($("#networktopology").length === 0) {
         return;
     }
-    $.getJSON($("#networktopology").data("networktopology"),
+    // Once the graph is drawn only the changes to it are asked for.
+    var params = self.model ? {since: self.model.version} : {};
+    $.getJSON($("#networktopology").data("networktopology"), params,
       function(data) {
-        self.draw_graph(data);
+        if (data.since === undefined) {
+          self.draw_graph(data);
+        } else if (self.merge_changes(data)) {
+          self.draw_graph(self.model);
+        } else {
+          self.model.version = data.version;
+        }
       }
-    );
+    ).always(function () {
+      setTimeout(function(){
+        self.retrieve_network_info();
+      }, self.reload_duration);
+    });
+  },
+  merge_changes: function(data){
+    // Applies the changes since the drawn version to the model, and returns
+    // whether there were any.
+    var self = this,
+        changes = 0;
+    $.each(self.collections, function(index, collection){
+      var removed = data.removed[collection],
+          changed = {};
+      $.each(data.changed[collection], function(index, resource){
+        changed[resource.id] = resource;
+      });
+      changes += removed.length + data.changed[collection].length;
+      // Update the resources in place, keeping their order.
+      self.model[collection] = $.map(self.model[collection], function(resource){
+        if (_.contains(removed, resource.id)) {
+          return null;
+        }
+        if (changed[resource.id]) {
+          var updated = changed[resource.id];
+          delete changed[resource.id];
+          return updated;
+        }
+        return resource;
+      });
+      $.each(changed, function(id, resource){
+        self.model[collection].push(resource);
+      });
+    });
+    // External networks are drawn first.
+    self.model.networks = _.sortBy(self.model.networks, function(network){
+      return network['router:external'] ? 0 : 1;
+    });
+    self.model.version = data.version;
+    return changes > 0;
   },
   draw_loading: function () {
     $("#topologyCanvas").spin(horizon.conf.spinner_options.modal);
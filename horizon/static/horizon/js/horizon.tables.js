@@ -1,7 +1,11 @@
 /* Namespace for core functionality related to DataTables. */
 horizon.datatables = {
+  // Timer of the next poll, if one is scheduled.
+  _next_update: null,
+
   update: function () {
     var $rows_to_update = $('tr.status_unknown.ajax-update');
+    horizon.datatables._next_update = null;
     if ($rows_to_update.length) {
       var interval = $rows_to_update.attr('data-update-interval'),
           $table = $rows_to_update.closest('table'),
@@ -10,89 +14,12 @@ horizon.datatables = {
       // Do not update this row if the action column is expanded
       if ($rows_to_update.find('.actions_column .btn-group.open').length) {
         // Wait and try to update again in next interval instead
-        setTimeout(horizon.datatables.update, interval);
+        horizon.datatables._next_update = setTimeout(horizon.datatables.update, interval);
         // Remove interval decay, since this will not hit server
         $table.removeAttr('decay_constant');
         return;
       }
-      // Trigger the update handlers.
-      $rows_to_update.each(function(index, row) {
-        var $row = $(this),
-            $table = $row.closest('table.datatable');
-        horizon.ajax.queue({
-          url: $row.attr('data-update-url'),
-          error: function (jqXHR, textStatus, errorThrown) {
-            switch (jqXHR.status) {
-              // A 404 indicates the object is gone, and should be removed from the table
-              case 404:
-                // Update the footer count and reset to default empty row if needed
-                var $footer, row_count, footer_text, colspan, template, params, $empty_row;
-
-                // existing count minus one for the row we're removing
-                horizon.datatables.update_footer_count($table, -1);
-
-                if(row_count === 0) {
-                  colspan = $table.find('th[colspan]').attr('colspan');
-                  template = horizon.templates.compiled_templates["#empty_row_template"];
-                  params = {"colspan": colspan};
-                  empty_row = template.render(params);
-                  $row.replaceWith(empty_row);
-                } else {
-                  $row.remove();
-                }
-                // Reset tablesorter's data cache.
-                $table.trigger("update");
-                break;
-              default:
-                horizon.utils.log(gettext("An error occurred while updating."));
-                $row.removeClass("ajax-update");
-                $row.find("i.ajax-updating").remove();
-                break;
-            }
-          },
-          success: function (data, textStatus, jqXHR) {
-            var $new_row = $(data);
-
-            if ($new_row.hasClass('status_unknown')) {
-              var spinner_elm = $new_row.find("td.status_unknown:last");
-
-              if ($new_row.find('a.btn-action-required').length > 0) {
-                spinner_elm.prepend(
-                     $("<div />")
-                     .addClass("action_required_img")
-                     .append(
-                         $("<img />")
-                         .attr("src", "/static/dashboard/img/action_required.png")));
-              } else {
-                // Replacing spin.js here with an animated gif to reduce CPU
-                spinner_elm.prepend(
-                     $("<div />")
-                     .addClass("loading_gif")
-                     .append(
-                         $("<img />")
-                         .attr("src", "/static/dashboard/img/loading.gif")));
-              }
-            }
-
-            // Only replace row if the html content has changed
-            if($new_row.html() != $row.html()) {
-              if($row.find(':checkbox').is(':checked')) {
-                // Preserve the checkbox if it's already clicked
-                $new_row.find(':checkbox').prop('checked', true);
-              }
-              $row.replaceWith($new_row);
-              // Reset tablesorter's data cache.
-              $table.trigger("update");
-              // Reset decay constant.
-              $table.removeAttr('decay_constant');
-            }
-          },
-          complete: function (jqXHR, textStatus) {
-            // Revalidate the button check for the updated table
-            horizon.datatables.validate_button();
-          }
-        });
-      });
+      horizon.datatables.update_rows($rows_to_update);
 
       // Set interval decay to this table, and increase if it already exist
       if(decay_constant === undefined) {
@@ -103,12 +30,145 @@ horizon.datatables = {
       $table.attr('decay_constant', decay_constant);
       // Poll until there are no rows in an "unknown" state on the page.
       next_poll = interval * decay_constant;
+      // Rows which are sent the changes made through the dashboard as
+      // events are polled half as often, for the changes made elsewhere.
+      if (horizon.events.connected &&
+          !$rows_to_update.not('[data-event-channel]').length) {
+        next_poll *= 2;
+      }
       // Limit the interval to 30 secs
       if(next_poll > 30 * 1000) next_poll = 30 * 1000;
-      setTimeout(horizon.datatables.update, next_poll);
+      horizon.datatables._next_update = setTimeout(horizon.datatables.update, next_poll);
     }
   },
 
+  update_rows: function ($rows) {
+    // Poll each table's rows with a single request, sending the hash of
+    // each row so that only the rows which changed are sent back.
+    var tables = {};
+    $rows.each(function (index, row) {
+      var $row = $(this),
+          url = $row.attr('data-bulk-update-url');
+      if (!tables[url]) {
+        tables[url] = {rows: {}, obj_ids: [], hashes: []};
+      }
+      tables[url].rows[$row.attr('data-object-id')] = $row;
+      tables[url].obj_ids.push($row.attr('data-object-id'));
+      tables[url].hashes.push($row.attr('data-update-hash'));
+    });
+    $.each(tables, function (url, pending) {
+      horizon.ajax.queue({
+        url: url,
+        data: {obj_id: pending.obj_ids, hash: pending.hashes},
+        traditional: true,
+        dataType: 'json',
+        error: function (jqXHR, textStatus, errorThrown) {
+          horizon.utils.log(gettext("An error occurred while updating."));
+          $.each(pending.rows, function (obj_id, $row) {
+            horizon.datatables.stop_row_update($row);
+          });
+        },
+        success: function (data, textStatus, jqXHR) {
+          $.each(data.deleted, function (index, obj_id) {
+            horizon.datatables.remove_row(pending.rows[obj_id]);
+          });
+          $.each(data.failed, function (index, obj_id) {
+            horizon.utils.log(gettext("An error occurred while updating."));
+            horizon.datatables.stop_row_update(pending.rows[obj_id]);
+          });
+          $.each(data.rows, function (obj_id, html) {
+            horizon.datatables.replace_row(pending.rows[obj_id], $(html));
+          });
+        },
+        complete: function (jqXHR, textStatus) {
+          // Revalidate the button check for the updated table
+          horizon.datatables.validate_button();
+          // Start polling again if a row went into an "unknown" state.
+          if (horizon.datatables._next_update === null) {
+            horizon.datatables.update();
+          }
+        }
+      });
+    });
+  },
+
+  update_from_event: function (data, channel) {
+    var $rows = $('tr.ajax-update[data-event-channel]');
+    if (data) {
+      // Only the row of the object which changed needs updating.
+      $rows = $rows.filter(function () {
+        var $row = $(this);
+        return $row.attr('data-event-channel') === channel &&
+               $row.attr('data-object-id') === data.obj_id;
+      });
+    }
+    if ($rows.length) {
+      horizon.datatables.update_rows($rows);
+    }
+  },
+
+  remove_row: function ($row) {
+    // The object is gone, so remove its row from the table.
+    var $table = $row.closest('table.datatable'),
+        row_count, colspan, template, params;
+
+    // existing count minus one for the row we're removing
+    horizon.datatables.update_footer_count($table, -1);
+    row_count = $table.find('tbody tr').not('.empty').length - 1;
+
+    if(row_count === 0) {
+      // Reset to default empty row.
+      colspan = $table.find('th[colspan]').attr('colspan');
+      template = horizon.templates.compiled_templates["#empty_row_template"];
+      params = {"colspan": colspan};
+      $row.replaceWith(template.render(params));
+    } else {
+      $row.remove();
+    }
+    // Reset tablesorter's data cache.
+    $table.trigger("update");
+  },
+
+  replace_row: function ($row, $new_row) {
+    var $table = $row.closest('table.datatable');
+
+    if ($new_row.hasClass('status_unknown')) {
+      var spinner_elm = $new_row.find("td.status_unknown:last");
+
+      if ($new_row.find('a.btn-action-required').length > 0) {
+        spinner_elm.prepend(
+             $("<div />")
+             .addClass("action_required_img")
+             .append(
+                 $("<img />")
+                 .attr("src", "/static/dashboard/img/action_required.png")));
+      } else {
+        // Replacing spin.js here with an animated gif to reduce CPU
+        spinner_elm.prepend(
+             $("<div />")
+             .addClass("loading_gif")
+             .append(
+                 $("<img />")
+                 .attr("src", "/static/dashboard/img/loading.gif")));
+      }
+    }
+
+    if($row.find(':checkbox').is(':checked')) {
+      // Preserve the checkbox if it's already clicked
+      $new_row.find(':checkbox').prop('checked', true);
+    }
+    $row.replaceWith($new_row);
+    // Reset tablesorter's data cache.
+    $table.trigger("update");
+    // Reset decay constant.
+    $table.removeAttr('decay_constant');
+  },
+
+  stop_row_update: function ($row) {
+    $row.removeClass("ajax-update");
+    $row.find("i.ajax-updating").remove();
+  },
+
   validate_button: function () {
     // Disable form button if checkbox are not checked
     $("form").each(function (i) {
@@ -241,7 +301,7 @@ horizon.datatables.fix_row_striping = function (table) {
 
 horizon.datatables.set_table_sorting = function (parent) {
 // Function to initialize the tablesorter plugin strictly on sortable columns.
-$(parent).find("table.datatable").each(function () {
+$(parent).find("table.datatable").not(".server_side_sort").each(function () {
   var $table = $(this),
       header_options = {};
   // Disable if not sortable or has <= 1 item
@@ -274,7 +334,8 @@ horizon.datatables.add_table_checkboxes = function(parent) {
 };
 
 horizon.datatables.set_table_query_filter = function (parent) {
-  $(parent).find('table').each(function (index, elm) {
+  // Tables filtered by their data source submit the filter to the server.
+  $(parent).find('table').not('.server_side_filter').each(function (index, elm) {
     var input = $($(elm).find('div.table_search input')),
         table_selector;
     if (input.length > 0) {
@@ -389,5 +450,6 @@ horizon.addInitFunction(function() {
   horizon.modals.addModalInitFunction(horizon.datatables.set_table_query_filter);
   horizon.modals.addModalInitFunction(horizon.datatables.set_table_fixed_filter);
 
+  horizon.events.on('row', horizon.datatables.update_from_event);
   horizon.datatables.update();
 });
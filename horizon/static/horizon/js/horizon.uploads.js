@@ -0,0 +1,68 @@
+/*
+  Shows the progress of file uploads from modal forms.
+
+  Forms with a data-upload-progress-url attribute are given a random upload
+  id when they are submitted with a file. The id is passed on to the form's
+  action, and the progress of the upload is polled from the given URL with
+  it until the response to the form arrives.
+*/
+horizon.uploads = {
+  poll_interval: 1000,
+
+  new_upload_id: function () {
+    return (new Date()).getTime().toString(36) + "-" +
+      Math.random().toString(36).substr(2);
+  },
+
+  start: function ($form) {
+    var upload_id = horizon.uploads.new_upload_id(),
+        action = $form.attr("action"),
+        $bar = $('<div class="progress progress-striped active upload-progress">' +
+                 '<div class="bar" style="width: 0%;"></div></div>');
+
+    $form.attr("action", action + (action.indexOf("?") < 0 ? "?" : "&") +
+               "upload_id=" + encodeURIComponent(upload_id));
+    $form.find(".modal-footer .btn-primary").prop("disabled", true);
+    $form.find(".modal-body").append($bar);
+    horizon.uploads.poll($form.attr("data-upload-progress-url"), upload_id,
+                         $bar);
+  },
+
+  poll: function (url, upload_id, $bar) {
+    setTimeout(function () {
+      $.ajax(url, {
+        data: {upload_id: upload_id},
+        dataType: "json",
+        success: function (progress) {
+          if (progress.total) {
+            $bar.find(".bar").css("width", Math.min(100,
+              Math.round(100 * progress.received / progress.total)) + "%");
+          }
+          if (progress.failed) {
+            $bar.addClass("progress-danger");
+          }
+          if (!progress.finished) {
+            horizon.uploads.poll(url, upload_id, $bar);
+          }
+        },
+        error: function (jqXHR) {
+          // The upload may not have started yet.
+          if (jqXHR.status === 404) {
+            horizon.uploads.poll(url, upload_id, $bar);
+          }
+        }
+      });
+    }, horizon.uploads.poll_interval);
+  }
+};
+
+horizon.addInitFunction(function () {
+  $(document).on("submit", "form[data-upload-progress-url]", function (evt) {
+    var $form = $(this);
+    if ($form.find("input[type=file]").filter(function () {
+          return $(this).val();
+        }).length) {
+      horizon.uploads.start($form);
+    }
+  });
+});
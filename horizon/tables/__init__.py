@@ -17,6 +17,6 @@
 # Convenience imports for public API components.
 from .actions import (Action, BatchAction, DeleteAction,
                       LinkAction, FilterAction, FixedFilterAction)
-from .base import DataTable, Column, Row
+from .base import DataTable, Column, Row, TableQuery
 from .views import DataTableView, MultiTableView, MultiTableMixin, \
                     MixedDataTableView
@@ -24,9 +24,10 @@ from django.core import urlresolvers
 from django.utils.functional import Promise
 from django.utils.translation import ugettext_lazy as _
 
+from horizon import events
 from horizon import exceptions
 from horizon import messages
-from horizon.utils import html, functions
+from horizon.utils import concurrency, html, functions, jobs
 
 
 LOG = logging.getLogger(__name__)
@@ -34,6 +35,31 @@ LOG = logging.getLogger(__name__)
 # For Bootstrap integration; can be overridden in settings.
 ACTION_CSS_CLASSES = ("btn", "btn-small")
 STRING_SEPARATOR = "__"
+# The kind of the background jobs taking batch actions.
+BATCH_JOB = "batch"
+
+
+def get_batch_progress(job_id):
+    """
+    Returns the progress of a batch action taken in the background, as a
+    dict holding the ``total`` number of objects, how many were
+    ``completed`` and ``succeeded``, whether it has ``finished``, the
+    ``[tag, text]`` pairs of the ``messages`` summing up its outcome and the
+    ``user_id`` of the user who took it, or ``None`` if it's unknown.
+    """
+    return get_batch_progress_from_status(jobs.get_status(job_id))
+
+
+def get_batch_progress_from_status(status):
+    """
+    Returns the progress of a batch action from the status of its job (see
+    :func:`horizon.utils.jobs.get_status`), as :func:`get_batch_progress`
+    does, or ``None`` if the job isn't a batch action.
+    """
+    if status is None or status['kind'] != BATCH_JOB:
+        return None
+    return dict(status['progress'], user_id=status['user_id'],
+                finished=status['finished'], messages=status['messages'])
 
 
 class BaseAction(html.HTMLElement):
@@ -485,8 +511,25 @@ class BatchAction(Action):
 
        Optional location to redirect after completion of the delete
        action. Defaults to the current page.
+
+    .. attribute:: concurrent
+
+       Whether the action may be taken on several objects at the same time,
+       on the worker pool sized by the ``concurrent_workers`` setting.
+       Only set it for actions whose ``action`` method doesn't change the
+       state of the action itself. Defaults to ``False``.
+
+    .. attribute:: background_threshold
+
+       Optional number of objects from which the action is taken in the
+       background: the user is redirected straight away, and the progress
+       and outcome can be polled from the ``horizon:batch_progress`` view.
+       The user is only notified when it is done if the ``event_bus`` is
+       enabled. Defaults to ``None`` (never).
     """
     success_url = None
+    concurrent = False
+    background_threshold = None
 
     def __init__(self):
         self.current_present_action = 0
@@ -553,8 +596,7 @@ class BatchAction(Action):
         return request.get_full_path()
 
     def handle(self, table, request, obj_ids):
-        action_success = []
-        action_failure = []
+        items = []
         action_not_allowed = []
         for datum_id in obj_ids:
             datum = table.get_object_by_id(datum_id)
@@ -564,10 +606,55 @@ class BatchAction(Action):
                 LOG.info('Permission denied to %s: "%s"' %
                          (self._conjugate(past=True).lower(), datum_display))
                 continue
+            items.append((datum_id, datum, datum_display))
+
+        if action_not_allowed:
+            msg = _('You do not have permission to %(action)s: %(objs)s')
+            params = {"action": self._conjugate(action_not_allowed).lower(),
+                      "objs": functions.lazy_join(", ", action_not_allowed)}
+            messages.error(request, msg % params)
+
+        if (self.background_threshold is not None
+                and len(items) >= self.background_threshold):
+            if events.get_event_bus() is None:
+                msg = _('%(action)s: %(objs)s. This happens in the '
+                        'background.')
+            else:
+                msg = _('%(action)s: %(objs)s. This happens in the '
+                        'background, you will be notified when it is done.')
+            params = {"action": self._conjugate(items),
+                      "objs": functions.lazy_join(", ", [item[2] for item
+                                                         in items])}
+            messages.info(request, msg % params)
             try:
-                self.action(request, datum_id)
+                self._start_batch(table, request, items)
+            except exceptions.JobQueueFull:
+                exceptions.handle(request)
+        else:
+            self._take_action(table, request, items,
+                              downgrade=bool(action_not_allowed))
+
+        return shortcuts.redirect(self.get_success_url(request))
+
+    def _take_action(self, table, request, items, downgrade=False,
+                     job=None):
+        """
+        Takes the action on each of the ``(id, datum, display)`` items, on
+        the worker pool if the action is ``concurrent``, and adds messages
+        summing up the outcome.
+        """
+        action_success = []
+        action_failure = []
+        tasks = [concurrency.Task(self.action, request, datum_id)
+                 for datum_id, datum, datum_display in items]
+        tasks = concurrency.iter_tasks(tasks, concurrent=self.concurrent)
+        for index, task in enumerate(tasks):
+            datum_id, datum, datum_display = items[index]
+            try:
+                task.get_result()
                 #Call update to invoke changes if needed
                 self.update(request, datum)
+                table.publish_change(datum)
                 action_success.append(datum_display)
                 self.success_ids.append(datum_id)
                 LOG.info('%s: "%s"' %
@@ -582,14 +669,13 @@ class BatchAction(Action):
                     ignore = True
                     action_failure.append(datum_display)
                 exceptions.handle(request, ignore=ignore)
+            if job:
+                job.set_progress(completed=index + 1,
+                                 succeeded=len(action_success))
 
         # Begin with success message class, downgrade to info if problems.
         success_message_level = messages.success
-        if action_not_allowed:
-            msg = _('You do not have permission to %(action)s: %(objs)s')
-            params = {"action": self._conjugate(action_not_allowed).lower(),
-                      "objs": functions.lazy_join(", ", action_not_allowed)}
-            messages.error(request, msg % params)
+        if downgrade:
             success_message_level = messages.info
         if action_failure:
             msg = _('Unable to %(action)s: %(objs)s')
@@ -603,7 +689,19 @@ class BatchAction(Action):
                       "objs": functions.lazy_join(", ", action_success)}
             success_message_level(request, msg % params)
 
-        return shortcuts.redirect(self.get_success_url(request))
+    def _start_batch(self, table, request, items):
+        """
+        Takes the action on the items as a background job, and returns the
+        id of the job. The progress of the user's latest jobs is served by
+        the ``horizon:batch_progress`` view.
+        """
+        job = jobs.Job(self._take_action, table, request, items)
+        job.kwargs['job'] = job
+        job.name = unicode(self._conjugate(items))
+        job.kind = BATCH_JOB
+        job.progress = {'total': len(items), 'completed': 0, 'succeeded': 0}
+        jobs.submit(request, job)
+        return job.id
 
 
 class DeleteAction(BatchAction):
@@ -16,6 +16,8 @@
 
 import collections
 import copy
+import hashlib
+import json
 import logging
 from operator import attrgetter
 import sys
@@ -26,7 +28,6 @@ from django import template
 from django.conf import settings
 from django.core import urlresolvers
 from django.template.defaultfilters import truncatechars
-from django.template.loader import render_to_string
 from django.utils import http
 from django.utils.datastructures import SortedDict
 from django.utils.html import escape
@@ -36,6 +37,7 @@ from django.utils.safestring import mark_safe
 from django.utils import termcolors
 
 from horizon import conf
+from horizon import events
 from horizon import exceptions
 from horizon import messages
 from horizon.utils import html
@@ -313,6 +315,21 @@ class Column(html.HTMLElement):
 
         return self.table._data_cache[self][datum_id]
 
+    def get_sort_string(self):
+        """ Returns the query string which sorts the table by this column
+        for tables sorted by their data source, or ``None`` if the column
+        isn't sortable. Selecting the column the table is currently sorted by
+        reverses the sort.
+        """
+        if not (self.table._meta.server_side_sort and self.sortable
+                and not self.auto):
+            return None
+        current = self.table.get_query().sort
+        descending = bool(current) and current[0] == (self.name, False)
+        sort_string = "-%s" % self.name if descending else self.name
+        return self.table.get_query_string(
+            **{self.table.get_sort_param_name(): sort_string})
+
     def get_link_url(self, datum):
         """ Returns the final value for the column's ``link`` property.
 
@@ -413,9 +430,27 @@ class Row(html.HTMLElement):
         String that is used for the query parameter key to request AJAX
         updates. Generally you won't need to change this value.
         Default: ``"row_update"``.
+
+    .. attribute:: ajax_bulk_action_name
+
+        String that is used for the query parameter key to request AJAX
+        updates of several rows at once. The browser polls all the rows of
+        a table which are in an unknown state with a single such request.
+        Default: ``"rows_update"``.
+
+    .. attribute:: event_channel
+
+        The name of the :mod:`horizon.events` channel on which changes to
+        the row's objects are published, e.g. ``"instances"``. When events
+        are enabled, rows in an unknown state are updated as soon as an
+        event for their object arrives, and polled half as often for the
+        changes which aren't published (those made outside the dashboard).
+        Default: ``None``.
     """
     ajax = False
     ajax_action_name = "row_update"
+    ajax_bulk_action_name = "rows_update"
+    event_channel = None
 
     def __init__(self, table, datum=None):
         super(Row, self).__init__()
@@ -449,16 +484,16 @@ class Row(html.HTMLElement):
         else:
             datum = self.datum
         cells = []
+        datum_id = table.get_object_id(datum)
         for column in table.columns.values():
             if column.auto == "multi_select":
-                widget = forms.CheckboxInput(check_test=False)
+                widget = table._multi_select_widget
                 # Convert value to string to avoid accidental type conversion
-                data = widget.render('object_ids',
-                                     unicode(table.get_object_id(datum)))
-                table._data_cache[column][table.get_object_id(datum)] = data
+                data = widget.render('object_ids', unicode(datum_id))
+                table._data_cache[column][datum_id] = data
             elif column.auto == "actions":
                 data = table.render_row_actions(datum)
-                table._data_cache[column][table.get_object_id(datum)] = data
+                table._data_cache[column][datum_id] = data
             else:
                 data = column.get_data(datum)
             cell = Cell(datum, data, column, self)
@@ -475,10 +510,19 @@ class Row(html.HTMLElement):
         self.classes.append(self.status_class)
         id_vals = {"table": self.table.name,
                    "sep": STRING_SEPARATOR,
-                   "id": table.get_object_id(datum)}
+                   "id": datum_id}
         self.id = "%(table)s%(sep)srow%(sep)s%(id)s" % id_vals
         self.attrs['id'] = self.id
 
+        if self.ajax:
+            self.attrs['data-object-id'] = datum_id
+            self.attrs['data-bulk-update-url'] = \
+                                        self.get_ajax_bulk_update_url()
+            event_channel = self.get_event_channel()
+            if event_channel:
+                self.attrs['data-event-channel'] = event_channel
+        self._rendered_cells = None
+
     def __repr__(self):
         return '<%s: %s>' % (self.__class__.__name__, self.id)
 
@@ -501,9 +545,25 @@ class Row(html.HTMLElement):
         else:
             return ''
 
+    def get_default_attrs(self):
+        attrs = super(Row, self).get_default_attrs()
+        if self.ajax and self.datum:
+            attrs['data-update-hash'] = self.get_update_hash()
+        return attrs
+
     def render(self):
-        return render_to_string("horizon/common/_data_table_row.html",
-                                {"row": self})
+        row_template = self.table.get_template(
+                                        "horizon/common/_data_table_row.html")
+        return row_template.render(template.Context({"row": self}))
+
+    def render_cells(self):
+        """ Returns the rendered ``<td>`` elements of the row's cells. """
+        if self._rendered_cells is None:
+            cells_template = self.table.get_template(
+                                    "horizon/common/_data_table_cells.html")
+            self._rendered_cells = cells_template.render(
+                                            template.Context({"row": self}))
+        return self._rendered_cells
 
     def get_cells(self):
         """ Returns the bound cells for this row in order. """
@@ -516,6 +576,32 @@ class Row(html.HTMLElement):
                             "obj_id": self.table.get_object_id(self.datum)})
         return "%s?%s" % (table_url, params)
 
+    def get_ajax_bulk_update_url(self):
+        table_url = self.table.get_absolute_url()
+        params = urlencode({"table": self.table.name,
+                            "action": self.ajax_bulk_action_name})
+        return "%s?%s" % (table_url, params)
+
+    def get_event_channel(self):
+        """
+        Returns the channel the browser listens on for changes to the row,
+        which by default is the current project's ``event_channel``.
+        Override it to return ``event_channel`` itself for tables listing
+        the objects of every project.
+        """
+        tenant_id = getattr(self.table.request.user, 'tenant_id', None)
+        if self.event_channel and tenant_id:
+            return events.project_channel(tenant_id, self.event_channel)
+        return None
+
+    def get_update_hash(self):
+        """
+        Returns a hash of the row's rendered contents, which lets bulk AJAX
+        updates leave out the rows which haven't changed.
+        """
+        content = u"%s\n%s" % (self.status_class, self.render_cells())
+        return hashlib.md5(content.encode('utf-8')).hexdigest()
+
     def get_data(self, request, obj_id):
         """
         Fetches the updated data for the row based on the object id
@@ -524,6 +610,18 @@ class Row(html.HTMLElement):
         raise NotImplementedError("You must define a get_data method on %s"
                                   % self.__class__.__name__)
 
+    def get_bulk_data(self, request, obj_ids):
+        """
+        Fetches the updated data for several rows at once, ideally with a
+        single (filtered) list call. Returns the data objects for those of
+        the ``obj_ids`` which still exist, in any order; the rows of objects
+        which aren't returned are removed from the table.
+
+        Returns ``None`` by default, in which case :meth:`get_data` is called
+        for each row instead.
+        """
+        return None
+
 
 class Cell(html.HTMLElement):
     """ Represents a single cell in the table. """
@@ -618,6 +716,67 @@ class Cell(html.HTMLElement):
         return list(classes)
 
 
+class TableQuery(object):
+    """ The sorting, filtering and pagination requested for a table.
+
+    A table's query is parsed from the current request by
+    :meth:`.DataTable.get_query`. For tables which push any of these down to
+    their data source (see the ``server_side_filter``, ``server_side_sort``
+    and ``page_size`` options) the view passes the query to the table's data
+    method as the ``query`` keyword argument, so that it can be handed on to
+    the API.
+
+    .. attribute:: filter_string
+
+        The search term entered in the table's filter action, or ``''``.
+
+    .. attribute:: sort
+
+        A list of ``(column_name, descending)`` tuples, most significant
+        first. Only sortable columns of the table are ever included.
+
+    .. attribute:: marker
+
+        The pagination marker, or ``None`` for the first page.
+
+    .. attribute:: page_size
+
+        The number of items to return, or ``None`` to leave it up to the
+        data source.
+
+    .. attribute:: has_more
+
+        Set this to ``True`` from the data method when there is another page
+        of data after this one.
+
+    .. attribute:: next_marker
+
+        Optionally set from the data method to the marker of the next page,
+        for data sources whose marker isn't the ID of the last item.
+    """
+    max_page_size = 1000
+
+    def __init__(self, filter_string='', sort=None, marker=None,
+                 page_size=None):
+        self.filter_string = filter_string
+        self.sort = sort or []
+        self.marker = marker
+        self.page_size = page_size
+        self.has_more = False
+        self.next_marker = None
+
+    def __repr__(self):
+        return '<%s: filter=%r sort=%r marker=%r page_size=%r>' % (
+            self.__class__.__name__, self.filter_string, self.sort,
+            self.marker, self.page_size)
+
+    def get_sort_string(self):
+        """ Returns the sort in its query parameter form, e.g.
+        ``"name,-created"``. """
+        return ",".join([("-%s" if descending else "%s") % name
+                         for name, descending in self.sort])
+
+
 class DataTableOptions(object):
     """ Contains options for :class:`.DataTable` objects.
 
@@ -728,6 +887,27 @@ class DataTableOptions(object):
 
         A list of permission names which this table requires in order to be
         displayed. Defaults to an empty list (``[]``).
+
+    .. attribute:: server_side_filter
+
+        Boolean to control whether the table's :class:`.FilterAction` is
+        applied by the data source rather than the table. The filter string
+        is then passed on in the table's :class:`.TableQuery` and the data is
+        displayed as returned. Default: ``False``.
+
+    .. attribute:: server_side_sort
+
+        Boolean to control whether the table is sorted by the data source.
+        Column headers then link to the sort they select, which is passed on
+        in the table's :class:`.TableQuery`, rather than sorting the rows in
+        the browser. Default: ``False``.
+
+    .. attribute:: page_size
+
+        The default number of items per page to request from the data source
+        via the table's :class:`.TableQuery`. The request may ask for a
+        different size with the ``{{ table.name }}__page_size`` parameter.
+        Default: ``None``.
     """
     def __init__(self, options):
         self.name = getattr(options, 'name', self.__class__.__name__)
@@ -747,6 +927,12 @@ class DataTableOptions(object):
                                        "no_data_message",
                                        _("No items to display."))
         self.permissions = getattr(options, 'permissions', [])
+        self.server_side_filter = getattr(options, 'server_side_filter', False)
+        self.server_side_sort = getattr(options, 'server_side_sort', False)
+        self.page_size = getattr(options, 'page_size', None)
+        # Whether the table's query is passed to its data source.
+        self.server_side = (self.server_side_filter or self.server_side_sort
+                            or self.page_size is not None)
 
         # Set self.filter if we have any FilterActions
         filter_actions = [action for action in self.table_actions if
@@ -900,6 +1086,11 @@ class DataTable(object):
 
     def __init__(self, request, data=None, needs_form_wrapper=None, **kwargs):
         self.request = request
+        self._object_index = None
+        self._templates = {}
+        self._static_row_actions = None
+        self._row_actions_context = None
+        self._multi_select_widget = forms.CheckboxInput(check_test=False)
         self.data = data
         self.kwargs = kwargs
         self._needs_form_wrapper = needs_form_wrapper
@@ -930,6 +1121,19 @@ class DataTable(object):
     def __repr__(self):
         return '<%s: %s>' % (self.__class__.__name__, self._meta.name)
 
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+        # Discard everything derived from the previous data.
+        self._object_index = None
+        self.__dict__.pop('_filtered_data', None)
+        if hasattr(self, 'columns'):
+            self._populate_data_cache()
+
     @property
     def name(self):
         return self._meta.name
@@ -942,11 +1146,24 @@ class DataTable(object):
     def multi_select(self):
         return self._meta.multi_select
 
+    @property
+    def server_side_filter(self):
+        return self._meta.server_side_filter
+
+    @property
+    def server_side_sort(self):
+        return self._meta.server_side_sort
+
     @property
     def filtered_data(self):
         if not hasattr(self, '_filtered_data'):
             self._filtered_data = self.data
-            if self._meta.filter and self._meta._filter_action:
+            if self._meta.server_side_filter:
+                # The data source has already applied the filter.
+                if self._meta._filter_action:
+                    self._meta._filter_action.filter_string = \
+                                            self.get_query().filter_string
+            elif self._meta.filter and self._meta._filter_action:
                 action = self._meta._filter_action
                 filter_string = self.get_filter_string()
                 request_method = self.request.method
@@ -969,8 +1186,69 @@ class DataTable(object):
         filter_action = self._meta._filter_action
         param_name = filter_action.get_param_name()
         filter_string = self.request.POST.get(param_name, '')
+        # Pagination links carry server-side filters in the query string.
+        if not filter_string and self._meta.server_side_filter:
+            filter_string = self.request.GET.get(param_name, '')
         return filter_string
 
+    def get_sort_param_name(self):
+        return STRING_SEPARATOR.join([self.name, "sort"])
+
+    def get_page_size_param_name(self):
+        return STRING_SEPARATOR.join([self.name, "page_size"])
+
+    def get_query(self):
+        """ Returns the :class:`.TableQuery` for the current request.
+
+        Unknown or unsortable columns in the requested sort and invalid page
+        sizes are ignored.
+        """
+        if not hasattr(self, '_query'):
+            GET = self.request.GET
+            filter_string = ''
+            if self._meta.filter and self._meta._filter_action:
+                filter_string = self.get_filter_string()
+            sort = []
+            if self._meta.server_side_sort:
+                for key in GET.get(self.get_sort_param_name(), '').split(","):
+                    descending = key.startswith("-")
+                    column = self.columns.get(key.lstrip("-"), None)
+                    if column is not None and column.sortable and \
+                            not column.auto:
+                        sort.append((column.name, descending))
+            page_size = self._meta.page_size
+            try:
+                requested = int(GET[self.get_page_size_param_name()])
+                if 0 < requested <= TableQuery.max_page_size:
+                    page_size = requested
+            except (KeyError, ValueError):
+                pass
+            marker = GET.get(self._meta.pagination_param, None)
+            self._query = TableQuery(filter_string=filter_string,
+                                     sort=sort,
+                                     marker=marker,
+                                     page_size=page_size)
+        return self._query
+
+    def get_query_string(self, **params):
+        """ Returns a query string which preserves the table's current
+        server-side filter, sort and page size, updated with ``params``
+        (keyed by parameter name; ``None`` drops a parameter).
+        """
+        query = self.get_query()
+        current = {}
+        if self._meta.server_side_filter and query.filter_string:
+            param_name = self._meta._filter_action.get_param_name()
+            current[param_name] = query.filter_string
+        if query.sort:
+            current[self.get_sort_param_name()] = query.get_sort_string()
+        if self.get_page_size_param_name() in self.request.GET:
+            current[self.get_page_size_param_name()] = query.page_size
+        current.update(params)
+        return urlencode(sorted((key, unicode(value).encode('utf-8'))
+                                for key, value in current.items()
+                                if value is not None))
+
     def _populate_data_cache(self):
         self._data_cache = {}
         # Set up hash tables to store data points for each column
@@ -995,7 +1273,7 @@ class DataTable(object):
 
     def render(self):
         """ Renders the table using the template from the table options. """
-        table_template = template.loader.get_template(self._meta.template)
+        table_template = self.get_template(self._meta.template)
         extra_context = {self._meta.context_var_name: self}
         context = template.RequestContext(self.request, extra_context)
         return table_template.render(context)
@@ -1023,10 +1301,16 @@ class DataTable(object):
         the ``lookup`` parameter specified. An error will be raised if
         the match is not a single data object.
 
-        Uses :meth:`~horizon.tables.DataTable.get_object_id` internally.
+        Uses :meth:`~horizon.tables.DataTable.get_object_id` internally,
+        through an index of the dataset which is built on the first lookup
+        and discarded when :attr:`data` is reassigned.
         """
-        matches = [datum for datum in self.data if
-                   self.get_object_id(datum) == lookup]
+        if self._object_index is None:
+            self._object_index = {}
+            for datum in self.data or []:
+                self._object_index.setdefault(self.get_object_id(datum),
+                                              []).append(datum)
+        matches = self._object_index.get(lookup, [])
         if len(matches) > 1:
             raise ValueError("Multiple matches were returned for that id: %s."
                            % matches)
@@ -1067,11 +1351,46 @@ class DataTable(object):
 
     def get_row_actions(self, datum):
         """ Returns a list of the action instances for a specific row. """
+        return self._bind_row_actions(datum)
+
+    def _is_static_action(self, action):
+        """
+        Whether an action is known not to change per row, which is the case
+        when it keeps the ``allowed`` and ``update`` methods of the
+        built-in action classes.
+        """
+        action_class = type(action)
+        return all(getattr(action_class, name).__module__ ==
+                   LinkAction.__module__ for name in ('allowed', 'update'))
+
+    def _bind_row_actions(self, datum, share_static=False):
+        """
+        Binds the row actions to ``datum``. Actions are copied to allow
+        modifying their properties per row, unless ``share_static`` is
+        given, in which case the actions which don't change per row are
+        bound in place on a single copy shared by the rows. Only use it
+        when the actions are rendered straight away, before the next row
+        is bound.
+        """
+        if self._static_row_actions is None:
+            # The shared copies are kept apart from ``base_actions``, which
+            # also hold the table actions, so that those never end up bound
+            # to the last row.
+            self._static_row_actions = {}
+            for action in self._meta.row_actions:
+                base_action = self.base_actions[action.name]
+                if self._is_static_action(base_action):
+                    shared_action = copy.copy(base_action)
+                    shared_action.attrs = copy.copy(base_action.attrs)
+                    self._static_row_actions[action.name] = shared_action
         bound_actions = []
         for action in self._meta.row_actions:
-            # Copy to allow modifying properties per row
-            bound_action = copy.copy(self.base_actions[action.name])
-            bound_action.attrs = copy.copy(bound_action.attrs)
+            if share_static and action.name in self._static_row_actions:
+                bound_action = self._static_row_actions[action.name]
+            else:
+                # Copy to allow modifying properties per row
+                bound_action = copy.copy(self.base_actions[action.name])
+                bound_action.attrs = copy.copy(bound_action.attrs)
             bound_action.datum = datum
             # Remove disallowed actions.
             if not self._filter_action(bound_action,
@@ -1086,10 +1405,21 @@ class DataTable(object):
             bound_actions.append(bound_action)
         return bound_actions
 
+    def get_template(self, template_path):
+        """
+        Returns the compiled template at ``template_path``, loading it the
+        first time it is asked for so that rendering many rows doesn't load
+        their templates over and over.
+        """
+        if template_path not in self._templates:
+            self._templates[template_path] = \
+                                template.loader.get_template(template_path)
+        return self._templates[template_path]
+
     def render_table_actions(self):
         """ Renders the actions specified in ``Meta.table_actions``. """
-        template_path = self._meta.table_actions_template
-        table_actions_template = template.loader.get_template(template_path)
+        table_actions_template = self.get_template(
+                                        self._meta.table_actions_template)
         bound_actions = self.get_table_actions()
         extra_context = {"table_actions": bound_actions}
         if self._meta.filter and \
@@ -1102,13 +1432,19 @@ class DataTable(object):
         """
         Renders the actions specified in ``Meta.row_actions`` using the
         current row data. """
-        template_path = self._meta.row_actions_template
-        row_actions_template = template.loader.get_template(template_path)
-        bound_actions = self.get_row_actions(datum)
-        extra_context = {"row_actions": bound_actions,
-                         "row_id": self.get_object_id(datum)}
-        context = template.RequestContext(self.request, extra_context)
-        return row_actions_template.render(context)
+        row_actions_template = self.get_template(
+                                            self._meta.row_actions_template)
+        bound_actions = self._bind_row_actions(datum, share_static=True)
+        # The context processors are only run for the first row.
+        if self._row_actions_context is None:
+            self._row_actions_context = template.RequestContext(self.request)
+        context = self._row_actions_context
+        context.update({"row_actions": bound_actions,
+                        "row_id": self.get_object_id(datum)})
+        try:
+            return row_actions_template.render(context)
+        finally:
+            context.pop()
 
     @staticmethod
     def parse_action(action_string):
@@ -1189,6 +1525,8 @@ class DataTable(object):
         if table_name == self.name:
             # Handle AJAX row updating.
             new_row = self._meta.row_class(self)
+            if new_row.ajax and new_row.ajax_bulk_action_name == action_name:
+                return self.update_rows(new_row)
             if new_row.ajax and new_row.ajax_action_name == action_name:
                 try:
                     datum = new_row.get_data(request, obj_id)
@@ -1213,6 +1551,64 @@ class DataTable(object):
                             return handled
         return None
 
+    def update_rows(self, row):
+        """
+        Handles a bulk AJAX row update for the ``obj_id`` query parameters,
+        using ``row`` to load their data.
+
+        Each ``obj_id`` may be paired with a ``hash`` parameter (in the same
+        order) holding the :meth:`~horizon.tables.Row.get_update_hash` of the
+        row displayed in the browser, in which case the row is only returned
+        if it has changed. The response is a JSON object with the rendered
+        ``rows`` keyed by object id, the ids of ``deleted`` objects and the
+        ids of the rows which ``failed`` to update.
+        """
+        request = self.request
+        obj_ids = request.GET.getlist("obj_id")
+        hashes = dict(zip(obj_ids, request.GET.getlist("hash")))
+        failed = []
+        try:
+            data = row.get_bulk_data(request, obj_ids)
+        except:
+            error = exceptions.handle(request, ignore=True)
+            return HttpResponse(status=error.status_code)
+        if data is None:
+            data = []
+            for obj_id in obj_ids:
+                try:
+                    data.append(row.get_data(request, obj_id))
+                except:
+                    error = exceptions.handle(request, ignore=True)
+                    if error is not exceptions.NotFound:
+                        failed.append(obj_id)
+        data = dict([(unicode(self.get_object_id(datum)), datum)
+                     for datum in data])
+        rows = {}
+        for obj_id in obj_ids:
+            if obj_id not in data:
+                continue
+            new_row = self._meta.row_class(self, data[obj_id])
+            if new_row.get_update_hash() != hashes.get(obj_id, None):
+                rows[obj_id] = new_row.render()
+        deleted = [obj_id for obj_id in obj_ids
+                   if obj_id not in data and obj_id not in failed]
+        return HttpResponse(json.dumps({"rows": rows,
+                                        "deleted": deleted,
+                                        "failed": failed}),
+                            content_type="application/json")
+
+    def publish_change(self, datum):
+        """
+        Tells the other browsers displaying the row of ``datum`` that it has
+        changed, if the table's row class has an ``event_channel``.
+        """
+        channel = self._meta.row_class.event_channel
+        if self._meta.row_class.ajax and channel:
+            tenant_id = getattr(datum, 'tenant_id', None) or \
+                        getattr(self.request.user, 'tenant_id', None)
+            events.publish_change(channel, self.get_object_id(datum),
+                                  tenant_id)
+
     def maybe_handle(self):
         """
         Determine whether the request should be handled by any action on this
@@ -1259,18 +1655,26 @@ class DataTable(object):
         The method is largely meant for internal use, but if you want to
         override it to provide custom behavior you can do so at your own risk.
         """
-        return self._meta.has_more_data
+        return self._meta.has_more_data or self.get_query().has_more
 
     def get_marker(self):
         """
         Returns the identifier for the last object in the current data set
-        for APIs that use marker/limit-based paging.
+        for APIs that use marker/limit-based paging, unless the data source
+        set a ``next_marker`` on the table's query.
         """
+        next_marker = self.get_query().next_marker
+        if next_marker is not None:
+            return http.urlquote_plus(next_marker)
         return http.urlquote_plus(self.get_object_id(self.data[-1]))
 
     def get_pagination_string(self):
         """ Returns the query parameter string to paginate this table. """
-        return "=".join([self._meta.pagination_param, self.get_marker()])
+        pagination = "=".join([self._meta.pagination_param,
+                               self.get_marker()])
+        if not self._meta.server_side:
+            return pagination
+        return "&".join(filter(None, [self.get_query_string(), pagination]))
 
     def calculate_row_status(self, statuses):
         """
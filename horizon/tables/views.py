@@ -15,15 +15,31 @@
 #    under the License.
 
 from collections import defaultdict
+import functools
 
 from django.views import generic
 
 from horizon.templatetags.horizon import has_permissions
+from horizon.utils import concurrency
 
 
 class MultiTableMixin(object):
-    """ A generic mixin which provides methods for handling DataTables. """
+    """ A generic mixin which provides methods for handling DataTables.
+
+    The data methods of tables which push filtering, sorting or pagination
+    down to their data source (see :class:`~horizon.tables.TableQuery`) are
+    passed the table's query as the ``query`` keyword argument.
+
+    .. attribute:: concurrent_data_load
+
+        Boolean to control whether the ``get_{{ table_name }}_data`` methods
+        are called concurrently on Horizon's worker pool rather than one after
+        another. Only enable this when the data methods are independent of
+        each other. Messages they add are still added in the same order as
+        when loading serially. Default: ``False``.
+    """
     data_method_pattern = "get_%s_data"
+    concurrent_data_load = False
 
     def __init__(self, *args, **kwargs):
         super(MultiTableMixin, self).__init__(*args, **kwargs)
@@ -36,13 +52,29 @@ class MultiTableMixin(object):
 
     def _get_data_dict(self):
         if not self._data:
+            data_dict = {}
+            funcs = []
+            tables = self.get_tables()
             for table in self.table_classes:
-                data = []
                 name = table._meta.name
-                func_list = self._data_methods.get(name, [])
-                for func in func_list:
-                    data.extend(func())
-                self._data[name] = data
+                data_dict[name] = []
+                methods = self._data_methods.get(name, [])
+                if table._meta.server_side:
+                    if name not in tables:
+                        # There's no query (or table) to load data for.
+                        continue
+                    query = tables[name].get_query()
+                    methods = [functools.partial(func, query=query)
+                               for func in methods]
+                funcs.extend([(name, func) for func in methods])
+            if self.concurrent_data_load:
+                results = concurrency.run_concurrently([func for name, func
+                                                        in funcs])
+            else:
+                results = [func() for name, func in funcs]
+            for (name, func), data in zip(funcs, results):
+                data_dict[name].extend(data)
+            self._data = data_dict
         return self._data
 
     def get_data_methods(self, table_classes, methods):
@@ -64,8 +96,8 @@ class MultiTableMixin(object):
                     methods[name].append(func)
 
     def wrap_func(self, data_func, type_name, data_type):
-        def final_data():
-            data = data_func()
+        def final_data(**kwargs):
+            data = data_func(**kwargs)
             self.assign_type_string(data, type_name, data_type)
             return data
         return final_data
@@ -173,13 +205,23 @@ class DataTableView(MultiTableView):
 
     Optionally, you can override the ``has_more_data`` method to trigger
     pagination handling for APIs that support it.
+
+    If the table pushes filtering, sorting or pagination down to its data
+    source, ``get_data`` is passed the table's
+    :class:`~horizon.tables.TableQuery` as the ``query`` keyword argument.
     """
     table_class = None
     context_object_name = 'table'
 
+    def get_data_kwargs(self):
+        if self.table_class._meta.server_side:
+            return {'query': self.get_table().get_query()}
+        return {}
+
     def _get_data_dict(self):
         if not self._data:
-            self._data = {self.table_class._meta.name: self.get_data()}
+            self._data = {self.table_class._meta.name:
+                          self.get_data(**self.get_data_kwargs())}
         return self._data
 
     def get_data(self):
@@ -233,6 +275,7 @@ class MixedDataTableView(DataTableView):
         if not self._data:
             table = self.table_class
             self._data = {table._meta.name: []}
+            data_funcs = []
             for data_type in table.data_types:
                 func_name = "get_%s_data" % data_type
                 data_func = getattr(self, func_name, None)
@@ -241,7 +284,13 @@ class MixedDataTableView(DataTableView):
                     raise NotImplementedError("You must define a %s method "
                                               "for %s data type in %s." %
                                               (func_name, data_type, cls_name))
-                data = data_func()
+                data_funcs.append(functools.partial(data_func,
+                                                    **self.get_data_kwargs()))
+            if self.concurrent_data_load:
+                results = concurrency.run_concurrently(data_funcs)
+            else:
+                results = (data_func() for data_func in data_funcs)
+            for data_type, data in zip(table.data_types, results):
                 self.assign_type_string(data, data_type)
                 self._data[table._meta.name].extend(data)
         return self._data
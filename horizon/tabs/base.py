@@ -14,6 +14,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import itertools
 import sys
 
 from django.template import TemplateSyntaxError
@@ -21,6 +22,7 @@ from django.template.loader import render_to_string
 from django.utils.datastructures import SortedDict
 
 from horizon import exceptions
+from horizon.utils import concurrency
 from horizon.utils import html
 
 SEPARATOR = "__"
@@ -73,11 +75,18 @@ class TabGroup(html.HTMLElement):
         Read-only property which is set to the value of the current active tab.
         This may not be the same as the value of ``selected`` if no
         specific tab was requested via the ``GET`` parameter.
+
+    .. attribute:: concurrent_data_load
+
+        Boolean to control whether :meth:`load_tab_data` loads the data for
+        all the tabs concurrently rather than one tab after another. Only
+        enable this when the tabs' data is independent. Default: ``False``.
     """
     slug = None
     template_name = "horizon/common/_tab_group.html"
     param_name = 'tab'
     sticky = False
+    concurrent_data_load = False
     _selected = None
     _active = None
 
@@ -113,13 +122,22 @@ class TabGroup(html.HTMLElement):
         """
         Preload all data that for the tabs that will be displayed.
         """
-        for tab in self._tabs.values():
-            if tab.load and not tab.data_loaded:
+        def load(tab):
+            def load_tab():
                 try:
                     tab._data = tab.get_context_data(self.request)
                 except:
                     tab._data = False
                     exceptions.handle(self.request)
+            return load_tab
+
+        loaders = [load(tab) for tab in self._tabs.values()
+                   if tab.load and not tab.data_loaded]
+        if self.concurrent_data_load:
+            concurrency.run_concurrently(loaders)
+        else:
+            for loader in loaders:
+                loader()
 
     def get_id(self):
         """
@@ -399,8 +417,15 @@ class TableTab(Tab):
         :class:`~horizon.tables.MultiTableView`. For each table class you
         need to define a corresponding ``get_{{ table_name }}_data`` method
         as with :class:`~horizon.tables.MultiTableView`.
+
+    .. attribute:: concurrent_data_load
+
+        Boolean to control whether the ``get_{{ table_name }}_data`` methods
+        are called concurrently rather than one after another. Default:
+        ``False``.
     """
     table_classes = None
+    concurrent_data_load = False
 
     def __init__(self, tab_group, request):
         super(TableTab, self).__init__(tab_group, request)
@@ -422,6 +447,7 @@ class TableTab(Tab):
         """
         # We only want the data to be loaded once, so we track if we have...
         if not self._table_data_loaded:
+            data_funcs = []
             for table_name, table in self._tables.items():
                 # Fetch the data function.
                 func_name = "get_%s_data" % table_name
@@ -430,8 +456,14 @@ class TableTab(Tab):
                     cls_name = self.__class__.__name__
                     raise NotImplementedError("You must define a %s method "
                                               "on %s." % (func_name, cls_name))
-                # Load the data.
-                table.data = data_func()
+                data_funcs.append(data_func)
+            # Load the data.
+            if self.concurrent_data_load:
+                results = concurrency.run_concurrently(data_funcs)
+            else:
+                results = (data_func() for data_func in data_funcs)
+            for table, data in itertools.izip(self._tables.values(), results):
+                table.data = data
                 table._meta.has_more_data = self.has_more_data(table)
             # Mark our data as loaded so we don't run the loaders again.
             self._table_data_loaded = True
@@ -114,7 +114,9 @@ HORIZON_CONFIG = {
         "help_text": _("Password must be between 8 and 18 characters.")
     },
     'user_home': None,
-    'help_url': "http://example.com"
+    'help_url': "http://example.com",
+    # Run background jobs in the request thread.
+    'background_workers': 0
 }
 
 COMPRESS_ENABLED = False
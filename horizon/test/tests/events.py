@@ -0,0 +1,119 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import threading
+
+from django import http
+from django.core.urlresolvers import reverse
+
+from horizon import events
+from horizon import messages
+from horizon import middleware
+from horizon.test import helpers as test
+
+
+class LocalEventBusTests(test.TestCase):
+    def setUp(self):
+        super(LocalEventBusTests, self).setUp()
+        self.bus = events.LocalEventBus(max_events=3)
+
+    def test_wait_returns_channel_events(self):
+        last_id, new_events, missed = self.bus.wait(['a'], None, 0)
+        self.assertEqual((last_id, new_events, missed), (0, [], False))
+        self.bus.publish('a', 'row', {'obj_id': '1'})
+        self.bus.publish('b', 'row', {'obj_id': '2'})
+        last_id, new_events, missed = self.bus.wait(['a'], last_id, 0)
+        self.assertEqual(last_id, 2)
+        self.assertEqual(new_events, [{'id': 1, 'channel': 'a',
+                                       'type': 'row',
+                                       'data': {'obj_id': '1'}}])
+        self.assertFalse(missed)
+        # Nothing new since.
+        self.assertEqual(self.bus.wait(['a'], last_id, 0), (2, [], False))
+
+    def test_wait_wakes_up_on_publish(self):
+        timer = threading.Timer(0.05, self.bus.publish,
+                                ('a', 'row', {'obj_id': '1'}))
+        timer.start()
+        last_id, new_events, missed = self.bus.wait(['a'], 0, 5)
+        timer.join()
+        self.assertEqual(last_id, 1)
+        self.assertEqual(len(new_events), 1)
+
+    def test_wait_reports_missed_events(self):
+        for i in range(5):
+            self.bus.publish('a', 'row', {'obj_id': str(i)})
+        last_id, new_events, missed = self.bus.wait(['a'], 0, 0)
+        self.assertTrue(missed)
+        self.assertEqual([event['id'] for event in new_events], [3, 4, 5])
+        # An id from another process is treated as missing everything.
+        self.assertEqual(self.bus.wait(['a'], 10, 0), (5, [], True))
+
+
+class EventViewTests(test.TestCase):
+    def setUp(self):
+        super(EventViewTests, self).setUp()
+        self.bus = events.LocalEventBus()
+        events.set_event_bus(self.bus)
+
+    def tearDown(self):
+        events.set_event_bus(None)
+        super(EventViewTests, self).tearDown()
+
+    def test_can_subscribe(self):
+        self.user.tenant_id = 'tenant'
+        self.assertTrue(events.can_subscribe(self.user,
+                                             'user.%s' % self.user.id))
+        self.assertFalse(events.can_subscribe(self.user, 'user.other'))
+        self.assertTrue(events.can_subscribe(self.user,
+                                             'project.tenant.instances'))
+        self.assertFalse(events.can_subscribe(self.user,
+                                              'project.other.instances'))
+        self.assertFalse(events.can_subscribe(self.user, 'instances'))
+        self.user.is_superuser = True
+        self.assertTrue(events.can_subscribe(self.user, 'instances'))
+
+    def test_events_view(self):
+        url = reverse('horizon:events')
+        res = self.client.get(url, {'channel': ['instances', 'other']})
+        self.assertEqual(json.loads(res.content),
+                         {'last_id': 0, 'events': [], 'missed': False})
+
+        events.publish_message(self.user.id, 'error', 'Oops')
+        events.publish_change('instances', 'abc')
+        res = self.client.get(url, {'channel': ['instances'], 'last_id': 0})
+        data = json.loads(res.content)
+        self.assertEqual(data['last_id'], 2)
+        # Only administrators may follow the cloud-wide channels.
+        self.assertEqual(data['events'],
+                         [{'id': 1, 'channel': 'user.%s' % self.user.id,
+                           'type': 'message', 'data': ['error', 'Oops', '']}])
+
+    def test_events_view_disabled(self):
+        events.set_event_bus(None)
+        res = self.client.get(reverse('horizon:events'))
+        self.assertEqual(res.status_code, 404)
+
+    def test_message_after_response(self):
+        req = self.request
+        req.user = self.user
+        middleware.HorizonMiddleware().process_response(req,
+                                                        http.HttpResponse())
+        messages.success(req, "Image saved.")
+        last_id, new_events, missed = self.bus.wait(
+                                            [events.user_channel(req.user.id)],
+                                            0, 0)
+        self.assertEqual(new_events[0]['data'],
+                         ['success', u'Image saved.', ''])
@@ -0,0 +1,142 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import threading
+
+from django import http
+from django.core.urlresolvers import reverse
+
+from horizon import instrumentation
+from horizon import middleware
+from horizon.test import helpers as test
+from horizon.utils import concurrency
+
+
+def compute(func):
+    return instrumentation.instrument(func, 'compute')
+
+
+@compute
+def server_list(request):
+    instrumentation.mark_client()
+    return [1, 2, 3]
+
+
+@compute
+def server_get(request, server_id):
+    instrumentation.mark_client()
+    return threading.current_thread().name
+
+
+@compute
+def flavor_list(request):
+    instrumentation.mark_cache('hit')
+    return ([1, 2], False)
+
+
+@compute
+def servers_with_flavors(request):
+    return server_list(request) + flavor_list(request)[0]
+
+
+@compute
+def is_supported(request):
+    return True
+
+
+class InstrumentationTests(test.TestCase):
+    def setUp(self):
+        super(InstrumentationTests, self).setUp()
+        self.trace = instrumentation.RequestTrace()
+
+    def _calls(self):
+        return [(call['service'], call['operation'], call['size'],
+                 call['cache']) for call in self.trace.calls]
+
+    def test_calls_are_recorded(self):
+        with instrumentation.activate(self.trace):
+            server_list(self.request)
+            flavor_list(self.request)
+            # Helpers which neither use a client nor a cache are left out.
+            is_supported(self.request)
+            # Only the outermost call is recorded.
+            servers_with_flavors(self.request)
+        self.assertEqual(self._calls(),
+                         [('compute', 'server_list', 3, None),
+                          ('compute', 'flavor_list', 2, 'hit'),
+                          ('compute', 'servers_with_flavors', 5, 'hit')])
+        self.assertEqual(self.trace.summary()[0]['count'], 1)
+
+    def test_calls_outside_requests_are_ignored(self):
+        with instrumentation.activate(None):
+            server_list(self.request)
+        self.assertEqual(self.trace.calls, [])
+
+    def test_tasks_record_in_the_trace_of_their_request(self):
+        with instrumentation.activate(self.trace):
+            task = concurrency.Task(server_get, self.request, 1)
+        concurrency.get_pool().submit(task).wait()
+        self.assertTrue(task.result.startswith('horizon-worker'))
+        self.assertEqual(self._calls(),
+                         [('compute', 'server_get', len(task.result), None)])
+
+    def test_histogram(self):
+        histogram = instrumentation.Histogram()
+        for ms in range(1, 101):
+            histogram.add(ms / 1000.0)
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['max_ms'], 100)
+        self.assertEqual(summary['p50_ms'], 50)
+        self.assertEqual(summary['p90_ms'], 100)
+        self.assertEqual(instrumentation.Histogram().percentile(50), None)
+
+    def test_response_reports_calls(self):
+        request = self.factory.get('/')
+        request.session = {}
+        request.user = self.user
+        mw = middleware.HorizonMiddleware()
+        mw.process_request(request)
+        mw.process_view(request, servers_with_flavors, (), {})
+        server_list(request)
+        server_list(request)
+        response = http.HttpResponse('<html><body></body></html>')
+        with self.settings(DEBUG=True):
+            response = mw.process_response(request, response)
+        self.assertIsNone(instrumentation.current())
+        self.assertTrue(response['Server-Timing'].startswith('total;dur='))
+        self.assertIn('desc="compute.server_list x2"',
+                      response['Server-Timing'])
+        self.assertContains(response, 'compute.server_list')
+        self.assertIn("%s.servers_with_flavors" % __name__,
+                      instrumentation.metrics.summary()['views'])
+
+        # Without DEBUG the calls are only logged and aggregated.
+        mw.process_request(request)
+        response = mw.process_response(request, http.HttpResponse())
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_metrics_view(self):
+        url = reverse('horizon:metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.user.is_superuser = True
+        self.user.save()
+        instrumentation.metrics.clear()
+        with instrumentation.activate(self.trace):
+            server_list(self.request)
+        instrumentation.metrics.add_trace(self.trace, 0.5)
+        data = json.loads(self.client.get(url).content)
+        self.assertEqual(data['api']['compute.server_list']['count'], 1)
+        self.assertEqual(data['views']['unknown']['p50_ms'], 500)
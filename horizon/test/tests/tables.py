@@ -14,13 +14,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import json
+
 from django import http
 from django import shortcuts
+from django import template
 from django.core.urlresolvers import reverse
 from django.utils.translation import ugettext_lazy as _
 
 from mox import IsA
 
+from horizon import events
+from horizon import exceptions
 from horizon import tables
 from horizon.tables import views as table_views
 from horizon.test import helpers as test
@@ -189,6 +194,54 @@ class NoActionsTable(tables.DataTable):
         row_actions = ()
 
 
+class ServerSideTable(tables.DataTable):
+    id = tables.Column('id')
+    name = tables.Column('name')
+    value = tables.Column('value', sortable=False)
+
+    class Meta:
+        name = "server_side"
+        table_actions = (MyFilterAction,)
+        server_side_filter = True
+        server_side_sort = True
+        page_size = 2
+
+
+class EventRow(MyRow):
+    event_channel = "things"
+
+
+class EventTable(tables.DataTable):
+    name = tables.Column('name')
+
+    class Meta:
+        name = "event_table"
+        table_actions = (MyBatchAction,)
+        row_class = EventRow
+
+
+class FlakyBatchAction(MyBatchAction):
+    name = "flaky"
+    concurrent = True
+
+    def action(self, request, obj_id):
+        if obj_id == '2':
+            raise exceptions.AlreadyExists(obj_id, "item")
+
+
+class BackgroundBatchAction(MyBatchAction):
+    name = "background"
+    background_threshold = 2
+
+
+class BulkTable(tables.DataTable):
+    name = tables.Column('name')
+
+    class Meta:
+        name = "bulk_table"
+        table_actions = (FlakyBatchAction, BackgroundBatchAction)
+
+
 class DataTableTests(test.TestCase):
     def test_table_instantiation(self):
         """ Tests everything that happens when the table is instantiated. """
@@ -678,6 +731,171 @@ class DataTableTests(test.TestCase):
         self.assertEqual(list(req._messages)[0].message,
                         u"Downed Item: N/A")
 
+    def test_table_bulk_row_update(self):
+        self.table = MyTable(self.request, TEST_DATA_2)
+        current_hash = self.table.get_rows()[0].get_update_hash()
+        self.assertContains(http.HttpResponse(self.table.render()),
+                            'data-update-hash="%s"' % current_hash, 1)
+        # MyRow only ever finds object 1, so object 2 has been deleted.
+        params = [("table", "my_table"), ("action", "rows_update"),
+                  ("obj_id", "1"), ("hash", "stale"), ("obj_id", "2")]
+        req = self.factory.get('/my_url/', params,
+                               HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        resp = MyTable(req).maybe_preempt()
+        self.assertEqual(resp.status_code, 200)
+        data = json.loads(resp.content)
+        self.assertEqual(data['rows'].keys(), ['1'])
+        self.assertIn('status_down', data['rows']['1'])
+        self.assertEqual(data['deleted'], ['2'])
+        self.assertEqual(data['failed'], [])
+        # Rows which haven't changed are left out.
+        params = [("table", "my_table"), ("action", "rows_update"),
+                  ("obj_id", "1"), ("hash", current_hash)]
+        req = self.factory.get('/my_url/', params,
+                               HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        data = json.loads(MyTable(req).maybe_preempt().content)
+        self.assertEqual(data['rows'], {})
+        self.assertEqual(data['deleted'], [])
+
+    def test_table_row_events(self):
+        bus = events.LocalEventBus()
+        events.set_event_bus(bus)
+        try:
+            req = self.factory.post('/my_url/',
+                                    {'action': 'event_table__batch__1'})
+            req.user.tenant_id = 'tenant'
+            self.table = EventTable(req, TEST_DATA)
+            self.assertContains(http.HttpResponse(self.table.render()),
+                                'data-event-channel="project.tenant.things"',
+                                len(TEST_DATA))
+            self.assertEqual(self.table.maybe_handle().status_code, 302)
+            channels = ['project.tenant.things', 'things']
+            last_id, new_events, missed = bus.wait(channels, 0, 0)
+        finally:
+            events.set_event_bus(None)
+        # The change is published for the project and for administrators.
+        self.assertEqual([(event['channel'], event['data'])
+                          for event in new_events],
+                         [('project.tenant.things', {'obj_id': '1'}),
+                          ('things', {'obj_id': '1'})])
+
+    def test_table_concurrent_batch_action(self):
+        req = self.factory.post('/my_url/', {'action': 'bulk_table__flaky',
+                                             'object_ids': ['1', '2', '3']})
+        self.table = BulkTable(req, TEST_DATA)
+        handled = self.table.maybe_handle()
+        self.assertEqual(handled.status_code, 302)
+        # The outcome is summed up in the order the objects were given.
+        self.assertEqual([(message.tags, unicode(message.message))
+                          for message in req._messages],
+                         [('error', u'Unable to batch item: object_2'),
+                          ('info', u'Batched Items: object_1, object_3')])
+        self.assertEqual(self.table.base_actions['flaky'].success_ids,
+                         ['1', '3'])
+
+    def test_table_background_batch_action(self):
+        req = self.factory.post('/my_url/',
+                                {'action': 'bulk_table__background',
+                                 'object_ids': ['1', '2']})
+        req.session = {}
+        req.horizon = {}
+        self.table = BulkTable(req, TEST_DATA)
+        self.assertEqual(self.table.maybe_handle().status_code, 302)
+        job_id, = req.session['horizon_jobs']
+        # Without an event bus the outcome can only be polled.
+        self.assertEqual(tables.actions.get_batch_progress(job_id),
+                         {'user_id': req.user.id,
+                          'total': 2,
+                          'completed': 2,
+                          'succeeded': 2,
+                          'finished': True,
+                          'messages': [['success', u'Batched Items: '
+                                                   u'object_1, object_2']]})
+        self.assertEqual([unicode(message.message)
+                          for message in req._messages],
+                         [u'Batch Items: object_1, object_2. This happens in '
+                          u'the background.',
+                          u'Batched Items: object_1, object_2'])
+
+    def test_table_object_index(self):
+        self.table = MyTable(self.request, TEST_DATA)
+        self.mox.StubOutWithMock(self.table, 'get_object_id')
+        for datum in TEST_DATA:
+            self.table.get_object_id(datum).AndReturn(datum.id)
+        for datum in TEST_DATA_2:
+            self.table.get_object_id(datum).AndReturn(datum.id)
+        self.mox.ReplayAll()
+
+        # The index is built once, by the first lookup.
+        self.assertEqual(self.table.get_object_by_id('2'), TEST_DATA[1])
+        self.assertEqual(self.table.get_object_by_id('3'), TEST_DATA[2])
+        # Reassigning the data discards it.
+        self.table.data = TEST_DATA_2
+        self.assertEqual(self.table.get_object_by_id('1'), TEST_DATA_2[0])
+        self.assertRaises(exceptions.Http302,
+                          self.table.get_object_by_id, '2')
+
+    def test_table_row_render_fast_path(self):
+        loaded = []
+        get_template = template.loader.get_template
+
+        def counting_get_template(template_name):
+            loaded.append(template_name)
+            return get_template(template_name)
+
+        self.mox.stubs.Set(template.loader, 'get_template',
+                           counting_get_template)
+        self.table = MyTable(self.request, TEST_DATA)
+        rows = [row.render() for row in self.table.get_rows()]
+        # Each template is loaded once for the whole table.
+        self.assertEqual(sorted(loaded), sorted(set(loaded)))
+        # Actions which change per row are still bound to each row.
+        for datum, row in zip(TEST_DATA, rows):
+            toggle = self.table.get_row_actions(datum)[-1]
+            self.assertIn('>%s</button>' % toggle.verbose_name, row)
+        self.assertNotIn('Delete Me', rows[1])
+        self.assertEqual(sorted(self.table._static_row_actions),
+                         ['batch', 'login'])
+        # The table actions aren't bound to the last row rendered.
+        table_actions = self.table.render_table_actions()
+        self.assertIn('id="my_table__action_batch"', table_actions)
+        self.assertNotIn('__row_', table_actions)
+
+    def test_table_query(self):
+        self.request.GET = http.QueryDict('server_side__sort=value,-name,bad'
+                                          '&server_side__page_size=5'
+                                          '&server_side__filter__q=object_1'
+                                          '&marker=3')
+        self.table = ServerSideTable(self.request, TEST_DATA)
+        query = self.table.get_query()
+        # Unsortable and unknown columns are ignored.
+        self.assertEqual(query.sort, [('name', True)])
+        self.assertEqual(query.page_size, 5)
+        self.assertEqual(query.marker, '3')
+        self.assertEqual(query.filter_string, 'object_1')
+        # The data source has applied the filter already.
+        self.assertEqual(self.table.filtered_data, TEST_DATA)
+        # Sorting by the current sort column reverses the sort, and the
+        # filter and page size are kept.
+        self.assertEqual(self.table.columns['name'].get_sort_string(),
+                         'server_side__filter__q=object_1&'
+                         'server_side__page_size=5&server_side__sort=name')
+        self.assertIsNone(self.table.columns['value'].get_sort_string())
+        resp = http.HttpResponse(self.table.render())
+        self.assertContains(resp, 'server_side_filter server_side_sort', 1)
+        self.assertContains(resp, 'server_side__sort=name">', 1)
+        self.assertContains(resp, 'server_side__sort=id">', 1)
+
+    def test_table_query_defaults(self):
+        self.request.GET = http.QueryDict('server_side__page_size=0')
+        query = ServerSideTable(self.request, TEST_DATA).get_query()
+        self.assertEqual(query.sort, [])
+        self.assertEqual(query.page_size, 2)
+        self.assertIsNone(query.marker)
+        self.assertEqual(query.filter_string, '')
+        self.assertEqual(MyTable(self.request, TEST_DATA).get_query().sort,
+                         [])
+
 
 class SingleTableView(table_views.DataTableView):
     table_class = MyTable
@@ -711,6 +929,16 @@ class MultiTableView(tables.MultiTableView):
         return TEST_DATA
 
 
+class ServerSideTableView(table_views.DataTableView):
+    table_class = ServerSideTable
+    template_name = "horizon/common/_detail_table.html"
+
+    def get_data(self, query):
+        self.query = query
+        query.has_more = True
+        return TEST_DATA[:query.page_size]
+
+
 class DataTableViewTests(test.TestCase):
     def _prepare_view(self, cls, *args, **kwargs):
         req = self.factory.get('/my_url/')
@@ -753,3 +981,22 @@ class DataTableViewTests(test.TestCase):
         self.assertEqual(context['my_table_table'].__class__, MyTable)
         self.assertEqual(context['table_with_permissions_table'].__class__,
                          TableWithPermissions)
+
+    def test_multi_table_view_concurrent_data_load(self):
+        view = self._prepare_view(MultiTableView)
+        view.concurrent_data_load = True
+        data = view._get_data_dict()
+        self.assertEqual(data['my_table'], list(TEST_DATA))
+        self.assertEqual(data['table_with_permissions'], list(TEST_DATA))
+
+    def test_data_table_view_query(self):
+        view = self._prepare_view(ServerSideTableView)
+        view.request.GET = http.QueryDict('server_side__sort=-name')
+        context = view.get_context_data()
+        view.handle_table(view.get_table())
+        table = context['table']
+        self.assertIs(view.query, table.get_query())
+        self.assertEqual(table.data, TEST_DATA[:2])
+        self.assertTrue(table.has_more_data())
+        self.assertEqual(table.get_pagination_string(),
+                         'server_side__sort=-name&marker=2')
@@ -304,3 +304,14 @@ class TabExceptionTests(test.TestCase):
         req = self.factory.get("/")
         res = view(req)
         self.assertMessageCount(res, error=1)
+
+    def test_concurrent_tab_view_exception(self):
+        TabWithTableView.tab_group_class.concurrent_data_load = True
+        try:
+            view = TabWithTableView.as_view()
+            req = self.factory.get("/")
+            res = view(req)
+            self.assertMessageCount(res, error=1)
+            self.assertContains(res, "my_table")
+        finally:
+            TabWithTableView.tab_group_class.concurrent_data_load = False
@@ -15,12 +15,23 @@
 #    under the License.
 
 
+import json
 import os
+import threading
 
+from django.conf import settings
+from django.contrib.messages import constants
 from django.core.exceptions import ValidationError
+from django.core.urlresolvers import reverse
 
+from horizon import exceptions
+from horizon import messages
+from horizon.tables import actions
 from horizon.test import helpers as test
+from horizon.utils import concurrency
 from horizon.utils import fields
+from horizon.utils import jobs
+from horizon.utils import memoized
 from horizon.utils import secret_key
 
 
@@ -194,3 +205,250 @@ class SecretKeyTests(test.TestCase):
         self.assertRaises(secret_key.FilePermissionError,
                           secret_key.generate_or_read_from_file, key_file)
         os.remove(key_file)
+
+
+class ConcurrencyTests(test.TestCase):
+    def test_results_in_order(self):
+        funcs = [lambda i=i: i * 2 for i in range(20)]
+        self.assertEqual(concurrency.run_concurrently(funcs),
+                         [i * 2 for i in range(20)])
+
+    def test_runs_on_worker_threads(self):
+        def current_thread():
+            return threading.current_thread()
+        threads = concurrency.run_concurrently([current_thread] * 5)
+        self.assertTrue(any([t.name.startswith("horizon-worker")
+                             for t in threads]))
+
+    def test_nested_calls(self):
+        def nested():
+            return sum(concurrency.run_concurrently([lambda: 1] * 30))
+        self.assertEqual(concurrency.run_concurrently([nested] * 30),
+                         [30] * 30)
+
+    def test_messages_in_order(self):
+        request = self.factory.get('/')
+
+        def add(text):
+            def func():
+                messages.info(request, text)
+            return func
+
+        with messages.deferred([]) as queue:
+            concurrency.run_concurrently([add(str(i)) for i in range(10)])
+        self.assertEqual([args[2] for args in queue],
+                         [str(i) for i in range(10)])
+
+    def test_first_exception_reraised(self):
+        request = self.factory.get('/')
+
+        def ok():
+            messages.info(request, "ok")
+
+        def fail(exc):
+            def func():
+                messages.error(request, "failed")
+                raise exc
+            return func
+
+        with messages.deferred([]) as queue:
+            self.assertRaises(ValueError, concurrency.run_concurrently,
+                              [ok, fail(ValueError()), fail(KeyError())])
+        self.assertEqual([args[1] for args in queue],
+                         [constants.INFO, constants.ERROR])
+
+
+class JobsTests(test.TestCase):
+    def setUp(self):
+        super(JobsTests, self).setUp()
+        self.queue = jobs.JobQueue(1, 1)
+
+    def test_job_runs_on_worker_thread(self):
+        def current_thread():
+            return threading.current_thread().name
+        job = self.queue.submit(jobs.Job(current_thread))
+        job.wait()
+        self.assertEqual(job.get_result(), "horizon-job-0")
+        status = jobs.get_status(job.id)
+        self.assertEqual(status['status'], jobs.SUCCEEDED)
+        self.assertTrue(status['finished'])
+        self.assertEqual(status['attempts'], 1)
+
+    def test_job_retries(self):
+        errors = [IOError("Try again."), IOError("Try again.")]
+
+        def flaky():
+            if errors:
+                raise errors.pop()
+            return "done"
+
+        job = jobs.Job(flaky)
+        job.retry_delay = 0
+        job.retries = 1
+        self.queue.submit(job).wait()
+        status = jobs.get_status(job.id)
+        self.assertEqual(status['status'], jobs.FAILED)
+        self.assertEqual(status['attempts'], 2)
+        self.assertEqual(status['error'], "Try again.")
+
+        job = jobs.Job(flaky)
+        job.retry_delay = 0
+        job.retries = 1
+        self.queue.submit(job).wait()
+        self.assertEqual(job.get_result(), "done")
+        self.assertEqual(jobs.get_status(job.id)['status'], jobs.SUCCEEDED)
+
+    def test_job_retried_for_given_errors(self):
+        def fail():
+            raise KeyError()
+        job = jobs.Job(fail)
+        job.retries = 3
+        job.retry_on = (IOError,)
+        self.queue.submit(job).wait()
+        self.assertEqual(jobs.get_status(job.id)['attempts'], 1)
+
+    def test_queue_is_bounded(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait()
+
+        running = self.queue.submit(jobs.Job(block))
+        started.wait()
+        queued = self.queue.submit(jobs.Job(block))
+        refused = jobs.Job(block)
+        self.assertRaises(exceptions.JobQueueFull, self.queue.submit, refused)
+        self.assertEqual(jobs.get_status(queued.id)['status'], jobs.QUEUED)
+        self.assertEqual(jobs.get_status(refused.id)['status'], jobs.FAILED)
+        release.set()
+        running.wait()
+        queued.wait()
+        self.assertEqual(jobs.get_status(queued.id)['status'], jobs.SUCCEEDED)
+
+    def test_jobs_view(self):
+        job = jobs.submit(self.request, jobs.Job(lambda: None))
+        job.set_progress(done=1)
+        # The session is kept in a signed cookie.
+        self.request.session.save()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = \
+            self.request.session.session_key
+        data = json.loads(self.client.get(reverse('horizon:jobs')).content)
+        self.assertEqual(data.keys(), [job.id])
+        self.assertEqual(data[job.id]['progress'], {'done': 1})
+
+    def test_batch_progress_view(self):
+        jobs.submit(self.request, jobs.Job(lambda: None))
+        batch = jobs.Job(lambda: None)
+        batch.kind = actions.BATCH_JOB
+        batch.progress = {'total': 1, 'completed': 1, 'succeeded': 1}
+        jobs.submit(self.request, batch)
+        self.request.session.save()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = \
+            self.request.session.session_key
+        data = json.loads(self.client.get(reverse('horizon:batch_progress'))
+                          .content)
+        # Only the batch actions are reported, from the user's jobs.
+        self.assertEqual(data, {batch.id: {'total': 1,
+                                           'completed': 1,
+                                           'succeeded': 1,
+                                           'finished': True,
+                                           'messages': []}})
+
+    def test_refused_job_not_recorded(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait()
+
+        self.mox.stubs.Set(jobs, 'get_queue', lambda: self.queue)
+        running = jobs.submit(self.request, jobs.Job(block))
+        started.wait()
+        queued = jobs.submit(self.request, jobs.Job(block))
+        self.assertRaises(exceptions.JobQueueFull, jobs.submit,
+                          self.request, jobs.Job(block))
+        # Only the jobs the queue took are among the user's jobs.
+        self.assertEqual(self.request.session[jobs.SESSION_KEY],
+                         [running.id, queued.id])
+        release.set()
+        running.wait()
+        queued.wait()
+
+
+class MemoizedTests(test.TestCase):
+    def setUp(self):
+        super(MemoizedTests, self).setUp()
+        self.calls = []
+
+    def record(self, *args):
+        self.calls.append(args)
+        return len(self.calls)
+
+    def test_memoized_lru(self):
+        @memoized.memoized(max_size=2)
+        def func(arg):
+            return self.record(arg)
+
+        self.assertEqual(func(1), func(1))
+        func(2)
+        func(3)
+        func(1)
+        self.assertEqual(self.calls, [(1,), (2,), (3,), (1,)])
+        self.assertEqual(func.stats(),
+                         {'hits': 1, 'misses': 4, 'size': 2, 'evictions': 2})
+        self.assertIn(func.name, memoized.stats())
+
+    def test_memoized_ttl(self):
+        @memoized.memoized(ttl=60)
+        def func(arg):
+            return self.record(arg)
+
+        func(1)
+        key, (value, expires) = func.cache.items()[0]
+        func.cache[key] = (value, expires - 61)
+        func(1)
+        self.assertEqual(self.calls, [(1,), (1,)])
+
+    def test_memoized_uncachable_args(self):
+        @memoized.memoized
+        def func(arg):
+            return self.record(arg)
+
+        func([1])
+        func([1])
+        self.assertEqual(len(self.calls), 2)
+
+    def test_request_memoized(self):
+        @memoized.request_memoized
+        def func(request, arg):
+            return self.record(arg)
+
+        request = self.factory.get('/')
+        func(request, 1)
+        func(request, 1)
+        self.assertEqual(len(self.calls), 1)
+        func(self.factory.get('/'), 1)
+        self.assertEqual(len(self.calls), 2)
+
+        memoized.clear_request_cache(request)
+        func(request, 1)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_weakref_memoized(self):
+        class Owner(object):
+            pass
+
+        @memoized.weakref_memoized
+        def func(owner, arg):
+            return self.record(arg)
+
+        owner = Owner()
+        func(owner, 1)
+        func(owner, 1)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(func.stats()['size'], 1)
+        del owner
+        self.assertEqual(func.stats()['size'], 0)
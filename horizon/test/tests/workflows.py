@@ -264,3 +264,38 @@ class WorkflowsTests(test.TestCase):
 
         flow = TestWorkflow(req, entry_point="test_action_two")
         self.assertEqual(flow.get_entry_point(), "test_action_two")
+
+    def test_membership_diff(self):
+        current = workflows.MembershipDiff.role_pairs({'1': ['admin'],
+                                                       '2': ['member']})
+        wanted = set([('1', 'admin'), ('3', 'member')])
+        diff = workflows.MembershipDiff(current, wanted)
+        self.assertTrue(diff)
+        self.assertEqual(diff.to_add, set([('3', 'member')]))
+        self.assertEqual(diff.to_remove, set([('2', 'member')]))
+        self.assertFalse(workflows.MembershipDiff(wanted, wanted))
+
+        calls = []
+        diff.apply(lambda user, role: calls.append(('add', user, role)),
+                   lambda user, role: calls.append(('remove', user, role)))
+        self.assertItemsEqual(calls, [('add', '3', 'member'),
+                                      ('remove', '2', 'member')])
+
+    def test_membership_diff_failures(self):
+        diff = workflows.MembershipDiff(['a', 'b'], ['c', 'd'])
+        added = []
+
+        def add(group):
+            if group == 'c':
+                raise exceptions.NotFound(group)
+            added.append(group)
+
+        def remove(group):
+            raise exceptions.NotAuthorized(group)
+
+        # Every change is attempted, and the first failure is re-raised.
+        with self.assertRaises(exceptions.NotFound):
+            diff.apply(add, remove)
+        self.assertEqual(added, ['d'])
+        self.assertEqual([group for group, exc_info in diff.failures],
+                         ['c', 'a', 'b'])
@@ -0,0 +1,202 @@
+"""
+Helpers for running independent, I/O bound calls (typically API calls)
+concurrently on a bounded pool of worker threads.
+"""
+
+import logging
+import Queue
+import sys
+import threading
+
+from django.utils import timezone
+from django.utils import translation
+
+from horizon import conf
+from horizon import instrumentation
+from horizon import messages
+
+
+LOG = logging.getLogger(__name__)
+
+
+class Task(object):
+    """
+    A single call submitted to the :class:`WorkerPool`.
+
+    The task remembers the language and timezone active in the thread which
+    created it and activates them while it runs, since both are thread-local
+    in Django, as well as the trace its API calls are recorded in. Messages
+    added through :mod:`horizon.messages` while the task runs are collected
+    in ``messages`` rather than added to the request, so that they can be
+    replayed in submission order.
+    """
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+        self.exc_info = None
+        self.messages = []
+        self.language = translation.get_language()
+        self.timezone = timezone.get_current_timezone()
+        self.trace = instrumentation.current()
+        self._claimed = threading.Lock()
+        self._done = threading.Event()
+
+    def claim(self):
+        """
+        Returns ``True`` for the first caller only, which is then responsible
+        for running the task.
+        """
+        return self._claimed.acquire(False)
+
+    def run(self):
+        try:
+            self.call()
+        finally:
+            self._done.set()
+
+    def call(self):
+        """
+        Calls the function once, in the context the task was created in,
+        and records its result or the exception it raised.
+        """
+        self.exc_info = None
+        try:
+            with translation.override(self.language, deactivate=False):
+                with timezone.override(self.timezone):
+                    with instrumentation.activate(self.trace):
+                        with messages.deferred(self.messages):
+                            self.result = self.func(*self.args,
+                                                    **self.kwargs)
+        except:
+            self.exc_info = sys.exc_info()
+
+    def wait(self):
+        self._done.wait()
+
+    def replay_messages(self):
+        for args in self.messages:
+            messages.add_message(*args)
+
+    def get_result(self):
+        """
+        Replays the task's messages and returns its result, re-raising
+        its exception if it failed.
+        """
+        self.replay_messages()
+        if self.exc_info:
+            exc_type, exc_value, exc_traceback = self.exc_info
+            raise exc_type, exc_value, exc_traceback
+        return self.result
+
+
+class WorkerPool(object):
+    """
+    A fixed-size pool of daemon worker threads which run :class:`Task`
+    objects from a shared queue. The threads are started the first time a
+    task is submitted.
+    """
+    thread_name = "horizon-worker-%s"
+
+    def __init__(self, size):
+        self.size = size
+        self.queue = Queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            while len(self._threads) < self.size:
+                thread = threading.Thread(target=self._work,
+                                          name=self.thread_name %
+                                               len(self._threads))
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            task = self.queue.get()
+            if task.claim():
+                task.run()
+
+    def submit(self, task):
+        if len(self._threads) < self.size:
+            self._start()
+        self.queue.put(task)
+        return task
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the process-wide :class:`WorkerPool`, sized by the
+    ``concurrent_workers`` key of ``HORIZON_CONFIG``.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = WorkerPool(conf.HORIZON_CONFIG['concurrent_workers'])
+    return _pool
+
+
+def iter_tasks(tasks, concurrent=True):
+    """
+    Runs the given tasks on the worker pool and yields each of them, in
+    order, as soon as it has finished, so that results can be processed
+    while the later tasks are still running.
+
+    As with :func:`run_tasks` the calling thread runs the tasks no worker
+    has picked up by the time they are due. If ``concurrent`` is ``False``
+    it runs all of them, one after another.
+    """
+    pool = get_pool()
+    if concurrent and pool.size > 0 and len(tasks) > 1:
+        for task in tasks[1:]:
+            pool.submit(task)
+    for task in tasks:
+        if task.claim():
+            task.run()
+        task.wait()
+        yield task
+
+
+def run_tasks(tasks):
+    """
+    Runs the given tasks on the worker pool and waits for all of them to
+    finish.
+
+    The calling thread isn't idle while it waits: it runs any of the tasks
+    no worker has picked up yet itself, so the call always completes even
+    when the pool is saturated or when it is nested inside another task.
+    """
+    pool = get_pool()
+    if pool.size > 0 and len(tasks) > 1:
+        for task in tasks[1:]:
+            pool.submit(task)
+    for task in tasks:
+        if task.claim():
+            task.run()
+    for task in tasks:
+        task.wait()
+    return tasks
+
+
+def run_concurrently(funcs):
+    """
+    Calls each of the given callables (which take no arguments) concurrently
+    and returns their results in the same order.
+
+    Messages added by the callables are added to the request in that same
+    order once all of them have completed, so the outcome is the same as
+    calling them one after another. If any of them raises an exception the
+    first one in order is re-raised, after the messages added by the
+    callables preceding it.
+    """
+    tasks = run_tasks([Task(func) for func in funcs])
+    return [task.get_result() for task in tasks]
@@ -0,0 +1,84 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import absolute_import
+
+import cStringIO
+import csv
+import itertools
+
+from django import http
+from django import template
+from django.utils.encoding import force_unicode
+
+
+class BaseCsvResponse(http.HttpResponse):
+    """
+    A response which streams a CSV file to the client one row at a time,
+    so that exporting a large data set neither builds the whole file in
+    memory nor keeps the client waiting until it is complete.
+
+    The file starts with the rendered ``template`` if one is given (for
+    instance a summary of the data), followed by a row holding the
+    ``columns`` and the rows returned by :meth:`get_row_data`.
+
+    Its arguments are those :class:`~django.template.response.TemplateResponse`
+    is created with, so that it can be used as the ``response_class`` of a
+    class-based view.
+    """
+    columns = ()
+
+    def __init__(self, request, template, context, content_type='text/csv',
+                 filename='export.csv', **kwargs):
+        self.request = request
+        self.template_name = template
+        self.context = context
+        # The header is rendered right away, only the rows are streamed.
+        self.header = self.render_header()
+        super(BaseCsvResponse, self).__init__(self.iter_csv(),
+                                              content_type=content_type)
+        self['Content-Disposition'] = 'attachment; filename=%s' % filename
+
+    def get_row_data(self):
+        """
+        Returns an iterable of the rows of the file, each a sequence of
+        values. Implementing it as a generator keeps just one row in
+        memory at a time.
+        """
+        raise NotImplementedError("You must define a get_row_data method "
+                                  "on %s" % self.__class__.__name__)
+
+    def render_header(self):
+        if not self.template_name:
+            return ''
+        header = template.loader.get_template(self.template_name)
+        return header.render(template.RequestContext(self.request,
+                                                     self.context))
+
+    def encode(self, value):
+        # The csv module doesn't support unicode.
+        return force_unicode(value).encode('utf-8')
+
+    def iter_csv(self):
+        yield self.encode(self.header)
+        out = cStringIO.StringIO()
+        writer = csv.writer(out, lineterminator='\n')
+        rows = self.get_row_data()
+        if self.columns:
+            rows = itertools.chain([self.columns], rows)
+        for row in rows:
+            writer.writerow([self.encode(value) for value in row])
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
@@ -0,0 +1,253 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Background jobs: calls which go on after the response to the request that
+submitted them (image imports, batch actions on many objects, ...).
+
+Jobs run on a :class:`JobQueue` of a fixed number of worker threads, sized
+by the ``background_workers`` key of ``HORIZON_CONFIG``, which holds at most
+``background_queue_size`` jobs waiting for a worker. A burst of submissions
+thus can't start more threads, and is refused with
+:exc:`~horizon.exceptions.JobQueueFull` once the queue is full.
+
+The status of each job is kept in the cache under its id for an hour, so
+that it can be polled from any process with :func:`get_status` or the
+``horizon:jobs`` view. Jobs may be retried a number of times when they fail.
+"""
+
+import logging
+import Queue
+import threading
+import time
+import uuid
+
+from django.contrib.messages import constants
+from django.core.cache import cache
+from django.utils.encoding import force_unicode
+
+from horizon import conf
+from horizon import exceptions
+from horizon.utils import concurrency
+
+
+LOG = logging.getLogger(__name__)
+
+JOB_KEY = "horizon:job:%s"
+JOB_TIMEOUT = 60 * 60
+
+# The ids of the latest jobs of a user are kept in their session.
+SESSION_KEY = 'horizon_jobs'
+SESSION_JOBS = 10
+
+QUEUED = 'queued'
+RUNNING = 'running'
+RETRYING = 'retrying'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class Job(concurrency.Task):
+    """
+    A call submitted to the :class:`JobQueue`, with the same arguments as a
+    :class:`~horizon.utils.concurrency.Task`.
+
+    .. attribute:: name
+
+       A description of the job. Defaults to the name of the function.
+
+    .. attribute:: kind
+
+       Optional name of the kind of job, telling the jobs of a feature
+       apart from the others (e.g. ``"batch"`` for batch actions).
+       Defaults to ``None``.
+
+    .. attribute:: retries
+
+       How many more times the call is made when it raises one of the
+       ``retry_on`` exceptions. Defaults to ``0``.
+
+    .. attribute:: retry_on
+
+       The exceptions the call is retried for. Defaults to any exception.
+
+    .. attribute:: retry_delay
+
+       The number of seconds to wait before the first retry, doubled for
+       each of the next ones. Defaults to ``1``.
+
+    While it runs the job may report its ``progress``, a dict of values
+    which is part of its status, with :meth:`set_progress`. The messages it
+    adds are part of its status too, since they can only reach the user as
+    events once the request which submitted it has finished.
+    """
+    def __init__(self, func, *args, **kwargs):
+        super(Job, self).__init__(func, *args, **kwargs)
+        self.id = uuid.uuid4().hex
+        self.name = getattr(func, '__name__', repr(func))
+        self.kind = None
+        self.user_id = None
+        self.retries = 0
+        self.retry_on = (Exception,)
+        self.retry_delay = 1
+        self.attempts = 0
+        self.status = QUEUED
+        self.progress = {}
+        # The request the job was submitted from may be long finished, its
+        # calls aren't recorded in its trace.
+        self.trace = None
+
+    def get_status(self):
+        status = {'id': self.id,
+                  'name': self.name,
+                  'kind': self.kind,
+                  'user_id': self.user_id,
+                  'status': self.status,
+                  'finished': self.status in (SUCCEEDED, FAILED),
+                  'attempts': self.attempts,
+                  'progress': self.progress,
+                  'messages': [[constants.DEFAULT_TAGS[args[1]],
+                                force_unicode(args[2])]
+                               for args in self.messages],
+                  'error': None}
+        if self.exc_info:
+            status['error'] = unicode(self.exc_info[1])
+        return status
+
+    def save(self):
+        cache.set(JOB_KEY % self.id, self.get_status(), JOB_TIMEOUT)
+
+    def set_progress(self, **kwargs):
+        self.progress.update(kwargs)
+        self.save()
+
+    def _should_retry(self):
+        return self.attempts <= self.retries and \
+            issubclass(self.exc_info[0], self.retry_on)
+
+    def run(self):
+        try:
+            while True:
+                self.attempts += 1
+                self.status = RUNNING
+                self.save()
+                # Only the messages of the last attempt are kept.
+                del self.messages[:]
+                self.call()
+                if not self.exc_info or not self._should_retry():
+                    break
+                LOG.warning('Background job %s (%s) failed, retrying: %s'
+                            % (self.id, self.name, self.exc_info[1]))
+                self.status = RETRYING
+                self.save()
+                time.sleep(self.retry_delay * 2 ** (self.attempts - 1))
+            if self.exc_info:
+                LOG.error('Background job %s (%s) failed.'
+                          % (self.id, self.name), exc_info=self.exc_info)
+                self.status = FAILED
+            else:
+                self.status = SUCCEEDED
+            # Nothing waits for the job to replay its messages.
+            self.replay_messages()
+        except:
+            LOG.exception('Background job %s (%s) failed.'
+                          % (self.id, self.name))
+            self.status = FAILED
+        finally:
+            self.save()
+            self._done.set()
+
+
+class JobQueue(concurrency.WorkerPool):
+    """
+    A :class:`~horizon.utils.concurrency.WorkerPool` for :class:`Job`
+    objects, whose queue holds at most ``max_queued`` jobs. Without any
+    workers the jobs are run as they are submitted.
+    """
+    thread_name = "horizon-job-%s"
+
+    def __init__(self, size, max_queued):
+        super(JobQueue, self).__init__(size)
+        self.queue = Queue.Queue(max_queued)
+
+    def submit(self, job):
+        job.save()
+        if self.size == 0:
+            if job.claim():
+                job.run()
+            return job
+        if len(self._threads) < self.size:
+            self._start()
+        try:
+            self.queue.put_nowait(job)
+        except Queue.Full:
+            job.status = FAILED
+            job.save()
+            raise exceptions.JobQueueFull()
+        return job
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """
+    Returns the process-wide :class:`JobQueue`, sized by the
+    ``background_workers`` and ``background_queue_size`` keys of
+    ``HORIZON_CONFIG``.
+    """
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue(conf.HORIZON_CONFIG['background_workers'],
+                                  conf.HORIZON_CONFIG['background_queue_size'])
+    return _queue
+
+
+def submit(request, job):
+    """
+    Submits ``job`` on behalf of the user of ``request`` and returns it.
+    Once the queue has taken it, its id is added to the user's latest jobs,
+    which are reported by the ``horizon:jobs`` view.
+    """
+    job.user_id = request.user.id
+    get_queue().submit(job)
+    if hasattr(request, 'session'):
+        jobs = request.session.get(SESSION_KEY, [])
+        request.session[SESSION_KEY] = jobs[-(SESSION_JOBS - 1):] + [job.id]
+    return job
+
+
+def get_status(job_id):
+    """
+    Returns the status of a job as a dict holding its ``id``, ``name``,
+    ``kind``, the ``user_id`` of the user who submitted it, its ``status``
+    (one of ``"queued"``, ``"running"``, ``"retrying"``, ``"succeeded"`` or
+    ``"failed"``), whether it has ``finished``, the number of ``attempts``
+    made, its ``progress``, the ``[tag, text]`` pairs of the ``messages`` it
+    added and the ``error`` it failed with, or ``None`` if it's unknown.
+    """
+    return cache.get(JOB_KEY % job_id)
+
+
+def get_user_jobs(request):
+    """ Returns the status of the latest jobs of the user, by id. """
+    jobs = {}
+    for job_id in request.session.get(SESSION_KEY, []):
+        status = get_status(job_id)
+        if status and status['user_id'] == request.user.id:
+            jobs[job_id] = status
+    return jobs
@@ -14,29 +14,107 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+"""
+Memoization decorators with explicitly bounded lifetimes.
+
+* :func:`memoized` caches results process-wide in a size-bounded LRU cache,
+  optionally expiring them after a number of seconds. Only use it for
+  results which don't depend on the current user or request.
+* :func:`request_memoized` caches results on the request passed to the
+  function, so they are freed along with it once the response is sent.
+* :func:`weakref_memoized` caches results for as long as the function's
+  first argument is alive.
+
+Calls whose arguments can't be hashed are never cached. The hit and miss
+counts of every memoized function are available from :func:`stats`.
+"""
+
+import collections
 import functools
+import threading
+import time
+import weakref
 
+from django import http
 
-class memoized(object):
-    '''Decorator. Caches a function's return value each time it is called.
-    If called later with the same arguments, the cached value is returned
-    (not reevaluated).
-    '''
+
+REQUEST_CACHE_ATTR = '_horizon_memoized'
+
+_registry = []
+
+
+def stats():
+    """
+    Returns a dict mapping the dotted name of every memoized function to
+    its statistics (``hits``, ``misses`` and, where it is meaningful,
+    ``size`` and ``evictions``).
+    """
+    return dict((memoizer.name, memoizer.stats()) for memoizer in _registry)
+
+
+def clear_request_cache(request):
+    """
+    Frees the results cached on ``request`` by :func:`request_memoized`.
+    """
+    request.__dict__.pop(REQUEST_CACHE_ATTR, None)
+
+
+class Memoizer(object):
+    """
+    Base class for the memoizing decorators. Subclasses decide where the
+    results are stored by implementing :meth:`get_cache`.
+    """
     def __init__(self, func):
         self.func = func
-        self.cache = {}
+        self.name = '%s.%s' % (func.__module__, func.__name__)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        functools.update_wrapper(self, func)
+        _registry.append(self)
+
+    def get_cache(self, args):
+        """
+        Returns the dict-like object the result for ``args`` is cached in
+        along with the key to use for it, or ``(None, None)`` if the call
+        shouldn't be cached.
+        """
+        raise NotImplementedError
 
-    def __call__(self, *args):
+    def make_key(self, args, kwargs):
+        key = args
+        if kwargs:
+            key += (tuple(sorted(kwargs.items())),)
+        hash(key)
+        return key
+
+    def __call__(self, *args, **kwargs):
         try:
-            return self.cache[args]
-        except KeyError:
-            value = self.func(*args)
-            self.cache[args] = value
-            return value
+            cache, key = self.get_cache(self.make_key(args, kwargs))
         except TypeError:
             # uncachable -- for instance, passing a list as an argument.
             # Better to not cache than to blow up entirely.
-            return self.func(*args)
+            cache = None
+        if cache is None:
+            return self.func(*args, **kwargs)
+        try:
+            value = self.lookup(cache, key)
+            self.hits += 1
+            return value
+        except KeyError:
+            self.misses += 1
+            value = self.func(*args, **kwargs)
+            self.store(cache, key, value)
+            return value
+
+    def lookup(self, cache, key):
+        return cache[key]
+
+    def store(self, cache, key, value):
+        cache[key] = value
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
 
     def __repr__(self):
         '''Return the function's docstring.'''
@@ -48,3 +126,110 @@ class memoized(object):
 
     def __str__(self):
         return str(self.func)
+
+
+class LRUMemoizer(Memoizer):
+    """
+    Caches up to ``max_size`` results process-wide, discarding the least
+    recently used ones first. With a ``ttl`` results expire after that
+    many seconds.
+    """
+    def __init__(self, func, max_size=128, ttl=None):
+        super(LRUMemoizer, self).__init__(func)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evictions = 0
+        self.cache = collections.OrderedDict()
+
+    def get_cache(self, key):
+        return self.cache, key
+
+    def lookup(self, cache, key):
+        with self.lock:
+            value, expires = cache.pop(key)
+            if expires is not None and expires < time.time():
+                raise KeyError(key)
+            # Re-insert the entry to mark it as the most recently used.
+            cache[key] = (value, expires)
+            return value
+
+    def store(self, cache, key, value):
+        expires = time.time() + self.ttl if self.ttl else None
+        with self.lock:
+            cache[key] = (value, expires)
+            while len(cache) > self.max_size:
+                cache.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        stats = super(LRUMemoizer, self).stats()
+        stats.update(size=len(self.cache), evictions=self.evictions)
+        return stats
+
+
+class RequestMemoizer(Memoizer):
+    """
+    Caches results on the first :class:`~django.http.HttpRequest` among the
+    arguments. Calls made without a request aren't cached.
+    """
+    def get_cache(self, key):
+        for arg in key:
+            if isinstance(arg, http.HttpRequest):
+                caches = arg.__dict__.setdefault(REQUEST_CACHE_ATTR, {})
+                # The request itself needn't be part of the key.
+                return (caches.setdefault(self, {}),
+                        tuple(a for a in key if a is not arg))
+        return None, None
+
+
+class WeakrefMemoizer(Memoizer):
+    """
+    Caches results for as long as the first argument is alive. Calls whose
+    first argument can't be weakly referenced aren't cached.
+    """
+    def __init__(self, func):
+        super(WeakrefMemoizer, self).__init__(func)
+        self.cache = weakref.WeakKeyDictionary()
+
+    def get_cache(self, key):
+        if not key:
+            return None, None
+        with self.lock:
+            try:
+                cache = self.cache.setdefault(key[0], {})
+            except TypeError:
+                return None, None
+        return cache, key[1:]
+
+    def stats(self):
+        stats = super(WeakrefMemoizer, self).stats()
+        stats.update(size=len(self.cache))
+        return stats
+
+
+def memoized(func=None, max_size=128, ttl=None):
+    '''Decorator. Caches a function's return value each time it is called.
+    If called later with the same arguments, the cached value is returned
+    (not reevaluated).
+
+    The cache is process-wide and holds at most ``max_size`` results,
+    optionally expiring them after ``ttl`` seconds. It may be applied
+    either as ``@memoized`` or as ``@memoized(max_size=10, ttl=60)``.
+    '''
+    if func is None:
+        return lambda func: LRUMemoizer(func, max_size=max_size, ttl=ttl)
+    return LRUMemoizer(func, max_size=max_size, ttl=ttl)
+
+
+def request_memoized(func):
+    '''Decorator. Caches a function's return value for the duration of
+    the request passed to it.
+    '''
+    return RequestMemoizer(func)
+
+
+def weakref_memoized(func):
+    '''Decorator. Caches a function's return value for as long as its
+    first argument is alive.
+    '''
+    return WeakrefMemoizer(func)
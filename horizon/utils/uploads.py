@@ -0,0 +1,106 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Upload handlers which send a file on to a service while it's uploaded,
+rather than once the whole request has been read.
+"""
+
+import re
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http.multipartparser import MultiPartParser
+from django.middleware.csrf import CSRF_KEY_LENGTH
+from django.utils.crypto import constant_time_compare
+from django.utils.http import same_origin
+
+
+class StreamingUploadHandler(FileUploadHandler):
+    """
+    Base class of the upload handlers which stream a file as it's received,
+    and need to see the form fields preceding it in the request to do so
+    (the CSRF token, at least).
+
+    Django's parser doesn't show the fields it has read to the upload
+    handlers, so the request is read by a parser of the handler's own. The
+    fields read so far are then available from :attr:`fields`.
+    """
+    def __init__(self, request):
+        super(StreamingUploadHandler, self).__init__(request)
+        self.content_length = None
+        self._parser = None
+
+    def handles_request(self, META, content_length):
+        """
+        Returns whether the handler parses the request in order to stream
+        its file. Defaults to ``True``.
+        """
+        return True
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        # Our own parser calls this again, and is left to parse the request.
+        if self._parser is not None:
+            return None
+        self.content_length = content_length
+        if not self.handles_request(META, content_length):
+            return None
+        self._parser = MultiPartParser(META, input_data,
+                                       self.request.upload_handlers,
+                                       encoding)
+        return self._parser.parse()
+
+    @property
+    def fields(self):
+        """
+        The form fields read so far, or ``None`` if the handler doesn't
+        parse the request.
+        """
+        if self._parser is None:
+            return None
+        # Django 1.4's MultiPartParser adds the fields to its private _post
+        # as it reads them, and there's no public way to get at them before
+        # the whole request has been parsed.
+        return self._parser._post
+
+    def check_csrf(self):
+        """
+        Returns whether the request passes the checks of Django's
+        ``CsrfViewMiddleware`` as far as they can be made from the fields
+        read so far, so that nothing is streamed on behalf of a forged
+        request.
+
+        This is only a precheck: the view must still be wrapped in
+        ``csrf_protect``, which stays the authority on whether the request
+        is accepted, and discard whatever was streamed if it isn't.
+        """
+        request = self.request
+        if getattr(request, '_dont_enforce_csrf_checks', False):
+            return True
+        if self.fields is None:
+            return False
+        if request.is_secure():
+            referer = request.META.get('HTTP_REFERER')
+            good_referer = 'https://%s/' % request.get_host()
+            if referer is None or not same_origin(referer, good_referer):
+                return False
+        # The cookie is sanitized the way the middleware does it, which
+        # replaces one it can't use with a new key no token can match.
+        cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+        if len(cookie) > CSRF_KEY_LENGTH:
+            return False
+        cookie = re.sub('[^a-zA-Z0-9]+', '', cookie)
+        token = self.fields.get('csrfmiddlewaretoken')
+        return bool(cookie and token and constant_time_compare(cookie, token))
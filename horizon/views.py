@@ -14,11 +14,19 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import json
+
+from django import http
 from django import shortcuts
 from django.views import generic
 
 import horizon
+from horizon import conf
+from horizon import events as horizon_events
 from horizon import exceptions
+from horizon import instrumentation
+from horizon.tables import actions
+from horizon.utils import jobs as background_jobs
 
 
 def user_home(request):
@@ -26,6 +34,85 @@ def user_home(request):
     return shortcuts.redirect(horizon.get_user_home(request.user))
 
 
+def events(request):
+    """
+    Long-polls the event bus for the events published on the ``channel``
+    query parameters (and the user's own channel) after the ``last_id``
+    one, holding the request open for up to ``event_timeout`` seconds.
+
+    Responds with a JSON object holding the ``last_id`` to poll from next,
+    the ``events`` and a ``missed`` flag, which is set when events may have
+    been lost in between, so everything on the page should be refreshed.
+    """
+    bus = horizon_events.get_event_bus()
+    if bus is None:
+        raise http.Http404()
+    if not request.user.is_authenticated():
+        return http.HttpResponse(status=401)
+    channels = [channel for channel in request.GET.getlist('channel')
+                if horizon_events.can_subscribe(request.user, channel)]
+    channels.append(horizon_events.user_channel(request.user.id))
+    try:
+        last_id = int(request.GET['last_id'])
+    except (KeyError, ValueError):
+        last_id = None
+    last_id, new_events, missed = bus.wait(
+                                        channels, last_id,
+                                        conf.HORIZON_CONFIG['event_timeout'])
+    return http.HttpResponse(json.dumps({'last_id': last_id,
+                                         'events': new_events,
+                                         'missed': missed}),
+                             content_type='application/json')
+
+
+def batch_progress(request):
+    """
+    Responds with a JSON object mapping the ids of the user's latest batch
+    actions taken in the background to their progress, as returned by
+    :func:`horizon.tables.actions.get_batch_progress`.
+    """
+    if not request.user.is_authenticated():
+        return http.HttpResponse(status=401)
+    batch_jobs = {}
+    for job_id, status in background_jobs.get_user_jobs(request).items():
+        progress = actions.get_batch_progress_from_status(status)
+        if progress:
+            del progress['user_id']
+            batch_jobs[job_id] = progress
+    return http.HttpResponse(json.dumps(batch_jobs),
+                             content_type='application/json')
+
+
+def jobs(request):
+    """
+    Responds with a JSON object mapping the ids of the user's latest
+    background jobs to their status, as returned by
+    :func:`horizon.utils.jobs.get_status`.
+    """
+    if not request.user.is_authenticated():
+        return http.HttpResponse(status=401)
+    user_jobs = background_jobs.get_user_jobs(request)
+    return http.HttpResponse(json.dumps(user_jobs),
+                             content_type='application/json')
+
+
+def metrics(request):
+    """
+    Responds with a JSON object holding the duration histograms of the
+    ``views`` and ``api`` operations served by this process, as returned by
+    :meth:`horizon.instrumentation.Metrics.summary`. Only administrators
+    may see them.
+    """
+    if not instrumentation.is_enabled():
+        raise http.Http404()
+    if not request.user.is_authenticated():
+        return http.HttpResponse(status=401)
+    if not request.user.is_superuser:
+        return http.HttpResponse(status=403)
+    return http.HttpResponse(json.dumps(instrumentation.metrics.summary()),
+                             content_type='application/json')
+
+
 class APIView(generic.TemplateView):
     """ A quick class-based view for putting API data into a template.
 
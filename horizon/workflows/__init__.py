@@ -1,2 +1,3 @@
-from .base import Workflow, Step, Action, UpdateMembersStep
+from .base import (Workflow, Step, Action, UpdateMembersStep,
+                   MembershipDiff)
 from .views import WorkflowView
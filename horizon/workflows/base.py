@@ -31,6 +31,7 @@ from django.forms.forms import NON_FIELD_ERRORS
 from horizon import base
 from horizon import exceptions
 from horizon.templatetags.horizon import has_permissions
+from horizon.utils import concurrency
 from horizon.utils import html
 
 
@@ -470,6 +471,79 @@ class UpdateMembersStep(Step):
     no_members_text = _("No members.")
 
 
+class MembershipDiff(object):
+    """
+    The changes which turn the ``current`` memberships of a group (the
+    members of a project, the security groups of an instance...) into the
+    ``wanted`` ones, such as those chosen in an :class:`UpdateMembersStep`.
+
+    Memberships are given as iterables of members, or of ``(member, role)``
+    pairs for groups whose members have roles (see :meth:`role_pairs`), and
+    are compared as sets.
+
+    .. attribute:: to_add
+
+        The set of wanted memberships which aren't current.
+
+    .. attribute:: to_remove
+
+        The set of current memberships which aren't wanted.
+
+    .. attribute:: failures
+
+        The ``(membership, exc_info)`` of each change which failed when the
+        changes were applied.
+    """
+    def __init__(self, current, wanted):
+        self.current = set(current)
+        self.wanted = set(wanted)
+        self.to_add = self.wanted - self.current
+        self.to_remove = self.current - self.wanted
+        self.failures = []
+
+    @staticmethod
+    def role_pairs(roles):
+        """
+        Returns the set of ``(member, role)`` pairs of a dict of the roles
+        of each member.
+        """
+        return set((member, role) for member, member_roles in roles.items()
+                   for role in member_roles)
+
+    def __nonzero__(self):
+        return bool(self.to_add or self.to_remove)
+
+    def _call(self, func, membership):
+        if isinstance(membership, tuple):
+            return func(*membership)
+        return func(membership)
+
+    def apply(self, add, remove, concurrent=True):
+        """
+        Calls ``add`` for each membership to add and ``remove`` for each
+        one to remove, with the member (and role) as arguments. The calls
+        run concurrently on the worker pool unless ``concurrent`` is
+        ``False``.
+
+        Every change is attempted even when some of them fail. The failures
+        are kept in ``failures`` and, once all the calls have completed,
+        the exception of the first one is re-raised.
+        """
+        changes = [(add, membership) for membership in sorted(self.to_add)]
+        changes.extend([(remove, membership)
+                        for membership in sorted(self.to_remove)])
+        tasks = [concurrency.Task(self._call, func, membership)
+                 for func, membership in changes]
+        self.failures = []
+        for task in concurrency.iter_tasks(tasks, concurrent=concurrent):
+            task.replay_messages()
+            if task.exc_info:
+                self.failures.append((task.args[1], task.exc_info))
+        if self.failures:
+            exc_type, exc_value, exc_traceback = self.failures[0][1]
+            raise exc_type, exc_value, exc_traceback
+
+
 class Workflow(html.HTMLElement):
     """
     A Workflow is a collection of Steps. It's interface is very
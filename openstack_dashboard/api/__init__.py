@@ -33,6 +33,8 @@ In other words, Horizon developers not working on openstack_dashboard.api
 shouldn't need to understand the finer details of APIs for
 Keystone/Nova/Glance/Swift et. al.
 """
+from horizon import instrumentation
+
 from openstack_dashboard.api import base
 from openstack_dashboard.api import cinder
 from openstack_dashboard.api import glance
@@ -42,3 +44,17 @@ from openstack_dashboard.api import nova
 from openstack_dashboard.api import quantum
 from openstack_dashboard.api import lbaas
 from openstack_dashboard.api import swift
+
+# Record the calls made through the API wrappers, other than the creation of
+# their clients.
+instrumentation.instrument_module(cinder, 'volume', exclude=('cinderclient',))
+instrumentation.instrument_module(glance, 'image', exclude=('glanceclient',))
+instrumentation.instrument_module(keystone, 'identity',
+                                  exclude=('keystoneclient',))
+instrumentation.instrument_module(network, 'network')
+instrumentation.instrument_module(nova, 'compute', exclude=('novaclient',))
+instrumentation.instrument_module(quantum, 'network',
+                                  exclude=('quantumclient',))
+instrumentation.instrument_module(lbaas, 'network')
+instrumentation.instrument_module(swift, 'object-store',
+                                  exclude=('swift_api',))
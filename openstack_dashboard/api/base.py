@@ -19,15 +19,23 @@
 #    under the License.
 
 from collections import Sequence
+import hashlib
 import logging
+import threading
+import time
+import uuid
 
 from django.conf import settings
+from django.core.cache import get_cache
 
 from horizon import exceptions
+from horizon import instrumentation
+from horizon.utils import concurrency
 
 
 __all__ = ('APIResourceWrapper', 'APIDictWrapper',
-           'get_service_from_catalog', 'url_for',)
+           'get_service_from_catalog', 'url_for', 'cached_client',
+           'RelatedResources', 'catalog_cache', 'role_scope',)
 
 
 LOG = logging.getLogger(__name__)
@@ -140,6 +148,300 @@ class QuotaSet(Sequence):
         return match.pop() if len(match) else Quota(key, default)
 
 
+class ClientCache(threading.local):
+    """
+    Thread-local cache of API client instances keyed on the service type,
+    endpoint and token they were created with.
+
+    A client is reused for every call made during a request and by later
+    requests served by the same thread with the same token, so clients which
+    hold on to their HTTP connections can keep them alive between calls.
+    The cache is thread-local because the underlying HTTP clients are not
+    safe to share between threads.
+
+    Clients which have not been used for ``API_CLIENT_CACHE_TIMEOUT`` seconds
+    are evicted, as are the least recently used clients once more than
+    ``API_CLIENT_CACHE_SIZE`` are held. A size of ``0`` disables caching.
+    """
+    def __init__(self):
+        self.clients = {}
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'API_CLIENT_CACHE_TIMEOUT', 300)
+
+    @property
+    def size(self):
+        return getattr(settings, 'API_CLIENT_CACHE_SIZE', 20)
+
+    def get(self, key, factory):
+        """
+        Returns the cached client for ``key``, calling ``factory`` to create
+        one if there isn't a usable one in the cache.
+        """
+        now = time.time()
+        self.evict(now)
+        if key in self.clients:
+            client = self.clients[key][0]
+        else:
+            client = factory()
+        if self.size > 0:
+            self.clients[key] = (client, now)
+            self.evict(now)
+        return client
+
+    def evict(self, now=None):
+        """ Removes idle clients and trims the cache down to its size. """
+        now = now or time.time()
+        for key, (client, last_used) in self.clients.items():
+            if now - last_used > self.timeout:
+                del self.clients[key]
+        if len(self.clients) > self.size:
+            by_age = sorted(self.clients.items(), key=lambda i: i[1][1])
+            for key, value in by_age[:len(self.clients) - self.size]:
+                del self.clients[key]
+
+    def clear(self):
+        self.clients.clear()
+
+
+client_cache = ClientCache()
+
+
+def cached_client(request, service_type, endpoint, factory):
+    """
+    Returns a client for ``service_type`` at ``endpoint`` authenticated with
+    the current user's token, reusing a previously created one from the
+    :class:`ClientCache` when possible. ``factory`` is called with no
+    arguments to create a new client.
+    """
+    instrumentation.mark_client()
+    key = (service_type, endpoint, request.user.token.id)
+    return client_cache.get(key, factory)
+
+
+class CachedResource(object):
+    """
+    Picklable stand-in for an API client resource (a novaclient
+    ``Flavor``, a keystoneclient ``Role``, etc.) in the
+    :class:`CatalogCache`.
+
+    Client resources hold a reference to their manager, and through it to
+    the client and its HTTP connection, so only their class and data are
+    stored. :meth:`restore` rebuilds the resource around a live manager.
+    """
+    def __init__(self, resource):
+        self.resource_class = resource.__class__
+        self.info = resource._info
+        self.loaded = getattr(resource, '_loaded', True)
+
+    @staticmethod
+    def is_resource(value):
+        return '_info' in getattr(value, '__dict__', {})
+
+    def restore(self, manager):
+        return self.resource_class(manager, self.info, loaded=self.loaded)
+
+
+class CatalogCache(object):
+    """
+    Shared cache for slow-changing reference data such as flavors, roles
+    and tenants, stored in the Django cache configured by
+    ``API_CATALOG_CACHE_BACKEND`` so that it is shared between processes
+    when a shared backend like memcached is used.
+
+    Each kind of resource has its own timeout, set in
+    ``API_CATALOG_CACHE_TIMEOUTS``; a timeout of ``0`` disables caching of
+    that resource. Entries are keyed on the resource name and the
+    endpoint and scope (e.g. tenant) they were fetched for, and the API
+    wrappers which change a resource call :meth:`invalidate` to discard
+    every cached entry for it.
+
+    Hits and misses are counted per resource in ``stats``.
+    """
+    default_timeouts = {'flavors': 300,
+                        'roles': 300,
+                        'tenants': 60,
+                        'images': 30,
+                        'external_networks': 300,
+                        'topology': 5,
+                        'usage': 60 * 60 * 24,
+                        'quota_usages': 30}
+    # The generation keys only need to outlive the entries they tag.
+    generation_timeout = 60 * 60 * 24 * 30
+
+    def __init__(self):
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return get_cache(getattr(settings, 'API_CATALOG_CACHE_BACKEND',
+                                 'default'))
+
+    def timeout(self, resource):
+        timeouts = getattr(settings, 'API_CATALOG_CACHE_TIMEOUTS', {})
+        return timeouts.get(resource, self.default_timeouts.get(resource, 0))
+
+    def _count(self, resource, outcome):
+        with self._lock:
+            counts = self.stats.setdefault(resource, {'hits': 0, 'misses': 0})
+            counts[outcome] += 1
+
+    def _generation_key(self, resource):
+        return 'horizon:catalog:%s:generation' % resource
+
+    def _generation(self, resource):
+        key = self._generation_key(resource)
+        generation = self.backend.get(key)
+        if generation is None:
+            self.backend.add(key, uuid.uuid4().hex, self.generation_timeout)
+            generation = self.backend.get(key)
+        return generation
+
+    def _key(self, resource, key):
+        digest = hashlib.md5(repr(key)).hexdigest()
+        return 'horizon:catalog:%s:%s:%s' % (resource,
+                                             self._generation(resource),
+                                             digest)
+
+    def _dump(self, value):
+        if isinstance(value, (list, tuple)):
+            return value.__class__([self._dump(item) for item in value])
+        if CachedResource.is_resource(value):
+            return CachedResource(value)
+        return value
+
+    def _load(self, value, manager):
+        if isinstance(value, (list, tuple)):
+            return value.__class__([self._load(item, manager)
+                                    for item in value])
+        if isinstance(value, CachedResource):
+            return value.restore(manager())
+        return value
+
+    def get(self, resource, key, fetch, manager=None):
+        """
+        Returns the cached value of ``resource`` for ``key`` (a tuple
+        identifying the endpoint, scope and arguments it was fetched with),
+        calling ``fetch`` with no arguments to retrieve it on a miss.
+
+        ``manager`` is called with no arguments to get the client manager
+        which cached client resources are reattached to.
+        """
+        timeout = self.timeout(resource)
+        if not timeout:
+            return fetch()
+        cache_key = self._key(resource, key)
+        value = self.backend.get(cache_key)
+        if value is not None:
+            self._count(resource, 'hits')
+            instrumentation.mark_cache('hit')
+            return self._load(value, manager)
+        self._count(resource, 'misses')
+        instrumentation.mark_cache('miss')
+        value = fetch()
+        self.backend.set(cache_key, self._dump(value), timeout)
+        return value
+
+    def set(self, resource, key, value):
+        """ Stores ``value`` as the cached ``resource`` for ``key``. """
+        timeout = self.timeout(resource)
+        if timeout:
+            self.backend.set(self._key(resource, key), self._dump(value),
+                             timeout)
+
+    def delete(self, resource, key):
+        """ Discards the cached value of ``resource`` for ``key``. """
+        self.backend.delete(self._key(resource, key))
+
+    def invalidate(self, resource):
+        """ Discards every cached entry for ``resource``. """
+        self.backend.set(self._generation_key(resource), uuid.uuid4().hex,
+                         self.generation_timeout)
+
+    def clear(self):
+        self.backend.clear()
+        self.stats.clear()
+
+
+catalog_cache = CatalogCache()
+
+
+def role_scope(request):
+    """
+    Returns the sorted names of the roles of the request's user, to be part
+    of the catalog cache key of data whose content depends on them: admin
+    tokens are shown the resources of other projects, so such data is only
+    shared between users with the same roles.
+    """
+    return tuple(sorted(role['name'] for role in request.user.roles))
+
+
+def quota_usages_key(request):
+    """ Returns the catalog cache key of the request's project's usage. """
+    return (url_for(request, 'compute'), request.user.tenant_id)
+
+
+def invalidate_quota_usages(request):
+    """
+    Discards the cached quota usage affected by the API wrappers which create
+    or delete resources counted against a project's quotas.
+
+    Administrators may delete the resources of any project, so when they do
+    the cached usage of every project is discarded.
+    """
+    if request.user.is_superuser:
+        catalog_cache.invalidate('quota_usages')
+    else:
+        catalog_cache.delete('quota_usages', quota_usages_key(request))
+
+
+class RelatedResources(object):
+    """
+    Fetches the resources referenced by a result set in one batch so that
+    they can be joined to it in memory, rather than fetching them one call
+    per referencing object.
+
+    ``ids`` are the (possibly repeated) IDs referenced by the result set.
+    Those found in ``known``, a dict of resources already retrieved (e.g.
+    with a single list call), aren't fetched again. Each of the remaining
+    distinct IDs is fetched exactly once by calling ``fetch(id)``, with the
+    calls running concurrently.
+
+    Resources are looked up by ID with the ``[]`` operator. Looking up a
+    resource whose fetch failed re-raises the exception raised by
+    ``fetch``, so callers can handle failures per referencing object just
+    as they would have with individual calls.
+    """
+    def __init__(self, ids, fetch, known=None):
+        self.resources = dict(known or {})
+        self.failures = {}
+        missing, queued = [], set()
+        for resource_id in ids:
+            if resource_id not in self.resources and \
+                    resource_id not in queued:
+                queued.add(resource_id)
+                missing.append(resource_id)
+        tasks = [concurrency.Task(fetch, resource_id)
+                 for resource_id in missing]
+        for resource_id, task in zip(missing, concurrency.run_tasks(tasks)):
+            task.replay_messages()
+            if task.exc_info:
+                self.failures[resource_id] = task.exc_info
+            else:
+                self.resources[resource_id] = task.result
+
+    def __getitem__(self, resource_id):
+        if resource_id in self.failures:
+            exc_type, exc_value, exc_traceback = self.failures[resource_id]
+            raise exc_type, exc_value, exc_traceback
+        return self.resources[resource_id]
+
+    def __contains__(self, resource_id):
+        return resource_id in self.resources
+
+
 def get_service_from_catalog(catalog, service_type):
     if catalog:
         for service in catalog:
@@ -29,7 +29,9 @@ from django.utils.translation import ugettext as _
 
 from cinderclient.v1 import client as cinder_client
 
-from openstack_dashboard.api.base import url_for
+from openstack_dashboard.api.base import (cached_client, url_for,
+                                          RelatedResources,
+                                          invalidate_quota_usages)
 from openstack_dashboard.api import nova
 from openstack_dashboard.api.base import QuotaSet
 from horizon import exceptions
@@ -49,17 +51,20 @@ def cinderclient(request):
     except exceptions.ServiceCatalogException:
         LOG.debug('no volume service configured.')
         return None
-    LOG.debug('cinderclient connection created using token "%s" and url "%s"' %
-              (request.user.token.id, cinder_url))
-    c = cinder_client.Client(request.user.username,
-                             request.user.token.id,
-                             project_id=request.user.tenant_id,
-                             auth_url=cinder_url,
-                             insecure=insecure,
-                             http_log_debug=settings.DEBUG)
-    c.client.auth_token = request.user.token.id
-    c.client.management_url = cinder_url
-    return c
+
+    def create_client():
+        LOG.debug('cinderclient connection created using token "%s" and url '
+                  '"%s"' % (request.user.token.id, cinder_url))
+        c = cinder_client.Client(request.user.username,
+                                 request.user.token.id,
+                                 project_id=request.user.tenant_id,
+                                 auth_url=cinder_url,
+                                 insecure=insecure,
+                                 http_log_debug=settings.DEBUG)
+        c.client.auth_token = request.user.token.id
+        c.client.management_url = cinder_url
+        return c
+    return cached_client(request, 'volume', cinder_url, create_client)
 
 
 def volume_list(request, search_opts=None):
@@ -76,9 +81,13 @@ def volume_list(request, search_opts=None):
 def volume_get(request, volume_id):
     volume_data = cinderclient(request).volumes.get(volume_id)
 
+    instances = RelatedResources(
+        [attachment['server_id'] for attachment in volume_data.attachments
+         if "server_id" in attachment],
+        lambda server_id: nova.server_get(request, server_id))
     for attachment in volume_data.attachments:
         if "server_id" in attachment:
-            instance = nova.server_get(request, attachment['server_id'])
+            instance = instances[attachment['server_id']]
             attachment['instance_name'] = instance.name
         else:
             # Nova volume can occasionally send back error'd attachments
@@ -90,13 +99,17 @@ def volume_get(request, volume_id):
 
 def volume_create(request, size, name, description, volume_type,
                   snapshot_id=None, metadata=None):
-    return cinderclient(request).volumes.create(size, display_name=name,
+    volume = cinderclient(request).volumes.create(size, display_name=name,
             display_description=description, volume_type=volume_type,
             snapshot_id=snapshot_id, metadata=metadata)
+    invalidate_quota_usages(request)
+    return volume
 
 
 def volume_delete(request, volume_id):
-    return cinderclient(request).volumes.delete(volume_id)
+    result = cinderclient(request).volumes.delete(volume_id)
+    invalidate_quota_usages(request)
+    return result
 
 
 def volume_snapshot_get(request, snapshot_id):
@@ -130,6 +143,18 @@ def tenant_quota_update(request, tenant_id, **kwargs):
     return cinderclient(request).quotas.update(tenant_id, **kwargs)
 
 
+def tenant_absolute_limits(request):
+    limits = cinderclient(request).limits.get().absolute
+    limits_dict = {}
+    for limit in limits:
+        # -1 is used to represent unlimited quotas
+        if limit.value == -1:
+            limits_dict[limit.name] = float("inf")
+        else:
+            limits_dict[limit.name] = limit.value
+    return limits_dict
+
+
 def default_quota_get(request, tenant_id):
     return QuotaSet(cinderclient(request).quotas.defaults(tenant_id))
 
@@ -20,16 +20,22 @@
 
 from __future__ import absolute_import
 
+import hashlib
 import itertools
 import logging
-import thread
+import Queue
+import time
 import urlparse
 
 from django.conf import settings
 
 import glanceclient as glance_client
 
-from openstack_dashboard.api.base import url_for
+from horizon import exceptions
+from horizon.utils import jobs
+
+from openstack_dashboard.api.base import (cached_client, url_for,
+                                          catalog_cache, role_scope)
 
 
 LOG = logging.getLogger(__name__)
@@ -39,14 +45,19 @@ def glanceclient(request):
     o = urlparse.urlparse(url_for(request, 'image'))
     url = "://".join((o.scheme, o.netloc))
     insecure = getattr(settings, 'OPENSTACK_SSL_NO_VERIFY', False)
-    LOG.debug('glanceclient connection created using token "%s" and url "%s"'
-              % (request.user.token.id, url))
-    return glance_client.Client('1', url, token=request.user.token.id,
-                                insecure=insecure)
+
+    def create_client():
+        LOG.debug('glanceclient connection created using token "%s" and url '
+                  '"%s"' % (request.user.token.id, url))
+        return glance_client.Client('1', url, token=request.user.token.id,
+                                    insecure=insecure)
+    return cached_client(request, 'image', url, create_client)
 
 
 def image_delete(request, image_id):
-    return glanceclient(request).images.delete(image_id)
+    result = glanceclient(request).images.delete(image_id)
+    catalog_cache.invalidate('images')
+    return result
 
 
 def image_get(request, image_id):
@@ -57,7 +68,52 @@ def image_get(request, image_id):
     return glanceclient(request).images.get(image_id)
 
 
-def image_list_detailed(request, marker=None, filters=None, paginate=False):
+def _is_excluded(image, exclude):
+    for attr, values in exclude.items():
+        if attr.startswith('property-'):
+            value = image.properties.get(attr[len('property-'):], None)
+        else:
+            value = getattr(image, attr, None)
+        if value in values:
+            return True
+    return False
+
+
+def image_iter(request, marker=None, filters=None, exclude=None,
+               page_size=None):
+    """
+    Lazily yields the images after ``marker`` matching ``filters``, fetching
+    them from glance ``page_size`` at a time and at most ``API_RESULT_LIMIT``
+    in all.
+
+    ``filters`` are passed on to glance, which matches them exactly (e.g.
+    ``container_format``, ``status``, ``is_public`` or properties such as
+    ``property-owner_id``). Glance can't leave images out by value, so
+    images with any of the values given for an attribute or property in
+    ``exclude`` (e.g. ``{'container_format': ('aki', 'ari')}``) are skipped
+    as they stream past instead.
+    """
+    limit = getattr(settings, 'API_RESULT_LIMIT', 1000)
+    kwargs = {'filters': filters or {}}
+    if marker:
+        kwargs['marker'] = marker
+    images = glanceclient(request).images.list(page_size=page_size or limit,
+                                               limit=limit, **kwargs)
+    for image in images:
+        if not (exclude and _is_excluded(image, exclude)):
+            yield image
+
+
+def image_list_detailed(request, marker=None, filters=None, paginate=False,
+                        exclude=None):
+    """
+    Returns a ``(images, has_more_data)`` tuple of the images matching
+    ``filters`` and ``exclude`` (see :func:`image_iter`). With ``paginate``
+    only the first ``API_RESULT_PAGE_SIZE`` are returned, and only as many
+    images as needed to fill the page are read from glance. Since skipped
+    images are skipped again, the ID of the last image on a page is a
+    stable marker for the next one.
+    """
     limit = getattr(settings, 'API_RESULT_LIMIT', 1000)
     page_size = getattr(settings, 'API_RESULT_PAGE_SIZE', 20)
 
@@ -66,40 +122,153 @@ def image_list_detailed(request, marker=None, filters=None, paginate=False):
     else:
         request_size = limit
 
-    kwargs = {'filters': filters or {}}
-    if marker:
-        kwargs['marker'] = marker
+    filters = filters or {}
+    exclude = exclude or {}
 
-    images_iter = glanceclient(request).images.list(page_size=request_size,
-                                                    limit=limit,
-                                                    **kwargs)
-    has_more_data = False
-    if paginate:
-        images = list(itertools.islice(images_iter, request_size))
-        if len(images) > page_size:
-            images.pop(-1)
-            has_more_data = True
-    else:
-        images = list(images_iter)
-    return (images, has_more_data)
+    def fetch():
+        images_iter = image_iter(request, marker, filters, exclude,
+                                 page_size=request_size)
+        has_more_data = False
+        if paginate:
+            images = list(itertools.islice(images_iter, request_size))
+            if len(images) > page_size:
+                images.pop(-1)
+                has_more_data = True
+        else:
+            images = list(images_iter)
+        return (images, has_more_data)
+
+    # Glance lists the private images of every project to admin tokens.
+    key = (url_for(request, 'image'), request.user.tenant_id,
+           role_scope(request), marker,
+           sorted(filters.items()),
+           sorted((attr, tuple(values)) for attr, values in exclude.items()),
+           request_size, limit)
+    return catalog_cache.get('images', key, fetch,
+                             manager=lambda: glanceclient(request).images)
 
 
 def image_update(request, image_id, **kwargs):
-    return glanceclient(request).images.update(image_id, **kwargs)
+    image = glanceclient(request).images.update(image_id, **kwargs)
+    catalog_cache.invalidate('images')
+    return image
+
+
+class ImageData(object):
+    """
+    A file-like pipe through which the data of an image received by one
+    thread is streamed to glance, as the body of an image upload request
+    sent by another.
+
+    At most ``max_chunks`` chunks are buffered: the writer blocks while
+    glance reads slower than the data comes in, and thereby stops reading
+    from its own source. Either side gives up with an ``IOError`` once the
+    other has not moved for ``timeout`` seconds. The MD5 checksum of the
+    data is computed as glance reads it.
+    """
+    poll_interval = 0.5
+
+    def __init__(self, max_chunks=16, timeout=60):
+        self.timeout = timeout
+        self.size = 0
+        self.closed = False
+        self._queue = Queue.Queue(max_chunks)
+        self._buffer = ''
+        self._eof = False
+        self._md5 = hashlib.md5()
+
+    @property
+    def checksum(self):
+        return self._md5.hexdigest()
+
+    def write(self, chunk):
+        """ Queues ``chunk``, or the end of the data if it's ``None``. """
+        deadline = time.time() + self.timeout
+        while not self.closed:
+            try:
+                self._queue.put(chunk, timeout=self.poll_interval)
+                return
+            except Queue.Full:
+                if time.time() > deadline:
+                    raise IOError("Timed out waiting for glance to read "
+                                  "the image data.")
+        raise IOError("The image data is no longer being read.")
+
+    def end(self):
+        """ Marks the end of the data, unless it's no longer being read. """
+        if not self.closed:
+            self.write(None)
+
+    def read(self, size=-1):
+        while not self._buffer:
+            if self._eof:
+                return ''
+            try:
+                chunk = self._queue.get(timeout=self.timeout)
+            except Queue.Empty:
+                raise IOError("Timed out waiting for the image data.")
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer = chunk
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self._md5.update(data)
+        self.size += len(data)
+        return data
+
+    def close(self):
+        """ Stops reading, so that the writer doesn't wait any longer. """
+        self.closed = True
 
 
 def image_create(request, **kwargs):
+    """
+    Creates an image. Its data is either read by glance from ``copy_from``
+    after the image has been created, or sent along from ``data``. Data
+    streamed through an :class:`ImageData` pipe is checked against the
+    checksum computed by glance once it has all been sent.
+    """
     copy_from = None
 
     if kwargs.get('copy_from'):
         copy_from = kwargs.pop('copy_from')
 
-    image = glanceclient(request).images.create(**kwargs)
+    data = kwargs.get('data')
+    streamed = isinstance(data, ImageData)
+    try:
+        image = glanceclient(request).images.create(**kwargs)
+    except IOError, e:
+        if not streamed:
+            raise
+        # The data stopped coming in.
+        raise glance_client.exc.HTTPException(str(e))
+    finally:
+        if streamed:
+            data.close()
+    catalog_cache.invalidate('images')
+
+    if streamed and \
+            getattr(image, 'checksum', None) not in (None, data.checksum):
+        LOG.warning('Checksum of image %s is %s, sent %s.'
+                    % (image.id, image.checksum, data.checksum))
+        image_delete(request, image.id)
+        raise glance_client.exc.HTTPException(
+            "The data of image %s was corrupted while it was uploaded."
+            % image.id)
 
     if copy_from:
-        thread.start_new_thread(image_update,
-                                (request, image.id),
-                                {'copy_from': copy_from})
+        # Glance reads the image from copy_from while the request is held
+        # open, which takes as long as the download.
+        job = jobs.Job(image_update, request, image.id, copy_from=copy_from)
+        job.name = "image_copy_from"
+        job.retries = 2
+        try:
+            jobs.submit(request, job)
+        except exceptions.JobQueueFull:
+            image_delete(request, image.id)
+            raise
 
     return image
 
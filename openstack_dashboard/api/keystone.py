@@ -24,6 +24,7 @@ import urlparse
 from pkg_resources import get_distribution
 
 from django.conf import settings
+from django.utils.datastructures import SortedDict
 from django.utils.translation import ugettext_lazy as _
 
 from keystoneclient import service_catalog
@@ -33,12 +34,12 @@ from keystoneclient.v2_0 import tokens
 from openstack_auth.backend import KEYSTONE_CLIENT_ATTR
 
 from horizon import exceptions
+from horizon import instrumentation
 
 from openstack_dashboard.api import base
 
 
 LOG = logging.getLogger(__name__)
-DEFAULT_ROLE = None
 
 
 class Service(base.APIDictWrapper):
@@ -105,6 +106,8 @@ def keystoneclient(request, admin=False):
                                 'OPENSTACK_ENDPOINT_TYPE',
                                 'internalURL')
 
+    instrumentation.mark_client()
+
     # Take care of client connection caching/fetching a new client.
     # Admin vs. non-admin clients are cached separately for token matching.
     cache_attr = "_keystoneclient_admin" if admin else KEYSTONE_CLIENT_ATTR
@@ -133,9 +136,11 @@ def keystoneclient(request, admin=False):
 
 
 def tenant_create(request, tenant_name, description, enabled):
-    return keystoneclient(request, admin=True).tenants.create(tenant_name,
-                                                              description,
-                                                              enabled)
+    tenant = keystoneclient(request, admin=True).tenants.create(tenant_name,
+                                                                description,
+                                                                enabled)
+    base.catalog_cache.invalidate('tenants')
+    return tenant
 
 
 def tenant_get(request, tenant_id, admin=False):
@@ -144,17 +149,32 @@ def tenant_get(request, tenant_id, admin=False):
 
 def tenant_delete(request, tenant_id):
     keystoneclient(request, admin=True).tenants.delete(tenant_id)
+    base.catalog_cache.invalidate('tenants')
 
 
 def tenant_list(request, admin=False):
-    return keystoneclient(request, admin=admin).tenants.list()
+    """
+    Returns the tenants the current user is a member of or, with
+    ``admin=True``, every tenant. The full list is shared through the
+    catalog cache.
+    """
+    client = keystoneclient(request, admin=admin)
+    if not admin:
+        return client.tenants.list()
+    return base.catalog_cache.get('tenants',
+                                  (_get_endpoint_url(request, 'adminURL'),
+                                   base.role_scope(request)),
+                                  lambda: client.tenants.list(),
+                                  manager=lambda: client.tenants)
 
 
 def tenant_update(request, tenant_id, tenant_name, description, enabled):
-    return keystoneclient(request, admin=True).tenants.update(tenant_id,
-                                                              tenant_name,
-                                                              description,
-                                                              enabled)
+    tenant = keystoneclient(request, admin=True).tenants.update(tenant_id,
+                                                                tenant_name,
+                                                                description,
+                                                                enabled)
+    base.catalog_cache.invalidate('tenants')
+    return tenant
 
 
 def token_create_scoped(request, tenant, token):
@@ -187,11 +207,12 @@ def user_list(request, tenant_id=None):
 
 
 def user_create(request, user_id, email, password, tenant_id, enabled):
-    return keystoneclient(request, admin=True).users.create(user_id,
+    user = keystoneclient(request, admin=True).users.create(user_id,
                                                             password,
                                                             email,
                                                             tenant_id,
                                                             enabled)
+    return user
 
 
 def user_delete(request, user_id):
@@ -223,7 +244,12 @@ def user_update_tenant(request, user_id, tenant_id, admin=True):
 
 def role_list(request):
     """ Returns a global list of available roles. """
-    return keystoneclient(request, admin=True).roles.list()
+    client = keystoneclient(request, admin=True)
+    return base.catalog_cache.get('roles',
+                                  (_get_endpoint_url(request, 'adminURL'),
+                                   base.role_scope(request)),
+                                  lambda: client.roles.list(),
+                                  manager=lambda: client.roles)
 
 
 def roles_for_user(request, user, project):
@@ -231,11 +257,27 @@ def roles_for_user(request, user, project):
                                                                     project)
 
 
+def project_role_grants(request, project):
+    """
+    Returns the roles granted on ``project``, as a dict of the sets of role
+    ids of each of its members, by user id, in the order of the members.
+
+    The v2 identity API has no listing of the role assignments of a
+    project, so the roles of each member are fetched concurrently.
+    """
+    members = user_list(request, tenant_id=project)
+    roles = base.RelatedResources(
+        [user.id for user in members],
+        lambda user_id: roles_for_user(request, user_id, project))
+    return SortedDict([(user.id, set(role.id for role in roles[user.id]))
+                       for user in members])
+
+
 def add_tenant_user_role(request, tenant_id, user_id, role_id):
     """ Adds a role for a user on a tenant. """
-    return keystoneclient(request, admin=True).roles.add_user_role(user_id,
-                                                                   role_id,
-                                                                   tenant_id)
+    client = keystoneclient(request, admin=True)
+    role = client.roles.add_user_role(user_id, role_id, tenant_id)
+    return role
 
 
 def remove_tenant_user_role(request, tenant_id, user_id, role_id):
@@ -254,23 +296,20 @@ def remove_tenant_user(request, tenant_id, user_id):
 
 def get_default_role(request):
     """
-    Gets the default role object from Keystone and saves it as a global
-    since this is configured in settings and should not change from request
-    to request. Supports lookup by name or id.
+    Gets the default role object configured in settings from the (cached)
+    list of roles. Supports lookup by name or id.
     """
-    global DEFAULT_ROLE
     default = getattr(settings, "OPENSTACK_KEYSTONE_DEFAULT_ROLE", None)
-    if default and DEFAULT_ROLE is None:
+    if default:
         try:
-            roles = keystoneclient(request, admin=True).roles.list()
+            roles = role_list(request)
         except:
             roles = []
             exceptions.handle(request)
         for role in roles:
             if role.id == default or role.name == default:
-                DEFAULT_ROLE = role
-                break
-    return DEFAULT_ROLE
+                return role
+    return None
 
 
 def list_ec2_credentials(request, user_id):
@@ -16,9 +16,10 @@
 
 from __future__ import absolute_import
 
+from openstack_dashboard.api import base
+from openstack_dashboard.api import quantum
 from openstack_dashboard.api.quantum import QuantumAPIDictWrapper
 from openstack_dashboard.api.quantum import quantumclient
-from openstack_dashboard.api.quantum import subnet_get
 
 
 class Vip(QuantumAPIDictWrapper):
@@ -41,15 +42,24 @@ class Pool(QuantumAPIDictWrapper):
         def __setattr__(self, attr, value):
             self[attr] = value
 
-    def readable(self, request):
+    def readable(self, request, subnets=None, vips=None):
+        """
+        Returns the pool with the CIDR of its subnet and the name of its
+        vip. They are looked up in ``subnets`` and ``vips`` when given,
+        which map ids to subnets and vips (see :func:`pools_readable`),
+        and fetched otherwise.
+        """
         pFormatted = {'id': self.id,
                       'name': self.name,
                       'description': self.description,
                       'protocol': self.protocol}
         try:
             pFormatted['subnet_id'] = self.subnet_id
-            pFormatted['subnet_name'] = subnet_get(
-                request, self.subnet_id).cidr
+            if subnets is None:
+                subnet = quantum.subnet_get(request, self.subnet_id)
+            else:
+                subnet = subnets[self.subnet_id]
+            pFormatted['subnet_name'] = subnet.cidr
         except:
             pFormatted['subnet_id'] = self.subnet_id
             pFormatted['subnet_name'] = self.subnet_id
@@ -57,8 +67,11 @@ class Pool(QuantumAPIDictWrapper):
         if self.vip_id is not None:
             try:
                 pFormatted['vip_id'] = self.vip_id
-                pFormatted['vip_name'] = vip_get(
-                    request, self.vip_id).name
+                if vips is None:
+                    vip = vip_get(request, self.vip_id)
+                else:
+                    vip = vips[self.vip_id]
+                pFormatted['vip_name'] = vip.name
             except:
                 pFormatted['vip_id'] = self.vip_id
                 pFormatted['vip_name'] = self.vip_id
@@ -82,14 +95,22 @@ class Member(QuantumAPIDictWrapper):
         def __setattr__(self, attr, value):
             self[attr] = value
 
-    def readable(self, request):
+    def readable(self, request, pools=None):
+        """
+        Returns the member with the name of its pool. It's looked up in
+        ``pools`` when given, which maps ids to pools (see
+        :func:`members_readable`), and fetched otherwise.
+        """
         mFormatted = {'id': self.id,
                       'address': self.address,
                       'protocol_port': self.protocol_port}
         try:
             mFormatted['pool_id'] = self.pool_id
-            mFormatted['pool_name'] = pool_get(
-                request, self.pool_id).name
+            if pools is None:
+                pool = pool_get(request, self.pool_id)
+            else:
+                pool = pools[self.pool_id]
+            mFormatted['pool_name'] = pool.name
         except:
             mFormatted['pool_id'] = self.pool_id
             mFormatted['pool_name'] = self.pool_id
@@ -189,6 +210,38 @@ def pool_get(request, pool_id):
     return Pool(pool)
 
 
+def _index(request, ids, list_func, get_func):
+    """
+    Returns the resources with the given ids, looked up by id in the result
+    of ``list_func(request)``. Those which aren't listed (or all of them if
+    the listing fails) are fetched one by one with ``get_func``.
+    """
+    try:
+        known = dict((resource.id, resource)
+                     for resource in list_func(request))
+    except:
+        known = {}
+    return base.RelatedResources(ids,
+                                 lambda resource_id: get_func(request,
+                                                              resource_id),
+                                 known=known)
+
+
+def pools_readable(request, pools):
+    """
+    Returns the :meth:`Pool.readable` form of each of ``pools``, looking up
+    their subnets and vips in a single listing of each rather than fetching
+    them for every pool.
+    """
+    subnets = _index(request, [pool.subnet_id for pool in pools],
+                     quantum.subnet_list, quantum.subnet_get)
+    vips = _index(request, [pool.vip_id for pool in pools
+                            if pool.vip_id is not None],
+                  vips_get, vip_get)
+    return [pool.readable(request, subnets=subnets, vips=vips)
+            for pool in pools]
+
+
 def pool_update(request, pool_id, **kwargs):
     pool = quantumclient(request).update_pool(pool_id, kwargs).get('pool')
     return Pool(pool)
@@ -278,6 +331,17 @@ def members_get(request, **kwargs):
     return [Member(m) for m in members]
 
 
+def members_readable(request, members):
+    """
+    Returns the :meth:`Member.readable` form of each of ``members``,
+    looking up their pools in a single listing rather than fetching them
+    for every member.
+    """
+    pools = _index(request, [member.pool_id for member in members],
+                   pools_get, pool_get)
+    return [member.readable(request, pools=pools) for member in members]
+
+
 def member_get(request, member_id):
     member = quantumclient(request).show_member(member_id).get('member')
     return Member(member)
@@ -23,6 +23,8 @@ different dashboard implementations.
 
 import abc
 
+from openstack_dashboard.api.base import invalidate_quota_usages
+
 
 class NetworkClient(object):
     def __init__(self, request):
@@ -146,11 +148,15 @@ def tenant_floating_ip_get(request, floating_ip_id):
 
 
 def tenant_floating_ip_allocate(request, pool=None):
-    return NetworkClient(request).floating_ips.allocate(pool)
+    floating_ip = NetworkClient(request).floating_ips.allocate(pool)
+    invalidate_quota_usages(request)
+    return floating_ip
 
 
 def tenant_floating_ip_release(request, floating_ip_id):
-    return NetworkClient(request).floating_ips.release(floating_ip_id)
+    result = NetworkClient(request).floating_ips.release(floating_ip_id)
+    invalidate_quota_usages(request)
+    return result
 
 
 def floating_ip_associate(request, floating_ip_id, port_id):
@@ -22,9 +22,11 @@
 
 from __future__ import absolute_import
 
+import datetime
 import logging
 
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import ugettext as _
 
 from novaclient.v1_1 import client as nova_client
@@ -33,10 +35,13 @@ from novaclient.v1_1.security_groups import SecurityGroup as NovaSecurityGroup
 from novaclient.v1_1.servers import REBOOT_HARD, REBOOT_SOFT
 
 from horizon.conf import HORIZON_CONFIG
-from horizon.utils.memoized import memoized
+from horizon.utils.memoized import request_memoized
 
 from openstack_dashboard.api.base import (APIResourceWrapper, QuotaSet,
-                                          APIDictWrapper, url_for)
+                                          APIDictWrapper, cached_client,
+                                          url_for, RelatedResources,
+                                          catalog_cache,
+                                          invalidate_quota_usages)
 from openstack_dashboard.api import network
 
 
@@ -251,17 +256,21 @@ class FloatingIpManager(network.FloatingIpManager):
 
 def novaclient(request):
     insecure = getattr(settings, 'OPENSTACK_SSL_NO_VERIFY', False)
-    LOG.debug('novaclient connection created using token "%s" and url "%s"' %
-              (request.user.token.id, url_for(request, 'compute')))
-    c = nova_client.Client(request.user.username,
-                           request.user.token.id,
-                           project_id=request.user.tenant_id,
-                           auth_url=url_for(request, 'compute'),
-                           insecure=insecure,
-                           http_log_debug=settings.DEBUG)
-    c.client.auth_token = request.user.token.id
-    c.client.management_url = url_for(request, 'compute')
-    return c
+    nova_url = url_for(request, 'compute')
+
+    def create_client():
+        LOG.debug('novaclient connection created using token "%s" and url '
+                  '"%s"' % (request.user.token.id, nova_url))
+        c = nova_client.Client(request.user.username,
+                               request.user.token.id,
+                               project_id=request.user.tenant_id,
+                               auth_url=nova_url,
+                               insecure=insecure,
+                               http_log_debug=settings.DEBUG)
+        c.client.auth_token = request.user.token.id
+        c.client.management_url = nova_url
+        return c
+    return cached_client(request, 'compute', nova_url, create_client)
 
 
 def server_vnc_console(request, instance_id, console_type='novnc'):
@@ -279,6 +288,7 @@ def flavor_create(request, name, memory, vcpu, disk, ephemeral=0, swap=0,
     flavor = novaclient(request).flavors.create(name, memory, vcpu, disk,
                                                 ephemeral=ephemeral,
                                                 swap=swap)
+    catalog_cache.invalidate('flavors')
     if (metadata):
         flavor_extra_set(request, flavor.id, metadata)
     return flavor
@@ -286,16 +296,21 @@ def flavor_create(request, name, memory, vcpu, disk, ephemeral=0, swap=0,
 
 def flavor_delete(request, flavor_id):
     novaclient(request).flavors.delete(flavor_id)
+    catalog_cache.invalidate('flavors')
 
 
 def flavor_get(request, flavor_id):
     return novaclient(request).flavors.get(flavor_id)
 
 
-@memoized
+@request_memoized
 def flavor_list(request):
     """Get the list of available instance sizes (flavors)."""
-    return novaclient(request).flavors.list()
+    return catalog_cache.get('flavors',
+                             (url_for(request, 'compute'),
+                              request.user.tenant_id),
+                             lambda: novaclient(request).flavors.list(),
+                             manager=lambda: novaclient(request).flavors)
 
 
 def flavor_get_extras(request, flavor_id, raw=False):
@@ -323,7 +338,10 @@ def flavor_extra_set(request, flavor_id, metadata):
 
 
 def snapshot_create(request, instance_id, name):
-    return novaclient(request).servers.create_image(instance_id, name)
+    snapshot = novaclient(request).servers.create_image(instance_id, name)
+    # Snapshots are images, so the image lists change too.
+    catalog_cache.invalidate('images')
+    return snapshot
 
 
 def keypair_create(request, name):
@@ -345,16 +363,19 @@ def keypair_list(request):
 def server_create(request, name, image, flavor, key_name, user_data,
                   security_groups, block_device_mapping, nics=None,
                   instance_count=1):
-    return Server(novaclient(request).servers.create(
+    server = Server(novaclient(request).servers.create(
             name, image, flavor, userdata=user_data,
             security_groups=security_groups,
             key_name=key_name, block_device_mapping=block_device_mapping,
             nics=nics,
             min_count=instance_count), request)
+    invalidate_quota_usages(request)
+    return server
 
 
 def server_delete(request, instance):
     novaclient(request).servers.delete(instance)
+    invalidate_quota_usages(request)
 
 
 def server_get(request, instance_id):
@@ -465,13 +486,53 @@ def default_quota_get(request, tenant_id):
     return QuotaSet(novaclient(request).quotas.defaults(tenant_id))
 
 
+def _usage_is_closed(end):
+    """
+    Returns whether the usage of a period ending at the naive UTC ``end``
+    is final, which is the case for periods which ended before the current
+    month began.
+    """
+    if not isinstance(end, datetime.datetime):
+        return False
+    now = timezone.make_naive(timezone.now(), timezone.utc)
+    return end <= datetime.datetime(now.year, now.month, 1)
+
+
 def usage_get(request, tenant_id, start, end):
-    return NovaUsage(novaclient(request).usage.get(tenant_id, start, end))
+    manager = lambda: novaclient(request).usage
+    fetch = lambda: manager().get(tenant_id, start, end)
+    if _usage_is_closed(end):
+        # The usage of past months never changes.
+        usage = catalog_cache.get('usage',
+                                  (url_for(request, 'compute'), tenant_id,
+                                   start, end),
+                                  fetch, manager=manager)
+    else:
+        usage = fetch()
+    return NovaUsage(usage)
 
 
 def usage_list(request, start, end):
-    return [NovaUsage(u) for u in
-            novaclient(request).usage.list(start, end, True)]
+    manager = lambda: novaclient(request).usage
+    endpoint = url_for(request, 'compute')
+
+    def fetch():
+        usages = manager().list(start, end, True)
+        if _usage_is_closed(end):
+            # Also cache the usage of each project on its own, for the
+            # project overviews of the same period.
+            for usage in usages:
+                catalog_cache.set('usage',
+                                  (endpoint, usage.tenant_id, start, end),
+                                  usage)
+        return usages
+
+    if _usage_is_closed(end):
+        usages = catalog_cache.get('usage', (endpoint, None, start, end),
+                                   fetch, manager=manager)
+    else:
+        usages = fetch()
+    return [NovaUsage(u) for u in usages]
 
 
 def security_group_list(request):
@@ -536,9 +597,11 @@ def instance_volumes_list(request, instance_id):
 
     volumes = novaclient(request).volumes.get_server_volumes(instance_id)
 
+    volumes_data = RelatedResources(
+        [volume.id for volume in volumes],
+        lambda volume_id: cinderclient(request).volumes.get(volume_id))
     for volume in volumes:
-        volume_data = cinderclient(request).volumes.get(volume.id)
-        volume.name = volume_data.display_name
+        volume.name = volumes_data[volume.id].display_name
 
     return volumes
 
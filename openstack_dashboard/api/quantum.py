@@ -28,7 +28,8 @@ from django.utils.datastructures import SortedDict
 
 from horizon.conf import HORIZON_CONFIG
 
-from openstack_dashboard.api.base import APIDictWrapper, url_for
+from openstack_dashboard.api.base import (APIDictWrapper, cached_client,
+                                          url_for, catalog_cache)
 from openstack_dashboard.api import network
 from openstack_dashboard.api import nova
 
@@ -118,8 +119,10 @@ class FloatingIpManager(network.FloatingIpManager):
 
     def list_pools(self):
         search_opts = {'router:external': True}
-        return [FloatingIpPool(pool) for pool
-                in self.client.list_networks(**search_opts).get('networks')]
+        pools = catalog_cache.get(
+            'external_networks', (url_for(self.request, 'network'),),
+            lambda: self.client.list_networks(**search_opts).get('networks'))
+        return [FloatingIpPool(pool) for pool in pools]
 
     def list(self):
         fips = self.client.list_floatingips().get('floatingips')
@@ -211,13 +214,16 @@ def get_ipver_str(ip_version):
 
 
 def quantumclient(request):
-    LOG.debug('quantumclient connection created using token "%s" and url "%s"'
-              % (request.user.token.id, url_for(request, 'network')))
-    LOG.debug('user_id=%(user)s, tenant_id=%(tenant)s' %
-              {'user': request.user.id, 'tenant': request.user.tenant_id})
-    c = quantum_client.Client(token=request.user.token.id,
-                              endpoint_url=url_for(request, 'network'))
-    return c
+    quantum_url = url_for(request, 'network')
+
+    def create_client():
+        LOG.debug('quantumclient connection created using token "%s" and url '
+                  '"%s"' % (request.user.token.id, quantum_url))
+        LOG.debug('user_id=%(user)s, tenant_id=%(tenant)s' %
+                  {'user': request.user.id, 'tenant': request.user.tenant_id})
+        return quantum_client.Client(token=request.user.token.id,
+                                     endpoint_url=quantum_url)
+    return cached_client(request, 'network', quantum_url, create_client)
 
 
 def network_list(request, **params):
@@ -277,6 +283,7 @@ def network_create(request, **kwargs):
     LOG.debug("network_create(): kwargs = %s" % kwargs)
     body = {'network': kwargs}
     network = quantumclient(request).create_network(body=body).get('network')
+    catalog_cache.invalidate('external_networks')
     return Network(network)
 
 
@@ -285,12 +292,14 @@ def network_modify(request, network_id, **kwargs):
     body = {'network': kwargs}
     network = quantumclient(request).update_network(network_id,
                                                     body=body).get('network')
+    catalog_cache.invalidate('external_networks')
     return Network(network)
 
 
 def network_delete(request, network_id):
     LOG.debug("network_delete(): netid=%s" % network_id)
     quantumclient(request).delete_network(network_id)
+    catalog_cache.invalidate('external_networks')
 
 
 def subnet_list(request, **params):
@@ -18,7 +18,17 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
+import heapq
+import inspect
+import itertools
 import logging
+import Queue
+import re
+import sys
+import threading
+import urllib
+import uuid
 
 import swiftclient
 
@@ -26,11 +36,19 @@ from django.conf import settings
 
 from horizon import exceptions
 
-from openstack_dashboard.api.base import url_for, APIDictWrapper
+from openstack_dashboard.api.base import (APIDictWrapper, cached_client,
+                                          url_for)
 
 
 LOG = logging.getLogger(__name__)
 FOLDER_DELIMITER = "/"
+# Older swiftclient releases can't send request headers with a GET, in which
+# case ranged downloads fall back to fetching the whole object.
+SUPPORTS_RANGE_REQUESTS = 'headers' in inspect.getargspec(
+    swiftclient.client.Connection.get_object).args
+# Segments of large objects go in a container named after the object's
+# container with this suffix, as the swift command line client does.
+SEGMENT_CONTAINER_SUFFIX = "_segments"
 
 
 class Container(APIDictWrapper):
@@ -87,16 +105,27 @@ def _objectify(items, container_name):
     return objects
 
 
-def swift_api(request):
+def swift_api(request, cached=True):
+    """
+    Returns a swift connection for the current user. Pass ``cached=False``
+    for a connection of its own which isn't reused by later calls, e.g.
+    one whose response is read after the view has returned.
+    """
     endpoint = url_for(request, 'object-store')
-    LOG.debug('Swift connection created using token "%s" and url "%s"'
-              % (request.user.token.id, endpoint))
-    return swiftclient.client.Connection(None,
-                                         request.user.username,
-                                         None,
-                                         preauthtoken=request.user.token.id,
-                                         preauthurl=endpoint,
-                                         auth_version="2.0")
+
+    def create_client():
+        LOG.debug('Swift connection created using token "%s" and url "%s"'
+                  % (request.user.token.id, endpoint))
+        return swiftclient.client.Connection(
+            None,
+            request.user.username,
+            None,
+            preauthtoken=request.user.token.id,
+            preauthurl=endpoint,
+            auth_version="2.0")
+    if not cached:
+        return create_client()
+    return cached_client(request, 'object-store', endpoint, create_client)
 
 
 def swift_container_exists(request, container_name):
@@ -157,39 +186,120 @@ def swift_get_objects(request, container_name, prefix=None, marker=None,
         return (object_objs, False)
 
 
+class ObjectFilter(object):
+    """
+    A compiled, case-insensitive object name filter.
+
+    The filter string is split on whitespace into terms, all of which a
+    name must match. A term without wildcards matches names containing it,
+    while a term with ``*`` wildcards must match the whole name, so ``img*``
+    matches names starting with "img" and ``*.jpg`` names ending in ".jpg".
+    """
+    # Limits the case variants of the prefix to scan to 2 ** 3.
+    max_cased_prefix_chars = 3
+
+    def __init__(self, filter_string):
+        lookaheads = []
+        self.prefix = ''
+        for term in filter_string.lower().split():
+            if '*' in term:
+                parts = term.split('*')
+                lookaheads.append('(?=%s$)' % '.*'.join(map(re.escape,
+                                                            parts)))
+                if len(parts[0]) > len(self.prefix):
+                    self.prefix = parts[0]
+            else:
+                lookaheads.append('(?=.*%s)' % re.escape(term))
+        self.regex = re.compile(''.join(lookaheads), re.DOTALL | re.UNICODE)
+
+    def matches(self, name):
+        return self.regex.match(name.lower()) is not None
+
+    def prefixes(self):
+        """
+        Returns the (case-sensitive) name prefixes which together cover
+        every name starting with the filter's (case-insensitive) prefix.
+        """
+        choices = []
+        cased = 0
+        for char in self.prefix:
+            if ord(char) > 127 or (char.isalpha() and
+                                   cased == self.max_cased_prefix_chars):
+                break
+            if char.isalpha():
+                cased += 1
+                choices.append((char, char.upper()))
+            else:
+                choices.append((char,))
+        return [''.join(chars) for chars in itertools.product(*choices)]
+
+
+def _skip_folder(marker):
+    """
+    Returns a listing marker which skips the contents of the pseudo-folder
+    ``marker`` names, if it names one. Swift would otherwise roll the
+    folder's remaining objects up into the same pseudo-folder again.
+    """
+    if marker and marker.endswith(FOLDER_DELIMITER):
+        return marker[:-1] + chr(ord(FOLDER_DELIMITER) + 1)
+    return marker
+
+
+def _iter_listing(connection, container_name, prefix, marker, page_size):
+    """
+    Lazily yields ``(name, item)`` pairs for a container listing, fetching
+    a page at a time.
+    """
+    while True:
+        headers, items = connection.get_container(container_name,
+                                                  prefix=prefix,
+                                                  marker=_skip_folder(marker),
+                                                  limit=page_size,
+                                                  delimiter=FOLDER_DELIMITER)
+        for item in items:
+            marker = item.get('subdir', None) or item['name']
+            yield marker, item
+        if len(items) < page_size:
+            return
+
+
 def swift_filter_objects(request, filter_string, container_name, prefix=None,
-                         marker=None):
-    # FIXME(kewu): Swift currently has no real filtering API, thus the marker
-    # parameter here won't actually help the pagination. For now I am just
-    # getting the largest number of objects from a container and filtering
-    # based on those objects.
-    limit = 9999
-    objects = swift_get_objects(request,
-                                container_name,
-                                prefix=prefix,
-                                marker=marker,
-                                limit=limit)
-    filter_string_list = filter_string.lower().strip().split(' ')
-
-    def matches_filter(obj):
-        for q in filter_string_list:
-            return wildcard_search(obj.name.lower(), q)
-
-    return filter(matches_filter, objects[0])
-
-
-def wildcard_search(string, q):
-    q_list = q.split('*')
-    if all(map(lambda x: x == '', q_list)):
-        return True
-    elif q_list[0] not in string:
-        return False
-    else:
-        if q_list[0] == '':
-            tail = string
-        else:
-            head, delimiter, tail = string.partition(q_list[0])
-        return wildcard_search(tail, '*'.join(q_list[1:]))
+                         marker=None, limit=None):
+    """
+    Returns the objects and pseudo-folders in the ``prefix`` pseudo-folder
+    whose names (relative to that folder) match ``filter_string`` (see
+    :class:`ObjectFilter`), as a ``(objects, has_more, marker)`` tuple.
+
+    Wildcard terms anchored at the start of the name are turned into prefix
+    scans, and the listing is only read as far as needed to find ``limit``
+    matches, reading at most ``SWIFT_FILTER_SCAN_LIMIT`` names. If there may
+    be more matches, ``marker`` is where to continue from.
+    """
+    limit = limit or getattr(settings, 'API_RESULT_LIMIT', 1000)
+    scan_limit = getattr(settings, 'SWIFT_FILTER_SCAN_LIMIT', 10000)
+    page_size = min(limit + 1, scan_limit)
+    prefix = prefix or ''
+    object_filter = ObjectFilter(filter_string)
+    connection = swift_api(request)
+    # The listings for each prefix are disjoint and sorted, so merging them
+    # yields every candidate in name order.
+    candidates = heapq.merge(*[_iter_listing(connection,
+                                             container_name,
+                                             prefix + name_prefix,
+                                             marker,
+                                             page_size)
+                               for name_prefix in object_filter.prefixes()])
+    matches = []
+    for scanned, (name, item) in enumerate(candidates, 1):
+        relative_name = name[len(prefix):].rstrip(FOLDER_DELIMITER)
+        if object_filter.matches(relative_name):
+            if len(matches) == limit:
+                return (_objectify(matches, container_name), True, marker)
+            matches.append(item)
+        marker = name
+        if scanned >= scan_limit:
+            return (_objectify(matches, container_name), True, marker)
+    return (_objectify(matches, container_name), False, None)
 
 
 def swift_copy_object(request, orig_container_name, orig_object_name,
@@ -205,14 +315,199 @@ def swift_copy_object(request, orig_container_name, orig_object_name,
                                          headers=headers)
 
 
+def segmented_upload_threshold():
+    """
+    Returns the size above which objects are uploaded in segments, or
+    ``None`` if they never are.
+    """
+    return getattr(settings, 'SWIFT_SEGMENTED_UPLOAD_THRESHOLD', 1024 ** 3)
+
+
+class _Pipe(object):
+    """
+    A file-like object whose reads return the data written to it from
+    another thread. Writes block while ``max_chunks`` chunks are waiting to
+    be read, which bounds the memory it uses.
+    """
+    def __init__(self, max_chunks=16):
+        self.queue = Queue.Queue(max_chunks)
+        self.buffer = ''
+        self.eof = False
+
+    def write(self, data):
+        self.queue.put(data)
+
+    def close(self):
+        self.queue.put(None)
+
+    def read(self, size=-1):
+        while not self.eof and (size < 0 or len(self.buffer) < size):
+            data = self.queue.get()
+            if data is None:
+                self.eof = True
+            else:
+                self.buffer += data
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def drain(self):
+        """ Discards everything written to the pipe until it's closed. """
+        while not self.eof:
+            self.buffer = ''
+            self.read(65536)
+
+
+class _Segment(object):
+    """ A single segment of a :class:`SegmentedUpload`. """
+    def __init__(self, upload, index):
+        self.upload = upload
+        self.name = '%s/%08d' % (upload.prefix, index)
+        self.size = 0
+        self.md5 = hashlib.md5()
+        self.pipe = _Pipe()
+        self.thread = threading.Thread(target=self.run,
+                                       name="swift-segment-%s" % self.name)
+        self.thread.daemon = True
+
+    def write(self, data):
+        self.md5.update(data)
+        self.size += len(data)
+        self.pipe.write(data)
+
+    def run(self):
+        try:
+            # A connection of its own, since segments upload in parallel.
+            connection = swift_api(self.upload.request, cached=False)
+            etag = connection.put_object(self.upload.container,
+                                         self.name,
+                                         self.pipe,
+                                         chunk_size=self.upload.chunk_size)
+            if etag != self.md5.hexdigest():
+                raise swiftclient.client.ClientException(
+                    'Segment %s was corrupted in transit.' % self.name)
+        except:
+            self.upload.errors.append(sys.exc_info())
+        finally:
+            # Keep reading if the upload failed so the writer can't block.
+            self.pipe.drain()
+            self.upload.slots.release()
+
+
+class SegmentedUpload(object):
+    """
+    Uploads the data written to it to swift as it's written, as a series of
+    segments of at most ``SWIFT_SEGMENT_SIZE`` bytes which are combined into
+    a single (dynamic large) object by :func:`swift_upload_object`. This
+    both avoids buffering the data and lifts swift's limit on the size of
+    a single object.
+
+    The segments are stored in ``<container_name>_segments`` and up to
+    ``SWIFT_SEGMENT_UPLOAD_CONCURRENCY`` of them are uploaded at once. Call
+    :meth:`close` once all the data has been written, or :meth:`abort` to
+    give up and delete the segments uploaded so far.
+    """
+    def __init__(self, request, container_name):
+        self.request = request
+        self.container = container_name + SEGMENT_CONTAINER_SUFFIX
+        self.prefix = uuid.uuid4().hex
+        self.segment_size = getattr(settings, 'SWIFT_SEGMENT_SIZE',
+                                    512 * 1024 ** 2)
+        self.chunk_size = getattr(settings, 'SWIFT_FILE_TRANSFER_CHUNK_SIZE',
+                                  512 * 1024)
+        self.slots = threading.Semaphore(
+            getattr(settings, 'SWIFT_SEGMENT_UPLOAD_CONCURRENCY', 4))
+        self.segments = []
+        self.errors = []
+        self.size = 0
+        swift_api(request).put_container(self.container)
+
+    @property
+    def manifest(self):
+        """ The ``X-Object-Manifest`` header value for the segments. """
+        return '%s/%s/' % (urllib.quote(self.container.encode('utf-8')),
+                           urllib.quote(self.prefix))
+
+    def _raise_errors(self):
+        if self.errors:
+            exc_type, exc_value, exc_traceback = self.errors[0]
+            raise exc_type, exc_value, exc_traceback
+
+    def _next_segment(self):
+        if self.segments:
+            self.segments[-1].pipe.close()
+        self.slots.acquire()
+        segment = _Segment(self, len(self.segments))
+        self.segments.append(segment)
+        segment.thread.start()
+        return segment
+
+    def write(self, data):
+        while data:
+            self._raise_errors()
+            segment = self.segments[-1] if self.segments else None
+            if segment is None or segment.size >= self.segment_size:
+                segment = self._next_segment()
+            room = self.segment_size - segment.size
+            segment.write(data[:room])
+            self.size += len(data[:room])
+            data = data[room:]
+
+    def _finish(self):
+        if self.segments:
+            self.segments[-1].pipe.close()
+        for segment in self.segments:
+            segment.thread.join()
+
+    def close(self):
+        """ Waits for every segment to be uploaded. """
+        self._finish()
+        self._raise_errors()
+
+    def abort(self):
+        self._finish()
+        connection = swift_api(self.request)
+        for segment in self.segments:
+            try:
+                connection.delete_object(self.container, segment.name)
+            except:
+                LOG.exception('Unable to delete segment "%s".' % segment.name)
+
+
 def swift_upload_object(request, container_name, object_name, object_file):
+    """
+    Uploads ``object_file`` as ``object_name``. Files larger than
+    ``SWIFT_SEGMENTED_UPLOAD_THRESHOLD`` are uploaded in segments (see
+    :class:`SegmentedUpload`), as are files whose ``segments`` attribute
+    holds a :class:`SegmentedUpload` they have already been streamed to.
+    """
     headers = {}
     headers['X-Object-Meta-Orig-Filename'] = object_file.name
+    segments = getattr(object_file, 'segments', None)
+    threshold = segmented_upload_threshold()
+    if segments is None and threshold is not None and \
+            object_file.size > threshold:
+        segments = SegmentedUpload(request, container_name)
+        try:
+            for chunk in iter(lambda: object_file.read(segments.chunk_size),
+                              ''):
+                segments.write(chunk)
+            segments.close()
+        except:
+            segments.abort()
+            raise
+
+    size = object_file.size
+    if segments is not None:
+        # The object itself is just a manifest pointing at the segments.
+        headers['X-Object-Manifest'] = segments.manifest
+        object_file = None
     etag = swift_api(request).put_object(container_name,
                                          object_name,
                                          object_file,
                                          headers=headers)
-    obj_info = {'name': object_name, 'bytes': object_file.size, 'etag': etag}
+    obj_info = {'name': object_name, 'bytes': size, 'etag': etag}
     return StorageObject(obj_info, container_name)
 
 
@@ -221,10 +516,35 @@ def swift_delete_object(request, container_name, object_name):
     return True
 
 
-def swift_get_object(request, container_name, object_name):
-    headers, data = swift_api(request).get_object(container_name, object_name)
+def swift_get_object(request, container_name, object_name,
+                     resp_chunk_size=None, byte_range=None):
+    """
+    Returns the object with its contents in ``data``.
+
+    If ``resp_chunk_size`` is given the contents aren't read up front;
+    ``data`` is instead an iterator yielding chunks of that size, read from
+    a connection of its own as it's consumed. ``byte_range`` is the value of
+    an HTTP ``Range`` header to pass on to swift, in which case the returned
+    object's ``content_range`` is set if swift honoured it.
+    """
+    kwargs = {}
+    if byte_range and SUPPORTS_RANGE_REQUESTS:
+        kwargs['headers'] = {'Range': byte_range}
+    if resp_chunk_size:
+        kwargs['resp_chunk_size'] = resp_chunk_size
+        connection = swift_api(request, cached=False)
+    else:
+        connection = swift_api(request)
+    headers, data = connection.get_object(container_name, object_name,
+                                          **kwargs)
     orig_name = headers.get("x-object-meta-orig-filename")
-    obj_info = {'name': object_name, 'bytes': len(data)}
+    if 'content-length' in headers:
+        size = int(headers['content-length'])
+    else:
+        size = len(data)
+    obj_info = {'name': object_name,
+                'bytes': size,
+                'content_range': headers.get('content-range')}
     return StorageObject(obj_info,
                          container_name,
                          orig_name=orig_name,
@@ -17,9 +17,11 @@
 
 import logging
 
+from django.conf import settings
 from django.template.defaultfilters import title
 from django.utils.translation import ugettext_lazy as _
 
+from horizon import exceptions
 from horizon import tables
 from horizon.utils.filters import replace_underscores
 
@@ -55,7 +57,15 @@ class MigrateInstance(tables.BatchAction):
         api.nova.server_migrate(request, obj_id)
 
 
+class AdminInstanceFilterAction(tables.FilterAction):
+    """ Filters instances by name. The filtering is done by nova. """
+
+
 class AdminUpdateRow(UpdateRow):
+    def get_event_channel(self):
+        # Follow the changes to the instances of every project.
+        return self.event_channel
+
     def get_data(self, request, instance_id):
         instance = super(AdminUpdateRow, self).get_data(request, instance_id)
         tenant = api.keystone.tenant_get(request,
@@ -64,6 +74,26 @@ class AdminUpdateRow(UpdateRow):
         instance.tenant_name = getattr(tenant, "name", None)
         return instance
 
+    def get_bulk_data(self, request, instance_ids):
+        # Listing every instance in the cloud would cost more than fetching
+        # the few which are changing state.
+        instances = self.load_instances(request, instance_ids, {})
+        tenants = dict([(tenant.id, tenant) for tenant
+                        in api.keystone.tenant_list(request, admin=True)])
+        tenants = api.base.RelatedResources(
+            [instance.tenant_id for instance in instances],
+            lambda tenant_id: api.keystone.tenant_get(request, tenant_id,
+                                                      admin=True),
+            known=tenants)
+        for instance in instances:
+            try:
+                tenant = tenants[instance.tenant_id]
+            except:
+                tenant = None
+                exceptions.handle(request, ignore=True)
+            instance.tenant_name = getattr(tenant, "name", None)
+        return instances
+
 
 class AdminInstancesTable(tables.DataTable):
     TASK_STATUS_CHOICES = (
@@ -114,8 +144,12 @@ class AdminInstancesTable(tables.DataTable):
         name = "instances"
         verbose_name = _("Instances")
         status_columns = ["status", "task"]
-        table_actions = (TerminateInstance,)
+        table_actions = (AdminInstanceFilterAction, TerminateInstance)
         row_class = AdminUpdateRow
+        server_side_filter = True
+        # Below nova's osapi_max_limit, so that the extra instance the view
+        # asks for to detect a next page can be returned.
+        page_size = getattr(settings, 'API_RESULT_PAGE_SIZE', 20)
         row_actions = (ConfirmResize, RevertResize, AdminEditInstance,
                        ConsoleLink, LogLink, CreateSnapshot, TogglePause,
                        ToggleSuspend, MigrateInstance, SoftRebootInstance,
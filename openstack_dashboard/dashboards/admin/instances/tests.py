@@ -16,16 +16,22 @@
 
 import uuid
 
+from django.conf import settings
 from django import http
 from django.core.urlresolvers import reverse
 from django.utils.datastructures import SortedDict
 
 from mox import IsA
+from novaclient.v1_1 import servers as novaservers
 
 from openstack_dashboard import api
 from openstack_dashboard.test import helpers as test
 
 
+PAGE_SIZE = getattr(settings, 'API_RESULT_PAGE_SIZE', 20)
+SEARCH_OPTS = {'limit': PAGE_SIZE + 1}
+
+
 class InstanceViewTest(test.BaseAdminViewTests):
     @test.create_stubs({api.nova: ('flavor_list', 'server_list',),
                         api.keystone: ('tenant_list',)})
@@ -36,6 +42,7 @@ class InstanceViewTest(test.BaseAdminViewTests):
         api.keystone.tenant_list(IsA(http.HttpRequest), admin=True).\
                                  AndReturn(tenants)
         api.nova.server_list(IsA(http.HttpRequest),
+                             search_opts=SEARCH_OPTS,
                              all_tenants=True).AndReturn(servers)
         api.nova.flavor_list(IsA(http.HttpRequest)).AndReturn(flavors)
         self.mox.ReplayAll()
@@ -55,14 +62,17 @@ class InstanceViewTest(test.BaseAdminViewTests):
         full_flavors = SortedDict([(f.id, f) for f in flavors])
 
         api.nova.server_list(IsA(http.HttpRequest),
+                             search_opts=SEARCH_OPTS,
                              all_tenants=True).AndReturn(servers)
         api.nova.flavor_list(IsA(http.HttpRequest)). \
                             AndRaise(self.exceptions.nova)
         api.keystone.tenant_list(IsA(http.HttpRequest), admin=True).\
                                  AndReturn(tenants)
-        for server in servers:
-            api.nova.flavor_get(IsA(http.HttpRequest), server.flavor["id"]). \
-                                AndReturn(full_flavors[server.flavor["id"]])
+        # Each flavor is fetched once, however many servers use it.
+        flavor_ids = SortedDict([(s.flavor["id"], s) for s in servers])
+        for flavor_id in flavor_ids:
+            api.nova.flavor_get(IsA(http.HttpRequest), flavor_id). \
+                                AndReturn(full_flavors[flavor_id])
 
         self.mox.ReplayAll()
 
@@ -84,6 +94,7 @@ class InstanceViewTest(test.BaseAdminViewTests):
             server.flavor['id'] = str(uuid.UUID(int=i))
 
         api.nova.server_list(IsA(http.HttpRequest),
+                             search_opts=SEARCH_OPTS,
                              all_tenants=True).AndReturn(servers)
         api.nova.flavor_list(IsA(http.HttpRequest)). \
                             AndReturn(flavors)
@@ -100,9 +111,85 @@ class InstanceViewTest(test.BaseAdminViewTests):
         self.assertMessageCount(res, error=len(servers))
         self.assertItemsEqual(instances, servers)
 
+    @test.create_stubs({api.nova: ('flavor_list', 'server_list',),
+                        api.keystone: ('tenant_list',)})
+    def test_index_filtered_page(self):
+        servers = self.servers.list()
+        page_size = len(servers) - 1
+        search_opts = {'limit': page_size + 1,
+                       'marker': 'previous',
+                       'name': 'server\\.1'}
+        api.nova.server_list(IsA(http.HttpRequest),
+                             search_opts=search_opts,
+                             all_tenants=True).AndReturn(servers)
+        api.nova.flavor_list(IsA(http.HttpRequest)) \
+            .AndReturn(self.flavors.list())
+        api.keystone.tenant_list(IsA(http.HttpRequest), admin=True) \
+            .AndReturn(self.tenants.list())
+        self.mox.ReplayAll()
+
+        res = self.client.get(reverse('horizon:admin:instances:index'),
+                              {'instances__filter__q': 'server.1',
+                               'instances__page_size': page_size,
+                               'marker': 'previous'})
+        self.assertTemplateUsed(res, 'admin/instances/index.html')
+        table = res.context['table']
+        # The filter is applied by nova, not again by the table.
+        self.assertItemsEqual(table.filtered_data, servers[:-1])
+        self.assertTrue(table.has_more_data())
+        # The next page keeps the filter and page size.
+        self.assertEqual(table.get_pagination_string(),
+                         'instances__filter__q=server.1&'
+                         'instances__page_size=%s&marker=%s'
+                         % (page_size, servers[-2].id))
+
+    @test.create_stubs({api.nova: ('flavor_list', 'server_list',),
+                        api.keystone: ('tenant_list',)})
+    def test_index_next_page(self):
+        server = self.servers.first()
+        servers = [novaservers.Server(novaservers.ServerManager(None),
+                                      dict(server._info, id=str(index)))
+                   for index in range(PAGE_SIZE + 1)]
+        api.nova.server_list(IsA(http.HttpRequest),
+                             search_opts=SEARCH_OPTS,
+                             all_tenants=True).AndReturn(servers)
+        api.nova.flavor_list(IsA(http.HttpRequest)) \
+            .AndReturn(self.flavors.list())
+        api.keystone.tenant_list(IsA(http.HttpRequest), admin=True) \
+            .AndReturn(self.tenants.list())
+        self.mox.ReplayAll()
+
+        res = self.client.get(reverse('horizon:admin:instances:index'))
+        table = res.context['table']
+        self.assertEqual(len(table.data), PAGE_SIZE)
+        self.assertTrue(table.has_more_data())
+        self.assertContains(res, 'href="?marker=%s"' % servers[-2].id)
+
+    @test.create_stubs({api.nova: ('flavor_list', 'server_list',),
+                        api.keystone: ('tenant_list',)})
+    def test_index_last_page_full(self):
+        servers = self.servers.list()
+        page_size = len(servers)
+        api.nova.server_list(IsA(http.HttpRequest),
+                             search_opts={'limit': page_size + 1},
+                             all_tenants=True).AndReturn(servers)
+        api.nova.flavor_list(IsA(http.HttpRequest)) \
+            .AndReturn(self.flavors.list())
+        api.keystone.tenant_list(IsA(http.HttpRequest), admin=True) \
+            .AndReturn(self.tenants.list())
+        self.mox.ReplayAll()
+
+        res = self.client.get(reverse('horizon:admin:instances:index'),
+                              {'instances__page_size': page_size})
+        table = res.context['table']
+        self.assertItemsEqual(table.filtered_data, servers)
+        # A page that is exactly full has no next page.
+        self.assertFalse(table.has_more_data())
+
     @test.create_stubs({api.nova: ('server_list',)})
     def test_index_server_list_exception(self):
         api.nova.server_list(IsA(http.HttpRequest),
+                             search_opts=SEARCH_OPTS,
                              all_tenants=True).AndRaise(self.exceptions.nova)
 
         self.mox.ReplayAll()
@@ -147,6 +234,7 @@ class InstanceViewTest(test.BaseAdminViewTests):
         api.keystone.tenant_list(IsA(http.HttpRequest), admin=True).\
                                  AndReturn(self.tenants.list())
         api.nova.server_list(IsA(http.HttpRequest),
+                             search_opts=SEARCH_OPTS,
                              all_tenants=True).AndReturn(self.servers.list())
         api.nova.flavor_list(IsA(http.HttpRequest)).\
                              AndReturn(self.flavors.list())
@@ -165,6 +253,7 @@ class InstanceViewTest(test.BaseAdminViewTests):
         api.keystone.tenant_list(IsA(http.HttpRequest), admin=True).\
                                  AndReturn(self.tenants.list())
         api.nova.server_list(IsA(http.HttpRequest),
+                             search_opts=SEARCH_OPTS,
                              all_tenants=True).AndReturn(self.servers.list())
         api.nova.flavor_list(IsA(http.HttpRequest)).\
                              AndReturn(self.flavors.list())
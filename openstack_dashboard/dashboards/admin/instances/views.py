@@ -20,6 +20,7 @@
 #    under the License.
 
 import logging
+import re
 
 from django.utils.datastructures import SortedDict
 from django.utils.translation import ugettext_lazy as _
@@ -46,13 +47,26 @@ class AdminIndexView(tables.DataTableView):
     table_class = AdminInstancesTable
     template_name = 'admin/instances/index.html'
 
-    def get_data(self):
+    def get_data(self, query):
         instances = []
+        # One more instance than fits on the page tells us whether there's
+        # another page.
+        search_opts = {'limit': query.page_size + 1}
+        if query.marker:
+            search_opts['marker'] = query.marker
+        if query.filter_string:
+            # Nova matches names against a regular expression.
+            search_opts['name'] = re.escape(query.filter_string)
         try:
-            instances = api.nova.server_list(self.request, all_tenants=True)
+            instances = api.nova.server_list(self.request,
+                                             search_opts=search_opts,
+                                             all_tenants=True)
         except:
             exceptions.handle(self.request,
                               _('Unable to retrieve instance list.'))
+        if len(instances) > query.page_size:
+            instances = instances[:query.page_size]
+            query.has_more = True
         if instances:
             # Gather our flavors to correlate against IDs
             try:
@@ -70,18 +84,19 @@ class AdminIndexView(tables.DataTableView):
                 exceptions.handle(self.request, msg)
 
             full_flavors = SortedDict([(f.id, f) for f in flavors])
+            # Flavors missing from the list (e.g. deleted ones) are fetched
+            # via nova api, once per flavor rather than once per instance.
+            full_flavors = api.base.RelatedResources(
+                [inst.flavor["id"] for inst in instances],
+                lambda flavor_id: api.nova.flavor_get(self.request,
+                                                      flavor_id),
+                known=full_flavors)
             tenant_dict = SortedDict([(t.id, t) for t in tenants])
             # Loop through instances to get flavor and tenant info.
             for inst in instances:
                 flavor_id = inst.flavor["id"]
                 try:
-                    if flavor_id in full_flavors:
-                        inst.full_flavor = full_flavors[flavor_id]
-                    else:
-                        # If the flavor_id is not in full_flavors list,
-                        # gets it via nova api.
-                        inst.full_flavor = api.nova.flavor_get(
-                                            self.request, flavor_id)
+                    inst.full_flavor = full_flavors[flavor_id]
                 except:
                     msg = _('Unable to retrieve instance size information.')
                     exceptions.handle(self.request, msg)
@@ -22,15 +22,29 @@ from django.conf import settings
 from django.utils.translation import ugettext as _
 
 from horizon import exceptions
+from horizon.utils import csvbase
 
 from openstack_dashboard import api
 from openstack_dashboard import usage
 
 
+class GlobalUsageCsvRenderer(csvbase.BaseCsvResponse):
+    columns = ('Tenant', 'VCPUs', 'RamMB', 'DiskGB', 'Usage(Hours)')
+
+    def get_row_data(self):
+        for u in self.context['usage'].usage_list:
+            yield (u.tenant_id,
+                   u.vcpus,
+                   u.memory_mb,
+                   u.local_gb,
+                   '%.2f' % u.vcpu_hours)
+
+
 class GlobalOverview(usage.UsageView):
     table_class = usage.GlobalUsageTable
     usage_class = usage.GlobalUsage
     template_name = 'admin/overview/usage.html'
+    csv_response_class = GlobalUsageCsvRenderer
 
     def get_context_data(self, **kwargs):
         context = super(GlobalOverview, self).get_context_data(**kwargs)
@@ -46,10 +60,8 @@ class GlobalOverview(usage.UsageView):
             tenants = []
             exceptions.handle(self.request,
                               _('Unable to retrieve project list.'))
+        tenant_dict = dict((t.id, t) for t in tenants)
         for instance in data:
-            tenant = filter(lambda t: t.id == instance.tenant_id, tenants)
-            if tenant:
-                instance.tenant_name = getattr(tenant[0], "name", None)
-            else:
-                instance.tenant_name = None
+            tenant = tenant_dict.get(instance.tenant_id)
+            instance.tenant_name = getattr(tenant, "name", None)
         return data
@@ -18,6 +18,7 @@ import logging
 
 from django import http
 from django.core.urlresolvers import reverse
+from django.utils.datastructures import SortedDict
 
 from mox import IsA
 
@@ -407,8 +408,12 @@ class UpdateProjectWorkflowTests(test.BaseAdminViewTests):
             quota_data[field] = int(quota.get(field).limit)
         return quota_data
 
+    def _get_role_grants(self, users, roles):
+        return SortedDict([(user.id, set(role.id for role in roles))
+                           for user in users])
+
     @test.create_stubs({api.keystone: ('get_default_role',
-                                       'roles_for_user',
+                                       'project_role_grants',
                                        'tenant_get',
                                        'user_list',
                                        'role_list'),
@@ -432,10 +437,9 @@ class UpdateProjectWorkflowTests(test.BaseAdminViewTests):
         api.keystone.user_list(IsA(http.HttpRequest)).AndReturn(users)
         api.keystone.role_list(IsA(http.HttpRequest)).AndReturn(roles)
 
-        for user in users:
-            api.keystone.roles_for_user(IsA(http.HttpRequest),
-                                        user.id,
-                                        self.tenant.id).AndReturn(roles)
+        api.keystone.project_role_grants(IsA(http.HttpRequest),
+                                         self.tenant.id) \
+            .AndReturn(self._get_role_grants(users, roles))
 
         self.mox.ReplayAll()
 
@@ -460,10 +464,19 @@ class UpdateProjectWorkflowTests(test.BaseAdminViewTests):
                              '<UpdateProjectMembers: update_members>',
                              '<UpdateProjectQuota: update_quotas>'])
 
+        step = workflow.get_step("update_members")
+        user_ids = [user.id for user in users]
+        for role in roles:
+            field = step.action.fields["role_" + role.id]
+            self.assertEqual(field.initial, user_ids)
+            # The role fields share the same list of users.
+            self.assertIs(field.choices,
+                          step.action.fields["role_" + roles[0].id].choices)
+
     @test.create_stubs({api.keystone: ('tenant_get',
                                        'tenant_update',
                                        'get_default_role',
-                                       'roles_for_user',
+                                       'project_role_grants',
                                        'remove_tenant_user_role',
                                        'add_tenant_user_role',
                                        'user_list',
@@ -492,10 +505,9 @@ class UpdateProjectWorkflowTests(test.BaseAdminViewTests):
         api.keystone.role_list(IsA(http.HttpRequest)).AndReturn(roles)
 
         workflow_data = {}
-        for user in users:
-            api.keystone.roles_for_user(IsA(http.HttpRequest),
-                                        user.id,
-                                        self.tenant.id).AndReturn(roles)
+        api.keystone.project_role_grants(IsA(http.HttpRequest),
+                                         self.tenant.id) \
+            .AndReturn(self._get_role_grants(users, roles))
 
         workflow_data["role_1"] = ['3']  # admin role
         workflow_data["role_2"] = ['2']  # member role
@@ -520,18 +532,14 @@ class UpdateProjectWorkflowTests(test.BaseAdminViewTests):
             .AndReturn(project)
 
         api.keystone.role_list(IsA(http.HttpRequest)).AndReturn(roles)
-        api.keystone.user_list(IsA(http.HttpRequest),
-                               tenant_id=self.tenant.id).AndReturn(users)
-
         # admin user - try to remove all roles on current project, warning
-        api.keystone.roles_for_user(IsA(http.HttpRequest), '1',
-                                    self.tenant.id) \
-                           .AndReturn(roles)
-
-        # member user 1 - has role 1, will remove it
-        api.keystone.roles_for_user(IsA(http.HttpRequest), '2',
-                                    self.tenant.id) \
-                           .AndReturn((roles[0],))
+        # member user 1 - has role 1
+        # member user 3 - has role 2
+        api.keystone.project_role_grants(IsA(http.HttpRequest),
+                                         self.tenant.id) \
+            .AndReturn(SortedDict([('1', set(role.id for role in roles)),
+                                   ('2', set([roles[0].id])),
+                                   ('3', set([roles[1].id]))]))
         # remove role 1
         api.keystone.remove_tenant_user_role(IsA(http.HttpRequest),
                                              tenant_id=self.tenant.id,
@@ -542,11 +550,6 @@ class UpdateProjectWorkflowTests(test.BaseAdminViewTests):
                                           tenant_id=self.tenant.id,
                                           user_id='2',
                                           role_id='2')
-
-        # member user 3 - has role 2
-        api.keystone.roles_for_user(IsA(http.HttpRequest), '3',
-                                    self.tenant.id) \
-                           .AndReturn((roles[1],))
         # remove role 2
         api.keystone.remove_tenant_user_role(IsA(http.HttpRequest),
                                              tenant_id=self.tenant.id,
@@ -604,7 +607,7 @@ class UpdateProjectWorkflowTests(test.BaseAdminViewTests):
     @test.create_stubs({api.keystone: ('tenant_get',
                                        'tenant_update',
                                        'get_default_role',
-                                       'roles_for_user',
+                                       'project_role_grants',
                                        'remove_tenant_user',
                                        'add_tenant_user_role',
                                        'user_list',
@@ -632,10 +635,10 @@ class UpdateProjectWorkflowTests(test.BaseAdminViewTests):
         api.keystone.role_list(IsA(http.HttpRequest)).AndReturn(roles)
 
         workflow_data = {}
+        api.keystone.project_role_grants(IsA(http.HttpRequest),
+                                         self.tenant.id) \
+            .AndReturn(self._get_role_grants(users, roles))
         for user in users:
-            api.keystone.roles_for_user(IsA(http.HttpRequest),
-                                        user.id,
-                                        self.tenant.id).AndReturn(roles)
             role_ids = [role.id for role in roles]
             if role_ids:
                 workflow_data.setdefault("role_" + role_ids[0], []) \
@@ -679,7 +682,7 @@ class UpdateProjectWorkflowTests(test.BaseAdminViewTests):
     @test.create_stubs({api.keystone: ('tenant_get',
                                        'tenant_update',
                                        'get_default_role',
-                                       'roles_for_user',
+                                       'project_role_grants',
                                        'remove_tenant_user_role',
                                        'add_tenant_user_role',
                                        'user_list',
@@ -707,11 +710,9 @@ class UpdateProjectWorkflowTests(test.BaseAdminViewTests):
         api.keystone.role_list(IsA(http.HttpRequest)).AndReturn(roles)
 
         workflow_data = {}
-
-        for user in users:
-            api.keystone.roles_for_user(IsA(http.HttpRequest),
-                                        user.id,
-                                        self.tenant.id).AndReturn(roles)
+        api.keystone.project_role_grants(IsA(http.HttpRequest),
+                                         self.tenant.id) \
+            .AndReturn(self._get_role_grants(users, roles))
 
         workflow_data["role_1"] = ['1', '3']  # admin role
         workflow_data["role_2"] = ['1', '2', '3']  # member role
@@ -737,23 +738,14 @@ class UpdateProjectWorkflowTests(test.BaseAdminViewTests):
             .AndReturn(project)
 
         api.keystone.role_list(IsA(http.HttpRequest)).AndReturn(roles)
-        api.keystone.user_list(IsA(http.HttpRequest),
-                               tenant_id=self.tenant.id).AndReturn(users)
-
         # admin user - try to remove all roles on current project, warning
-        api.keystone.roles_for_user(IsA(http.HttpRequest), '1',
-                                    self.tenant.id) \
-                           .AndReturn(roles)
-
-        # member user 1 - has role 1, will remove it
-        api.keystone.roles_for_user(IsA(http.HttpRequest), '2',
-                                    self.tenant.id) \
-                           .AndReturn((roles[1],))
-
-        # member user 3 - has role 2
-        api.keystone.roles_for_user(IsA(http.HttpRequest), '3',
-                                    self.tenant.id) \
-                           .AndReturn((roles[0],))
+        # member user 1 - has role 2
+        # member user 3 - has role 1
+        api.keystone.project_role_grants(IsA(http.HttpRequest),
+                                         self.tenant.id) \
+            .AndReturn(SortedDict([('1', set(role.id for role in roles)),
+                                   ('2', set([roles[1].id])),
+                                   ('3', set([roles[0].id]))]))
         # add role 2
         api.keystone.add_tenant_user_role(IsA(http.HttpRequest),
                                           tenant_id=self.tenant.id,
@@ -787,7 +779,7 @@ class UpdateProjectWorkflowTests(test.BaseAdminViewTests):
     @test.create_stubs({api.keystone: ('tenant_get',
                                        'tenant_update',
                                        'get_default_role',
-                                       'roles_for_user',
+                                       'project_role_grants',
                                        'remove_tenant_user_role',
                                        'add_tenant_user_role',
                                        'user_list',
@@ -814,10 +806,9 @@ class UpdateProjectWorkflowTests(test.BaseAdminViewTests):
         api.keystone.role_list(IsA(http.HttpRequest)).AndReturn(roles)
 
         workflow_data = {}
-        for user in users:
-            api.keystone.roles_for_user(IsA(http.HttpRequest),
-                                        user.id,
-                                        self.tenant.id).AndReturn(roles)
+        api.keystone.project_role_grants(IsA(http.HttpRequest),
+                                         self.tenant.id) \
+            .AndReturn(self._get_role_grants(users, roles))
         workflow_data["role_1"] = ['1', '3']  # admin role
         workflow_data["role_2"] = ['1', '2', '3']  # member role
 
@@ -841,23 +832,14 @@ class UpdateProjectWorkflowTests(test.BaseAdminViewTests):
             .AndReturn(project)
 
         api.keystone.role_list(IsA(http.HttpRequest)).AndReturn(roles)
-        api.keystone.user_list(IsA(http.HttpRequest),
-                               tenant_id=self.tenant.id).AndReturn(users)
-
         # admin user - try to remove all roles on current project, warning
-        api.keystone.roles_for_user(IsA(http.HttpRequest), '1',
-                                    self.tenant.id) \
-                           .AndReturn(roles)
-
-        # member user 1 - has role 1, will remove it
-        api.keystone.roles_for_user(IsA(http.HttpRequest), '2',
-                                    self.tenant.id) \
-                           .AndReturn((roles[1],))
-
-        # member user 3 - has role 2
-        api.keystone.roles_for_user(IsA(http.HttpRequest), '3',
-                                    self.tenant.id) \
-                           .AndReturn((roles[0],))
+        # member user 1 - has role 2
+        # member user 3 - has role 1
+        api.keystone.project_role_grants(IsA(http.HttpRequest),
+                                         self.tenant.id) \
+            .AndReturn(SortedDict([('1', set(role.id for role in roles)),
+                                   ('2', set([roles[1].id])),
+                                   ('3', set([roles[0].id]))]))
         # add role 2
         api.keystone.add_tenant_user_role(IsA(http.HttpRequest),
                                           tenant_id=self.tenant.id,
@@ -107,7 +107,7 @@ class UsersView(tables.MultiTableView):
     def get_add_users_data(self):
         tenant_users = self._get_shared_data()["tenant_users"]
         all_users = self._get_shared_data()["all_users"]
-        tenant_user_ids = [user.id for user in tenant_users]
+        tenant_user_ids = set(user.id for user in tenant_users)
         return filter(lambda u: u.id not in tenant_user_ids, all_users)
 
     def get_context_data(self, **kwargs):
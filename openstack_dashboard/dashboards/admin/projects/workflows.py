@@ -152,24 +152,27 @@ class UpdateProjectMembersAction(workflows.Action):
         for role in role_list:
             field_name = "role_" + role.id
             label = _(role.name)
-            self.fields[field_name] = forms.MultipleChoiceField(required=False,
-                                                                label=label)
-            self.fields[field_name].choices = users_list
-            self.fields[field_name].initial = []
+            field = forms.MultipleChoiceField(required=False, label=label)
+            # Every role field offers all the users, so they share a single
+            # list of choices rather than each holding a copy of it.
+            field._choices = field.widget.choices = users_list
+            field.initial = []
+            self.fields[field_name] = field
 
         # Figure out users & roles
         if project_id:
-            for user in all_users:
-                try:
-                    roles = api.keystone.roles_for_user(self.request,
-                                                        user.id,
-                                                        project_id)
-                except:
-                    exceptions.handle(request,
-                                      err_msg,
-                                      redirect=reverse(INDEX_URL))
-                for role in roles:
-                    self.fields["role_" + role.id].initial.append(user.id)
+            grants = {}
+            try:
+                grants = api.keystone.project_role_grants(request, project_id)
+            except:
+                exceptions.handle(request,
+                                  err_msg,
+                                  redirect=reverse(INDEX_URL))
+            for user_id, role_ids in grants.items():
+                for role_id in role_ids:
+                    field_name = "role_" + role_id
+                    if field_name in self.fields:
+                        self.fields[field_name].initial.append(user_id)
 
     class Meta:
         name = _("Project Members")
@@ -313,67 +316,50 @@ class UpdateProject(workflows.Workflow):
 
         # update project members
         users_to_modify = 0
+        members = None
         try:
             available_roles = api.keystone.role_list(request)
-            project_members = api.keystone.user_list(request,
-                                                     tenant_id=project_id)
-            users_to_modify = len(project_members)
-            for user in project_members:
-                current_roles = [role for role in
-                                 api.keystone.roles_for_user(self.request,
-                                                             user.id,
-                                                             project_id)]
-                effective_roles = []
-                for role in available_roles:
-                    role_list = data["role_" + role.id]
-                    if user.id in role_list:
-                        effective_roles.append(role)
-                        if role not in current_roles:
-                            # user role has changed
-                            api.keystone.add_tenant_user_role(
-                                request,
-                                tenant_id=project_id,
-                                user_id=user.id,
-                                role_id=role.id)
-                        else:
-                            # user role is unchanged
-                            current_roles.pop(current_roles.index(role))
-                if user.id == request.user.id and \
-                        project_id == request.user.tenant_id and \
-                        any(x.name == 'admin' for x in current_roles):
-                    # Cannot remove "admin" role on current(admin) project
-                    msg = _('You cannot remove the "admin" role from the '
-                            'project you are currently logged into. Please '
-                            'switch to another project with admin permissions '
-                            'or remove the role manually via the CLI')
-                    messages.warning(request, msg)
-                else:
-                    # delete user's removed roles
-                    for to_delete in current_roles:
-                        api.keystone.remove_tenant_user_role(
-                            request,
-                            tenant_id=project_id,
-                            user_id=user.id,
-                            role_id=to_delete.id)
-                users_to_modify -= 1
-
-            # add new roles to project
-            for role in available_roles:
-                # count how many users may be added for exception handling
-                role_list = data["role_" + role.id]
-                users_to_modify += len(role_list)
-            for role in available_roles:
-                role_list = data["role_" + role.id]
-                users_added = 0
-                for user_id in role_list:
-                    if not filter(lambda x: user_id == x.id, project_members):
-                        api.keystone.add_tenant_user_role(request,
-                                                          tenant_id=project_id,
-                                                          user_id=user_id,
-                                                          role_id=role.id)
-                    users_added += 1
-                users_to_modify -= users_added
+            roles_by_id = dict((role.id, role) for role in available_roles)
+            grants = api.keystone.project_role_grants(request, project_id)
+            wanted = set((user_id, role.id) for role in available_roles
+                         for user_id in data["role_" + role.id])
+            members = workflows.MembershipDiff(
+                workflows.MembershipDiff.role_pairs(grants), wanted)
+            users_to_modify = len(set(user_id for user_id, role_id
+                                      in members.to_add | members.to_remove))
+
+            own_roles = set((user_id, role_id) for user_id, role_id
+                            in members.to_remove
+                            if user_id == request.user.id)
+            if project_id == request.user.tenant_id and \
+                    any(getattr(roles_by_id.get(role_id), 'name', None) ==
+                        'admin' for user_id, role_id in own_roles):
+                # Cannot remove "admin" role on current(admin) project
+                msg = _('You cannot remove the "admin" role from the '
+                        'project you are currently logged into. Please '
+                        'switch to another project with admin permissions '
+                        'or remove the role manually via the CLI')
+                messages.warning(request, msg)
+                members.to_remove -= own_roles
+
+            def add(user_id, role_id):
+                api.keystone.add_tenant_user_role(request,
+                                                  tenant_id=project_id,
+                                                  user_id=user_id,
+                                                  role_id=role_id)
+
+            def remove(user_id, role_id):
+                api.keystone.remove_tenant_user_role(request,
+                                                     tenant_id=project_id,
+                                                     user_id=user_id,
+                                                     role_id=role_id)
+
+            members.apply(add, remove)
         except:
+            if members is not None and members.failures:
+                # count the users whose roles couldn't all be changed
+                users_to_modify = len(set(user_id for (user_id, role_id), exc
+                                          in members.failures))
             exceptions.handle(request, _('Failed to modify %s project members '
                                          'and update project quotas.'
                                          % users_to_modify))
@@ -51,6 +51,7 @@ class ReleaseIPs(tables.BatchAction):
     data_type_singular = _("Floating IP")
     data_type_plural = _("Floating IPs")
     classes = ('btn-danger', 'btn-release')
+    concurrent = True
 
     def action(self, request, obj_id):
         api.network.tenant_floating_ip_release(request, obj_id)
@@ -124,3 +124,4 @@ class AccessAndSecurityTabs(tabs.TabGroup):
     slug = "access_security_tabs"
     tabs = (SecurityGroupsTab, KeypairsTab, FloatingIPsTab, APIAccessTab)
     sticky = True
+    concurrent_data_load = True
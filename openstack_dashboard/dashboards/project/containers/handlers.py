@@ -0,0 +1,108 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import StopUpload
+from django.utils.translation import ugettext_lazy as _
+
+from horizon import messages
+from horizon.utils.uploads import StreamingUploadHandler
+
+from openstack_dashboard import api
+
+
+LOG = logging.getLogger(__name__)
+
+
+class StreamedFile(UploadedFile):
+    """
+    Stands in for a file which was streamed straight to swift while it was
+    being uploaded. :func:`~openstack_dashboard.api.swift.swift_upload_object`
+    creates the object from its ``segments``.
+    """
+    def __init__(self, segments, name, content_type, size, charset):
+        super(StreamedFile, self).__init__(None, name, content_type, size,
+                                           charset)
+        self.segments = segments
+
+
+class SwiftStreamingUploadHandler(StreamingUploadHandler):
+    """
+    Streams uploads larger than ``SWIFT_SEGMENTED_UPLOAD_THRESHOLD`` to
+    swift in segments as the data arrives, rather than spooling them to
+    disk first. Smaller uploads are left to the default handlers.
+    """
+    upload_field = 'object_file'
+
+    def __init__(self, request, container_name):
+        super(SwiftStreamingUploadHandler, self).__init__(request)
+        self.container_name = container_name
+        self.active = False
+        self.segments = None
+
+    def handles_request(self, META, content_length):
+        threshold = api.swift.segmented_upload_threshold()
+        self.active = threshold is not None and content_length > threshold
+        return self.active
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super(SwiftStreamingUploadHandler, self).new_file(field_name,
+                                                          file_name,
+                                                          *args, **kwargs)
+        if self.active and field_name == self.upload_field:
+            if not self.check_csrf():
+                # The rest of the request is thrown away, and the view
+                # rejects it.
+                raise StopUpload()
+            try:
+                self.segments = api.swift.SegmentedUpload(self.request,
+                                                          self.container_name)
+            except:
+                self.fail()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.segments is None:
+            return raw_data
+        try:
+            self.segments.write(raw_data)
+        except:
+            self.fail()
+
+    def file_complete(self, file_size):
+        if self.segments is None:
+            return None
+        try:
+            self.segments.close()
+        except:
+            self.fail()
+        streamed = StreamedFile(self.segments, self.file_name,
+                                self.content_type, file_size, self.charset)
+        self.segments = None
+        return streamed
+
+    def upload_complete(self):
+        # Clean up after uploads which were cut short.
+        if self.segments is not None:
+            self.segments.abort()
+            self.segments = None
+
+    def fail(self):
+        LOG.exception('Unable to stream upload to swift.')
+        if self.segments is not None:
+            self.segments.abort()
+            self.segments = None
+        messages.error(self.request, _("Unable to upload object."))
+        raise StopUpload()
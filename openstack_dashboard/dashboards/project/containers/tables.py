@@ -178,27 +178,8 @@ class DownloadObject(tables.LinkAction):
 
 
 class ObjectFilterAction(tables.FilterAction):
-    def _filtered_data(self, table, filter_string):
-        request = table.request
-        container = self.table.kwargs['container_name']
-        subfolder = self.table.kwargs['subfolder_path']
-        prefix = wrap_delimiter(subfolder) if subfolder else ''
-        self.filtered_data = api.swift.swift_filter_objects(request,
-                                                            filter_string,
-                                                            container,
-                                                            prefix=prefix)
-        return self.filtered_data
-
-    def filter_subfolders_data(self, table, objects, filter_string):
-        data = self._filtered_data(table, filter_string)
-        return [datum for datum in data if
-                datum.content_type == "application/pseudo-folder"]
-
-    def filter_objects_data(self, table, objects, filter_string):
-        data = self._filtered_data(table, filter_string)
-        return [datum for datum in data if
-                datum.content_type != "application/pseudo-folder"]
-
+    # The filter is applied by ContainerView when listing the objects, so
+    # that a filtered listing can be paged through like an unfiltered one.
     def allowed(self, request, datum=None):
         if self.table.kwargs.get('container_name', None):
             return True
@@ -239,3 +220,5 @@ class ObjectsTable(tables.DataTable):
         data_types = ("subfolders", "objects")
         browser_table = "content"
         footer = False
+        server_side_filter = True
+        pagination_param = "object_marker"
@@ -21,13 +21,17 @@
 import tempfile
 
 from django import http
+from django.conf import settings
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.core.urlresolvers import reverse
+from django.test.client import Client
+from django.utils.datastructures import SortedDict
 
 from mox import IsA
 
 from openstack_dashboard import api
 from openstack_dashboard.test import helpers as test
+from .handlers import StreamedFile
 from .tables import ContainersTable, ObjectsTable, wrap_delimiter
 from . import forms
 
@@ -121,6 +125,50 @@ class SwiftTests(test.TestCase):
                                  expected,
                                  lambda obj: obj.name.encode('utf8'))
 
+    @test.create_stubs({api.swift: ('swift_get_containers',
+                                    'swift_filter_objects')})
+    def test_index_container_filtered(self):
+        container = self.containers.first()
+        objects = self.objects.list()
+        api.swift.swift_get_containers(IsA(http.HttpRequest),
+                                       marker=None) \
+            .MultipleTimes().AndReturn((self.containers.list(), False))
+        api.swift.swift_filter_objects(IsA(http.HttpRequest),
+                                       'obj',
+                                       container.name,
+                                       prefix=None,
+                                       marker=None) \
+            .AndReturn((objects[:1], True, 'scanned'))
+        api.swift.swift_filter_objects(IsA(http.HttpRequest),
+                                       'obj',
+                                       container.name,
+                                       prefix=None,
+                                       marker='scanned') \
+            .AndReturn((objects[1:], False, None))
+        self.mox.ReplayAll()
+
+        url = reverse('horizon:project:containers:index',
+                      args=[wrap_delimiter(container.name)])
+        res = self.client.post(url, {'objects__filter__q': 'obj'})
+        table = res.context['objects_table']
+        self.assertQuerysetEqual(table.data,
+                                 [objects[0].name.encode('utf8')],
+                                 lambda obj: obj.name.encode('utf8'))
+        # The next page continues the scan where it stopped, rather than
+        # after the last match, and keeps the filter.
+        self.assertTrue(table.has_more_data())
+        self.assertContains(res, 'objects__filter__q=obj')
+        self.assertContains(res, 'object_marker=scanned')
+
+        res = self.client.get(url, {'objects__filter__q': 'obj',
+                                    'object_marker': 'scanned'})
+        table = res.context['objects_table']
+        self.assertQuerysetEqual(table.data,
+                                 [obj.name.encode('utf8')
+                                  for obj in objects[1:]],
+                                 lambda obj: obj.name.encode('utf8'))
+        self.assertFalse(table.has_more_data())
+
     @test.create_stubs({api.swift: ('swift_upload_object',)})
     def test_upload(self):
         container = self.containers.first()
@@ -157,6 +205,118 @@ class SwiftTests(test.TestCase):
                             args=[wrap_delimiter(container.name)])
         self.assertRedirectsNoFollow(res, index_url)
 
+    @test.create_stubs({api.swift: ('swift_upload_object',)})
+    def test_upload_streamed(self):
+        container = self.containers.first()
+        obj = self.objects.first()
+        OBJECT_DATA = 'objectData'
+
+        temp_file = tempfile.TemporaryFile()
+        temp_file.write(OBJECT_DATA)
+        temp_file.flush()
+        temp_file.seek(0)
+
+        segments = self.mox.CreateMock(api.swift.SegmentedUpload)
+        self.mox.StubOutWithMock(api.swift, 'SegmentedUpload')
+        api.swift.SegmentedUpload(IsA(http.HttpRequest),
+                                  container.name).AndReturn(segments)
+        segments.write(OBJECT_DATA)
+        segments.close()
+        api.swift.swift_upload_object(IsA(http.HttpRequest),
+                                      container.name,
+                                      obj.name,
+                                      IsA(StreamedFile)).AndReturn(obj)
+        self.mox.ReplayAll()
+
+        upload_url = reverse('horizon:project:containers:object_upload',
+                             args=[container.name])
+        formData = {'method': forms.UploadObject.__name__,
+                    'container_name': container.name,
+                    'name': obj.name,
+                    'object_file': temp_file}
+        with self.settings(SWIFT_SEGMENTED_UPLOAD_THRESHOLD=4):
+            res = self.client.post(upload_url, formData)
+
+        index_url = reverse('horizon:project:containers:index',
+                            args=[wrap_delimiter(container.name)])
+        self.assertRedirectsNoFollow(res, index_url)
+
+    def _streamed_upload_data(self, container, obj):
+        temp_file = tempfile.TemporaryFile()
+        temp_file.write('objectData')
+        temp_file.flush()
+        temp_file.seek(0)
+        # The fields are sent in order, the file last.
+        return SortedDict([('method', forms.UploadObject.__name__),
+                           ('container_name', container.name),
+                           ('name', obj.name),
+                           ('object_file', temp_file)])
+
+    def test_upload_streamed_csrf(self):
+        # Nothing is sent to swift without a valid CSRF token.
+        container = self.containers.first()
+        obj = self.objects.first()
+        uploads = []
+        self.mox.stubs.Set(api.swift, 'SegmentedUpload',
+                           lambda *args: uploads.append(args))
+        self.mox.ReplayAll()
+
+        client = Client(enforce_csrf_checks=True)
+        client.cookies = self.client.cookies
+        client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        upload_url = reverse('horizon:project:containers:object_upload',
+                             args=[container.name])
+        data = self._streamed_upload_data(container, obj)
+        data.insert(0, 'csrfmiddlewaretoken', 'b' * 32)
+        with self.settings(SWIFT_SEGMENTED_UPLOAD_THRESHOLD=4):
+            res = client.post(upload_url, data)
+        self.assertEqual(res.status_code, 403)
+        self.assertEqual(uploads, [])
+
+    def test_upload_streamed_csrf_unsanitized_cookie(self):
+        # A token matching the cookie as sent, rather than as the CSRF
+        # middleware sanitizes it, doesn't start an upload either.
+        container = self.containers.first()
+        obj = self.objects.first()
+        uploads = []
+        self.mox.stubs.Set(api.swift, 'SegmentedUpload',
+                           lambda *args: uploads.append(args))
+        self.mox.ReplayAll()
+
+        client = Client(enforce_csrf_checks=True)
+        client.cookies = self.client.cookies
+        client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 16 + '-'
+        upload_url = reverse('horizon:project:containers:object_upload',
+                             args=[container.name])
+        data = self._streamed_upload_data(container, obj)
+        data.insert(0, 'csrfmiddlewaretoken', 'a' * 16 + '-')
+        with self.settings(SWIFT_SEGMENTED_UPLOAD_THRESHOLD=4):
+            res = client.post(upload_url, data)
+        self.assertEqual(res.status_code, 403)
+        self.assertEqual(uploads, [])
+
+    def test_upload_streamed_form_invalid(self):
+        container = self.containers.first()
+        obj = self.objects.first()
+
+        segments = self.mox.CreateMock(api.swift.SegmentedUpload)
+        self.mox.StubOutWithMock(api.swift, 'SegmentedUpload')
+        api.swift.SegmentedUpload(IsA(http.HttpRequest),
+                                  container.name).AndReturn(segments)
+        segments.write('objectData')
+        segments.close()
+        # The segments of an object which isn't created are deleted.
+        segments.abort()
+        self.mox.ReplayAll()
+
+        upload_url = reverse('horizon:project:containers:object_upload',
+                             args=[container.name])
+        data = self._streamed_upload_data(container, obj)
+        data['name'] = ''
+        with self.settings(SWIFT_SEGMENTED_UPLOAD_THRESHOLD=4):
+            res = self.client.post(upload_url, data)
+        self.assertFormErrors(res, 1)
+
     @test.create_stubs({api.swift: ('swift_delete_object',)})
     def test_delete(self):
         container = self.containers.first()
@@ -183,7 +343,9 @@ class SwiftTests(test.TestCase):
 
         api.swift.swift_get_object(IsA(http.HttpRequest),
                                    container.name,
-                                   obj.name).AndReturn(obj)
+                                   obj.name,
+                                   resp_chunk_size=512 * 1024,
+                                   byte_range=None).AndReturn(obj)
         self.mox.ReplayAll()
 
         download_url = reverse('horizon:project:containers:object_download',
@@ -192,6 +354,30 @@ class SwiftTests(test.TestCase):
         self.assertEqual(res.content, obj.data)
         self.assertTrue(res.has_header('Content-Disposition'))
 
+    @test.create_stubs({api.swift: ('swift_get_object',)})
+    def test_download_range(self):
+        container = self.containers.first()
+        obj = api.swift.StorageObject({'name': self.objects.first().name,
+                                       'bytes': 4,
+                                       'content_range': 'bytes 0-3/9'},
+                                      container.name,
+                                      data=iter(['Fa', 'ke']))
+
+        api.swift.swift_get_object(IsA(http.HttpRequest),
+                                   container.name,
+                                   obj.name,
+                                   resp_chunk_size=512 * 1024,
+                                   byte_range='bytes=0-3').AndReturn(obj)
+        self.mox.ReplayAll()
+
+        download_url = reverse('horizon:project:containers:object_download',
+                               args=[container.name, obj.name])
+        res = self.client.get(download_url, HTTP_RANGE='bytes=0-3')
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(res.content, 'Fake')
+        self.assertEqual(res['Content-Length'], '4')
+        self.assertEqual(res['Content-Range'], 'bytes 0-3/9')
+
     @test.create_stubs({api.swift: ('swift_get_containers',)})
     def test_copy_index(self):
         ret = (self.containers.list(), False)
@@ -24,8 +24,11 @@ Views for managing Swift containers.
 import os
 
 from django import http
+from django.conf import settings
 from django.core.urlresolvers import reverse
+from django.utils.decorators import method_decorator
 from django.utils.translation import ugettext_lazy as _
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 
 from horizon import browsers
 from horizon import exceptions
@@ -35,6 +38,7 @@ from openstack_dashboard import api
 from openstack_dashboard.api.swift import FOLDER_DELIMITER
 from .browsers import ContainerBrowser
 from .forms import CreateContainer, UploadObject, CopyObject
+from .handlers import StreamedFile, SwiftStreamingUploadHandler
 from .tables import wrap_delimiter
 
 
@@ -54,16 +58,17 @@ class ContainerView(browsers.ResourceBrowserView):
             exceptions.handle(self.request, msg)
         return containers
 
-    @property
-    def objects(self):
+    def get_objects(self, query):
         """ Returns a list of objects given the subfolder's path.
 
-        The path is from the kwargs of the request.
+        The path is from the kwargs of the request. If the objects table
+        is being filtered, only the matching objects are listed, and the
+        table's ``query`` is told where the next page of matches starts.
         """
         if not hasattr(self, "_objects"):
             objects = []
             self._more = None
-            marker = self.request.GET.get('marker', None)
+            marker = query.marker
             container_name = self.kwargs['container_name']
             subfolder = self.kwargs['subfolder_path']
             prefix = None
@@ -72,11 +77,20 @@ class ContainerView(browsers.ResourceBrowserView):
                 if subfolder:
                     prefix = subfolder
                 try:
-                    objects, self._more = api.swift.swift_get_objects(
-                        self.request,
-                        container_name,
-                        marker=marker,
-                        prefix=prefix)
+                    if query.filter_string:
+                        objects, query.has_more, query.next_marker = \
+                            api.swift.swift_filter_objects(
+                                self.request,
+                                query.filter_string,
+                                container_name,
+                                prefix=wrap_delimiter(prefix),
+                                marker=marker)
+                    else:
+                        objects, self._more = api.swift.swift_get_objects(
+                            self.request,
+                            container_name,
+                            marker=marker,
+                            prefix=prefix)
                 except:
                     self._more = None
                     objects = []
@@ -89,15 +103,15 @@ class ContainerView(browsers.ResourceBrowserView):
         content_type = "application/pseudo-folder"
         return getattr(item, "content_type", None) == content_type
 
-    def get_objects_data(self):
+    def get_objects_data(self, query):
         """ Returns a list of objects within the current folder. """
-        filtered_objects = [item for item in self.objects
+        filtered_objects = [item for item in self.get_objects(query)
                             if not self.is_subdir(item)]
         return filtered_objects
 
-    def get_subfolders_data(self):
+    def get_subfolders_data(self, query):
         """ Returns a list of subfolders within the current folder. """
-        filtered_objects = [item for item in self.objects
+        filtered_objects = [item for item in self.get_objects(query)
                             if self.is_subdir(item)]
         return filtered_objects
 
@@ -143,6 +157,39 @@ class UploadView(forms.ModalFormView):
     template_name = 'project/containers/upload.html'
     success_url = "horizon:project:containers:index"
 
+    @method_decorator(csrf_exempt)
+    def dispatch(self, request, *args, **kwargs):
+        # The upload handler must be in place before anything reads the
+        # request body, including the CSRF check, which is made here instead.
+        # The handler prechecks the token before streaming anything, but
+        # csrf_protect stays the authority: if it rejects the request, the
+        # streamed segments are deleted.
+        handler = SwiftStreamingUploadHandler(request,
+                                              kwargs["container_name"])
+        request.upload_handlers.insert(0, handler)
+        self._csrf_passed = False
+        response = csrf_protect(self._dispatch)(request, *args, **kwargs)
+        if not self._csrf_passed:
+            self.abort_streamed_upload(request)
+        return response
+
+    def _dispatch(self, request, *args, **kwargs):
+        self._csrf_passed = True
+        return super(UploadView, self).dispatch(request, *args, **kwargs)
+
+    def abort_streamed_upload(self, request):
+        """ Deletes the segments of an upload which won't be stored. """
+        # Only look at the files if the request body was read.
+        if not hasattr(request, '_files'):
+            return
+        streamed = request.FILES.get('object_file')
+        if isinstance(streamed, StreamedFile):
+            streamed.segments.abort()
+
+    def form_invalid(self, form):
+        self.abort_streamed_upload(self.request)
+        return super(UploadView, self).form_invalid(form)
+
     def get_success_url(self):
         container_name = self.request.POST['container_name']
         return reverse(self.success_url,
@@ -160,8 +207,14 @@ class UploadView(forms.ModalFormView):
 
 
 def object_download(request, container_name, object_path):
+    # Stream the object through rather than reading it all into memory.
+    chunk_size = getattr(settings, 'SWIFT_FILE_TRANSFER_CHUNK_SIZE',
+                         512 * 1024)
     try:
-        obj = api.swift.swift_get_object(request, container_name, object_path)
+        obj = api.swift.swift_get_object(
+            request, container_name, object_path,
+            resp_chunk_size=chunk_size,
+            byte_range=request.META.get('HTTP_RANGE'))
     except:
         redirect = reverse("horizon:project:containers:index")
         exceptions.handle(request,
@@ -173,11 +226,16 @@ def object_download(request, container_name, object_path):
     if not os.path.splitext(obj.name)[1] and obj.orig_name:
         name, ext = os.path.splitext(obj.orig_name)
         filename = "%s%s" % (filename, ext)
-    response = http.HttpResponse()
+    response = http.HttpResponse(obj.data)
     safe_name = filename.replace(",", "").encode('utf-8')
     response['Content-Disposition'] = 'attachment; filename=%s' % safe_name
     response['Content-Type'] = 'application/octet-stream'
-    response.write(obj.data)
+    response['Content-Length'] = obj.bytes
+    if api.swift.SUPPORTS_RANGE_REQUESTS:
+        response['Accept-Ranges'] = 'bytes'
+    if obj.get('content_range'):
+        response.status_code = 206
+        response['Content-Range'] = obj.content_range
     return response
 
 
@@ -46,9 +46,6 @@ class CreateImageForm(forms.SelfHandlingForm):
                                 help_text=_("An external (HTTP) URL to load "
                                             "the image from."),
                                 required=False)
-    image_file = forms.FileField(label=_("Image File"),
-                                 help_text=("A local image to upload."),
-                                 required=False)
     disk_format = forms.ChoiceField(label=_('Format'),
                                     required=True,
                                     choices=[('', ''),
@@ -86,6 +83,15 @@ class CreateImageForm(forms.SelfHandlingForm):
                                             ' minimum).'),
                                     required=False)
     is_public = forms.BooleanField(label=_("Public"), required=False)
+    # The file comes last, so that the browser sends it after the metadata
+    # and it can be streamed to glance as it's received.
+    image_file = forms.FileField(label=_("Image File"),
+                                 help_text=("A local image to upload."),
+                                 required=False)
+
+    # The fields making up the metadata of the image.
+    meta_fields = ('name', 'disk_format', 'minimum_disk', 'minimum_ram',
+                   'is_public')
 
     def __init__(self, *args, **kwargs):
         super(CreateImageForm, self).__init__(*args, **kwargs)
@@ -103,7 +109,8 @@ class CreateImageForm(forms.SelfHandlingForm):
         else:
             return data
 
-    def handle(self, request, data):
+    def get_image_meta(self, data):
+        """ Returns the metadata of the image given by ``meta_fields``. """
         # Glance does not really do anything with container_format at the
         # moment. It requires it is set to the same disk_format for the three
         # Amazon image types, otherwise it just treats them as 'bare.' As such
@@ -114,20 +121,28 @@ class CreateImageForm(forms.SelfHandlingForm):
         else:
             container_format = 'bare'
 
-        meta = {'is_public': data['is_public'],
+        return {'is_public': data['is_public'],
                 'disk_format': data['disk_format'],
                 'container_format': container_format,
                 'min_disk': (data['minimum_disk'] or 0),
                 'min_ram': (data['minimum_ram'] or 0),
                 'name': data['name']}
 
+    def handle(self, request, data):
+        meta = self.get_image_meta(data)
+
         if settings.HORIZON_IMAGES_ALLOW_UPLOAD and data['image_file']:
             meta['data'] = self.files['image_file']
         else:
             meta['copy_from'] = data['copy_from']
 
         try:
-            image = api.glance.image_create(request, **meta)
+            upload = getattr(meta.get('data'), 'upload', None)
+            if upload is not None:
+                # The file was streamed to glance as it was received.
+                image = upload.result()
+            else:
+                image = api.glance.image_create(request, **meta)
             messages.success(request,
                 _('Your image %s has been queued for creation.' %
                     data['name']))
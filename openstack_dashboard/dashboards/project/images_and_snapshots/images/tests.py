@@ -18,6 +18,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import json
 import tempfile
 
 from django import http
@@ -25,7 +26,9 @@ from django.conf import settings
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.core.urlresolvers import reverse
 from django.forms.widgets import HiddenInput
+from django.test.client import Client
 from django.test.utils import override_settings
+from django.utils.datastructures import SortedDict
 
 from mox import IsA
 
@@ -35,6 +38,7 @@ from openstack_dashboard.test import helpers as test
 
 from . import tables
 from .forms import CreateImageForm
+from .uploads import ImageUploadHandler
 
 
 IMAGES_INDEX_URL = reverse('horizon:project:images_and_snapshots:index')
@@ -104,37 +108,127 @@ class ImageViewTests(test.TestCase):
         self.assertNoFormErrors(res)
         self.assertEqual(res.status_code, 302)
 
-    @test.create_stubs({api.glance: ('image_create',)})
-    def test_image_create_post_upload(self):
+    def _upload_data(self, file_last=True):
         temp_file = tempfile.TemporaryFile()
         temp_file.write('123')
         temp_file.flush()
         temp_file.seek(0)
-        data = {
-            'name': u'Test Image',
-            'image_file': temp_file,
-            'disk_format': u'qcow2',
-            'minimum_disk': 15,
-            'minimum_ram': 512,
-            'is_public': 1,
-            'method': 'CreateImageForm'}
+        # Browsers send the fields in the order of the form.
+        data = SortedDict([('name', u'Test Image'),
+                           ('disk_format', u'qcow2'),
+                           ('minimum_disk', 15),
+                           ('minimum_ram', 512),
+                           ('is_public', 1),
+                           ('method', 'CreateImageForm')])
+        if file_last:
+            data['image_file'] = temp_file
+        else:
+            data.insert(0, 'image_file', temp_file)
+        return data
+
+    def _expect_image_create(self, data_type):
+        def send(request, **kwargs):
+            if data_type is api.glance.ImageData:
+                self.assertEqual(kwargs['data'].read(), '123')
+
+        return api.glance.image_create(IsA(http.HttpRequest),
+                                       container_format="bare",
+                                       disk_format=u'qcow2',
+                                       is_public=True,
+                                       min_disk=15,
+                                       min_ram=512,
+                                       name=u'Test Image',
+                                       data=IsA(data_type)) \
+                                    .WithSideEffects(send)
 
-        api.glance.image_create(IsA(http.HttpRequest),
-                                container_format="bare",
-                                disk_format=data['disk_format'],
-                                is_public=True,
-                                min_disk=data['minimum_disk'],
-                                min_ram=data['minimum_ram'],
-                                name=data['name'],
-                                data=IsA(InMemoryUploadedFile)). \
-                        AndReturn(self.images.first())
+    @test.create_stubs({api.glance: ('image_create',)})
+    def test_image_create_post_upload(self):
+        # The file is streamed to glance as it's received.
+        self._expect_image_create(api.glance.ImageData) \
+            .AndReturn(self.images.first())
         self.mox.ReplayAll()
 
         url = reverse('horizon:project:images_and_snapshots:images:create')
-        res = self.client.post(url, data)
+        res = self.client.post(url + "?upload_id=test-1", self._upload_data())
 
         self.assertNoFormErrors(res)
         self.assertEqual(res.status_code, 302)
+        res = self.client.get(
+            reverse('horizon:project:images_and_snapshots:images:'
+                    'upload_progress'), {'upload_id': 'test-1'})
+        progress = json.loads(res.content)
+        self.assertTrue(progress['finished'])
+        self.assertFalse(progress['failed'])
+        self.assertEqual(progress['stored'], 3)
+
+    @test.create_stubs({api.glance: ('image_create',)})
+    def test_image_create_post_upload_file_first(self):
+        # Without its metadata the file is received before being sent.
+        self._expect_image_create(InMemoryUploadedFile) \
+            .AndReturn(self.images.first())
+        self.mox.ReplayAll()
+
+        url = reverse('horizon:project:images_and_snapshots:images:create')
+        res = self.client.post(url, self._upload_data(file_last=False))
+
+        self.assertNoFormErrors(res)
+        self.assertEqual(res.status_code, 302)
+
+    @test.create_stubs({api.glance: ('image_create', 'image_delete')})
+    def test_image_create_post_upload_invalid(self):
+        image = self.images.first()
+        self._expect_image_create(api.glance.ImageData).AndReturn(image)
+        api.glance.image_delete(IsA(http.HttpRequest), image.id)
+        self.mox.ReplayAll()
+
+        data = self._upload_data()
+        data['copy_from'] = u'http://example.com/image.img'
+        url = reverse('horizon:project:images_and_snapshots:images:create')
+        res = self.client.post(url, data)
+
+        self.assertFormErrors(res, 1)
+
+    def test_image_create_post_upload_csrf(self):
+        # Nothing is sent to glance without a valid CSRF token.
+        client = Client(enforce_csrf_checks=True)
+        client.cookies = self.client.cookies
+        client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        url = reverse('horizon:project:images_and_snapshots:images:create')
+        res = client.post(url + "?upload_id=test-2", self._upload_data())
+        self.assertEqual(res.status_code, 403)
+        res = self.client.get(
+            reverse('horizon:project:images_and_snapshots:images:'
+                    'upload_progress'), {'upload_id': 'test-2'})
+        self.assertEqual(res.status_code, 404)
+
+    @test.create_stubs({api.glance: ('image_create', 'image_delete')})
+    def test_image_create_post_upload_csrf_rejected_later(self):
+        # Should the handler let the upload through, the CSRF check of the
+        # view still rejects the request, and the image is deleted.
+        image = self.images.first()
+        self.mox.stubs.Set(ImageUploadHandler, 'check_csrf',
+                           lambda handler: True)
+        self._expect_image_create(api.glance.ImageData).AndReturn(image)
+        api.glance.image_delete(IsA(http.HttpRequest), image.id)
+        self.mox.ReplayAll()
+
+        client = Client(enforce_csrf_checks=True)
+        client.cookies = self.client.cookies
+        client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        data = self._upload_data()
+        data.insert(0, 'csrfmiddlewaretoken', 'b' * 32)
+        url = reverse('horizon:project:images_and_snapshots:images:create')
+        res = client.post(url, data)
+        self.assertEqual(res.status_code, 403)
+
+    def test_upload_progress_unknown(self):
+        url = reverse('horizon:project:images_and_snapshots:images:'
+                      'upload_progress')
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url, {'upload_id': 'nope'})
+                         .status_code, 404)
+        self.assertEqual(self.client.get(url, {'upload_id': 'a b'})
+                         .status_code, 404)
 
     @test.create_stubs({api.glance: ('image_get',)})
     def test_image_detail_get(self):
@@ -0,0 +1,229 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Streaming of image files to glance while they are uploaded by the browser.
+
+Django normally stores uploaded files in memory or in a temporary file
+before the view gets to see them, so that large images used to be written
+to the disk of the dashboard before being sent on to glance. The
+:class:`ImageUploadHandler` instead sends each chunk of the image file to
+glance as soon as it's received, through an
+:class:`~openstack_dashboard.api.glance.ImageData` pipe which slows the
+upload down to the pace of glance. Its progress can be polled with the
+``upload_progress`` view.
+"""
+
+import logging
+import re
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers
+from django.forms import ValidationError
+
+from horizon.utils import concurrency
+from horizon.utils.uploads import StreamingUploadHandler
+
+from openstack_dashboard import api
+
+
+LOG = logging.getLogger(__name__)
+
+UPLOAD_PROGRESS_KEY = "openstack_dashboard:image_upload:%s:%s"
+UPLOAD_PROGRESS_TIMEOUT = 60 * 60
+
+# How often the progress of an upload is saved, in seconds.
+UPLOAD_PROGRESS_INTERVAL = 1
+
+UPLOAD_ID_RE = re.compile(r'^[\w-]{1,64}$')
+
+
+def get_upload_progress(request, upload_id):
+    """
+    Returns the progress of an image upload of the user, as a dict holding
+    the ``total`` size of the request, how many bytes of it were
+    ``received`` and how many bytes of the image were ``stored`` by glance,
+    whether it has ``finished`` and whether it ``failed``, or ``None`` if
+    it's unknown.
+    """
+    if not upload_id or not UPLOAD_ID_RE.match(upload_id):
+        return None
+    return cache.get(UPLOAD_PROGRESS_KEY % (request.user.id, upload_id))
+
+
+class ImageUpload(object):
+    """
+    An image being created by a background thread from the data written to
+    it, as the data comes in.
+    """
+    def __init__(self, request, meta, upload_id=None, total=None):
+        self.request = request
+        self.data = api.glance.ImageData()
+        self.task = concurrency.Task(api.glance.image_create, request,
+                                     data=self.data, **meta)
+        self.received = 0
+        self.failed = False
+        self.total = total
+        self._progress_key = None
+        if upload_id and UPLOAD_ID_RE.match(upload_id):
+            self._progress_key = UPLOAD_PROGRESS_KEY % (request.user.id,
+                                                        upload_id)
+        self._saved = 0
+
+    def start(self):
+        thread = threading.Thread(target=self.task.run,
+                                  name="image-upload")
+        thread.daemon = True
+        thread.start()
+        self.save_progress()
+
+    def save_progress(self, finished=False):
+        if self._progress_key is None:
+            return
+        self._saved = time.time()
+        cache.set(self._progress_key,
+                  {'total': self.total,
+                   'received': self.received,
+                   'stored': self.data.size,
+                   'finished': finished,
+                   'failed': self.failed},
+                  UPLOAD_PROGRESS_TIMEOUT)
+
+    def write(self, chunk):
+        self.received += len(chunk)
+        if not self.failed:
+            try:
+                self.data.write(chunk)
+            except IOError:
+                # The upload failed, the rest of the file is thrown away
+                # and the error is reported by result().
+                LOG.info("Image upload stopped after %s bytes."
+                         % self.data.size)
+                self.failed = True
+        if time.time() - self._saved >= UPLOAD_PROGRESS_INTERVAL:
+            self.save_progress()
+
+    def end(self):
+        try:
+            self.data.end()
+        except IOError:
+            self.failed = True
+        self.save_progress()
+
+    def result(self):
+        """
+        Waits for glance to store the image and returns it, or raises the
+        error which stopped the upload.
+        """
+        self.task.wait()
+        self.failed = self.failed or self.task.exc_info is not None
+        self.save_progress(finished=True)
+        return self.task.get_result()
+
+    def discard(self):
+        """ Deletes the image once it has been created, if it was. """
+        self.task.wait()
+        if self.task.exc_info is None:
+            try:
+                api.glance.image_delete(self.request,
+                                        self.task.result.id)
+            except:
+                LOG.exception("Unable to delete discarded image %s."
+                              % self.task.result.id)
+        self.failed = True
+        self.save_progress(finished=True)
+
+
+class StreamedImageFile(UploadedFile):
+    """
+    Stands for an image file which was sent to glance as it was received,
+    the image being created by its ``upload``.
+    """
+    def __init__(self, upload, name, content_type, size, charset):
+        super(StreamedImageFile, self).__init__(None, name, content_type,
+                                                size, charset)
+        self.upload = upload
+
+    def open(self, mode=None):
+        raise IOError("The data of %s was sent to glance." % self.name)
+
+    def read(self, *args, **kwargs):
+        raise IOError("The data of %s was sent to glance." % self.name)
+
+
+class ImageUploadHandler(StreamingUploadHandler):
+    """
+    Streams the ``image_file`` of a create image form to glance as it's
+    received, together with the metadata given by the fields preceding
+    it in the request.
+
+    The file is left to the other upload handlers when the metadata is
+    incomplete or invalid at that point, or when the image is to be copied
+    from a location instead; the form is then handled as usual.
+    """
+    field_name = 'image_file'
+
+    def __init__(self, request, form_class):
+        super(ImageUploadHandler, self).__init__(request)
+        self.form_class = form_class
+        self.upload = None
+
+    def get_image_meta(self, fields):
+        """
+        Returns the metadata of the image given by the fields read so far,
+        or ``None`` if it can't be streamed to glance.
+        """
+        if fields.get('copy_from') or not self.check_csrf():
+            return None
+        form = self.form_class(self.request, fields)
+        data = {}
+        for name in form.meta_fields:
+            field = form.fields[name]
+            value = field.widget.value_from_datadict(form.data, form.files,
+                                                     form.add_prefix(name))
+            try:
+                data[name] = field.clean(value)
+            except ValidationError:
+                return None
+        return form.get_image_meta(data)
+
+    def new_file(self, field_name, *args, **kwargs):
+        super(ImageUploadHandler, self).new_file(field_name, *args, **kwargs)
+        if field_name != self.field_name or self.fields is None or \
+                not self.request.user.is_authenticated():
+            return
+        meta = self.get_image_meta(self.fields)
+        if meta is None:
+            return
+        self.upload = ImageUpload(self.request, meta,
+                                  self.request.GET.get('upload_id'),
+                                  self.content_length)
+        self.upload.start()
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.upload is None:
+            return raw_data
+        self.upload.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.upload is None:
+            return None
+        self.upload.end()
+        return StreamedImageFile(self.upload, self.file_name,
+                                 self.content_type, file_size, self.charset)
@@ -29,6 +29,7 @@ VIEWS_MOD = ('openstack_dashboard.dashboards.project'
 
 urlpatterns = patterns(VIEWS_MOD,
     url(r'^create/$', CreateView.as_view(), name='create'),
+    url(r'^upload_progress/$', 'upload_progress', name='upload_progress'),
     url(r'^(?P<image_id>[^/]+)/update/$', UpdateView.as_view(), name='update'),
     url(r'^(?P<image_id>[^/]+)/$', DetailView.as_view(), name='detail'),
 )
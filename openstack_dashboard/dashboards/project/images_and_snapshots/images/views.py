@@ -22,10 +22,15 @@
 Views for managing images.
 """
 
+import json
 import logging
 
+from django.conf import settings
 from django.core.urlresolvers import reverse, reverse_lazy
+from django import http
+from django.utils.decorators import method_decorator
 from django.utils.translation import ugettext_lazy as _
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 
 from horizon import exceptions
 from horizon import forms
@@ -35,6 +40,7 @@ from openstack_dashboard import api
 from .forms import UpdateImageForm
 from .forms import CreateImageForm
 from .tabs import ImageDetailTabs
+from . import uploads
 
 
 LOG = logging.getLogger(__name__)
@@ -46,6 +52,52 @@ class CreateView(forms.ModalFormView):
     context_object_name = 'image'
     success_url = reverse_lazy("horizon:project:images_and_snapshots:index")
 
+    @method_decorator(csrf_exempt)
+    def dispatch(self, request, *args, **kwargs):
+        # The upload handler has to be in place before the CSRF check reads
+        # the request, it checks the token itself before sending anything to
+        # glance. The image is deleted if the CSRF check rejects the request
+        # nevertheless.
+        if request.method == 'POST' and settings.HORIZON_IMAGES_ALLOW_UPLOAD:
+            request.upload_handlers.insert(
+                0, uploads.ImageUploadHandler(request, self.form_class))
+        self._csrf_passed = False
+        response = csrf_protect(self._dispatch)(request, *args, **kwargs)
+        if not self._csrf_passed:
+            self.discard_streamed_upload(request)
+        return response
+
+    def _dispatch(self, request, *args, **kwargs):
+        self._csrf_passed = True
+        return super(CreateView, self).dispatch(request, *args, **kwargs)
+
+    def discard_streamed_upload(self, request):
+        """ Deletes the image of an upload which won't be used. """
+        # Only look at the files if the request body was read.
+        if not hasattr(request, '_files'):
+            return
+        upload = getattr(request.FILES.get('image_file'), 'upload', None)
+        if upload is not None:
+            upload.discard()
+
+    def form_invalid(self, form):
+        self.discard_streamed_upload(self.request)
+        return super(CreateView, self).form_invalid(form)
+
+
+def upload_progress(request):
+    """
+    Responds with a JSON object holding the progress of the image upload
+    given by the ``upload_id`` parameter, as returned by
+    :func:`~.uploads.get_upload_progress`.
+    """
+    progress = uploads.get_upload_progress(request,
+                                           request.GET.get('upload_id'))
+    if progress is None:
+        raise http.Http404()
+    return http.HttpResponse(json.dumps(progress),
+                             content_type='application/json')
+
 
 class UpdateView(forms.ModalFormView):
     form_class = UpdateImageForm
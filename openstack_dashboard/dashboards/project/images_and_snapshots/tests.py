@@ -27,6 +27,8 @@ from mox import IsA
 from openstack_dashboard import api
 from openstack_dashboard.test import helpers as test
 
+from .views import IMAGE_EXCLUDES
+
 
 INDEX_URL = reverse('horizon:project:images_and_snapshots:index')
 
@@ -53,7 +55,9 @@ class ImagesAndSnapshotsTests(test.TestCase):
         api.cinder.volume_snapshot_list(IsA(http.HttpRequest)) \
                                 .AndReturn(volumes)
         api.glance.image_list_detailed(IsA(http.HttpRequest),
-                                       marker=None).AndReturn([images, False])
+                                       marker=None, paginate=True,
+                                       exclude=IMAGE_EXCLUDES) \
+            .AndReturn([images, False])
         api.glance.snapshot_list_detailed(IsA(http.HttpRequest), marker=None) \
                                 .AndReturn([snapshots, False])
         self.mox.ReplayAll()
@@ -61,10 +65,7 @@ class ImagesAndSnapshotsTests(test.TestCase):
         res = self.client.get(INDEX_URL)
         self.assertTemplateUsed(res, 'project/images_and_snapshots/index.html')
         self.assertIn('images_table', res.context)
-        images = res.context['images_table'].data
-        filter_func = lambda im: im.container_format not in ['aki', 'ari']
-        filtered_images = filter(filter_func, images)
-        self.assertItemsEqual(images, filtered_images)
+        self.assertItemsEqual(res.context['images_table'].data, images)
 
     @test.create_stubs({api.glance: ('image_list_detailed',
                                      'snapshot_list_detailed'),
@@ -85,7 +86,9 @@ class ImagesAndSnapshotsTests(test.TestCase):
         api.cinder.volume_snapshot_list(IsA(http.HttpRequest)) \
                                 .AndReturn(volumes)
         api.glance.image_list_detailed(IsA(http.HttpRequest),
-                                       marker=None).AndReturn([(), False])
+                                       marker=None, paginate=True,
+                                       exclude=IMAGE_EXCLUDES) \
+            .AndReturn([(), False])
         api.glance.snapshot_list_detailed(IsA(http.HttpRequest), marker=None) \
                                 .AndReturn([self.snapshots.list(), False])
         self.mox.ReplayAll()
@@ -112,7 +115,8 @@ class ImagesAndSnapshotsTests(test.TestCase):
         api.cinder.volume_snapshot_list(IsA(http.HttpRequest)) \
                                 .AndReturn(volumes)
         api.glance.image_list_detailed(IsA(http.HttpRequest),
-                                       marker=None) \
+                                       marker=None, paginate=True,
+                                       exclude=IMAGE_EXCLUDES) \
                                 .AndRaise(self.exceptions.glance)
         api.glance.snapshot_list_detailed(IsA(http.HttpRequest), marker=None) \
                                 .AndReturn([self.snapshots.list(), False])
@@ -142,7 +146,9 @@ class ImagesAndSnapshotsTests(test.TestCase):
         api.cinder.volume_snapshot_list(IsA(http.HttpRequest)) \
             .AndReturn(volumes)
         api.glance.image_list_detailed(IsA(http.HttpRequest),
-                                       marker=None).AndReturn([images, False])
+                                       marker=None, paginate=True,
+                                       exclude=IMAGE_EXCLUDES) \
+            .AndReturn([images, False])
         api.glance.snapshot_list_detailed(IsA(http.HttpRequest), marker=None) \
             .AndReturn([snapshots, False])
         self.mox.ReplayAll()
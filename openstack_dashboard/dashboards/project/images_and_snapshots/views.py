@@ -40,10 +40,15 @@ from .volume_snapshots.tabs import SnapshotDetailTabs
 
 LOG = logging.getLogger(__name__)
 
+# Kernel and ramdisk images and snapshots aren't listed as images.
+IMAGE_EXCLUDES = {'container_format': ('aki', 'ari'),
+                  'property-image_type': ('snapshot',)}
+
 
 class IndexView(tables.MultiTableView):
     table_classes = (ImagesTable, SnapshotsTable, VolumeSnapshotsTable)
     template_name = 'project/images_and_snapshots/index.html'
+    concurrent_data_load = True
 
     def has_more_data(self, table):
         return getattr(self, "_more_%s" % table.name, False)
@@ -51,14 +56,10 @@ class IndexView(tables.MultiTableView):
     def get_images_data(self):
         marker = self.request.GET.get(ImagesTable._meta.pagination_param, None)
         try:
-            # FIXME(gabriel): The paging is going to be strange here due to
-            # our filtering after the fact.
-            (all_images,
-             self._more_images) = api.glance.image_list_detailed(self.request,
-                                                                 marker=marker)
-            images = [im for im in all_images
-                      if im.container_format not in ['aki', 'ari'] and
-                      im.properties.get("image_type", '') != "snapshot"]
+            (images,
+             self._more_images) = api.glance.image_list_detailed(
+                 self.request, marker=marker, paginate=True,
+                 exclude=IMAGE_EXCLUDES)
         except:
             images = []
             exceptions.handle(self.request, _("Unable to retrieve images."))
@@ -26,6 +26,8 @@ from openstack_dashboard import api
 from openstack_dashboard.api import cinder
 from openstack_dashboard.test import helpers as test
 
+from ..views import IMAGE_EXCLUDES
+
 
 INDEX_URL = reverse('horizon:project:images_and_snapshots:index')
 
@@ -70,14 +72,18 @@ class VolumeSnapshotsViewTests(test.TestCase):
         snapshot = self.volume_snapshots.first()
 
         api.glance.image_list_detailed(IsA(http.HttpRequest),
-                                       marker=None).AndReturn(([], False))
+                                       marker=None, paginate=True,
+                                       exclude=IMAGE_EXCLUDES) \
+            .AndReturn(([], False))
         api.glance.snapshot_list_detailed(IsA(http.HttpRequest),
                                           marker=None).AndReturn(([], False))
         api.cinder.volume_snapshot_list(IsA(http.HttpRequest)). \
             AndReturn(vol_snapshots)
         api.cinder.volume_snapshot_delete(IsA(http.HttpRequest), snapshot.id)
         api.glance.image_list_detailed(IsA(http.HttpRequest),
-                                       marker=None).AndReturn(([], False))
+                                       marker=None, paginate=True,
+                                       exclude=IMAGE_EXCLUDES) \
+            .AndReturn(([], False))
         api.glance.snapshot_list_detailed(IsA(http.HttpRequest),
                                           marker=None).AndReturn(([], False))
         api.cinder.volume_snapshot_list(IsA(http.HttpRequest)). \
@@ -20,6 +20,7 @@ from django import shortcuts
 from django import template
 from django.core import urlresolvers
 from django.template.defaultfilters import title
+from django.utils.datastructures import SortedDict
 from django.utils.http import urlencode
 from django.utils.translation import string_concat, ugettext_lazy as _
 
@@ -73,6 +74,7 @@ class TerminateInstance(tables.BatchAction):
     data_type_singular = _("Instance")
     data_type_plural = _("Instances")
     classes = ('btn-danger', 'btn-terminate')
+    concurrent = True
 
     def allowed(self, request, instance=None):
         return True
@@ -373,6 +375,7 @@ class SimpleDisassociateIP(tables.Action):
 
 class UpdateRow(tables.Row):
     ajax = True
+    event_channel = "instances"
 
     def get_data(self, request, instance_id):
         instance = api.nova.server_get(request, instance_id)
@@ -380,6 +383,43 @@ class UpdateRow(tables.Row):
                                                    instance.flavor["id"])
         return instance
 
+    def get_bulk_data(self, request, instance_ids):
+        # A single call lists all of the project's instances.
+        listed = dict([(instance.id, instance)
+                       for instance in api.nova.server_list(request)])
+        return self.load_instances(request, instance_ids, listed)
+
+    def load_instances(self, request, instance_ids, listed):
+        """
+        Returns the instances with the given ids, taking them from the
+        ``listed`` dict where possible and otherwise fetching them (which
+        tells apart the deleted ones), along with their flavors.
+        """
+        unlisted = api.base.RelatedResources(
+            [instance_id for instance_id in instance_ids
+             if instance_id not in listed],
+            lambda instance_id: api.nova.server_get(request, instance_id))
+        instances = []
+        for instance_id in instance_ids:
+            try:
+                instances.append(listed.get(instance_id, None) or
+                                 unlisted[instance_id])
+            except exceptions.NOT_FOUND:
+                # Deleted instances are left out.
+                pass
+        flavors = SortedDict([(flavor.id, flavor) for flavor
+                              in api.nova.flavor_list(request)])
+        flavors = api.base.RelatedResources(
+            [instance.flavor["id"] for instance in instances],
+            lambda flavor_id: api.nova.flavor_get(request, flavor_id),
+            known=flavors)
+        for instance in instances:
+            try:
+                instance.full_flavor = flavors[instance.flavor["id"]]
+            except:
+                exceptions.handle(request, ignore=True)
+        return instances
+
 
 def get_ips(instance):
     template_name = 'project/instances/_instance_ips.html'
@@ -18,6 +18,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import json
 import uuid
 
 from django import http
@@ -34,6 +35,7 @@ from openstack_dashboard.usage import quotas
 from .tables import LaunchLink
 from .tabs import InstanceDetailTabs
 from .workflows import LaunchInstance
+from ..images_and_snapshots.views import IMAGE_EXCLUDES
 
 
 INDEX_URL = reverse('horizon:project:instances:index')
@@ -62,6 +64,28 @@ class InstanceTests(test.TestCase):
 
         self.assertItemsEqual(instances, self.servers.list())
 
+    @test.create_stubs({api.nova: ('flavor_list', 'server_list',
+                                   'server_get')})
+    def test_bulk_row_update(self):
+        servers = self.servers.list()
+        api.nova.server_list(IsA(http.HttpRequest)).AndReturn(servers)
+        api.nova.server_get(IsA(http.HttpRequest), 'deleted') \
+            .AndRaise(self.exceptions.nova_not_found)
+        api.nova.flavor_list(IsA(http.HttpRequest)) \
+            .AndReturn(self.flavors.list())
+        self.mox.ReplayAll()
+
+        params = [('table', 'instances'), ('action', 'rows_update'),
+                  ('obj_id', servers[0].id), ('obj_id', 'deleted')]
+        res = self.client.get(reverse('horizon:project:instances:index'),
+                              params,
+                              HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        data = json.loads(res.content)
+        self.assertEqual(data['rows'].keys(), [servers[0].id])
+        self.assertIn(servers[0].name, data['rows'][servers[0].id])
+        self.assertEqual(data['deleted'], ['deleted'])
+        self.assertEqual(data['failed'], [])
+
     @test.create_stubs({api.nova: ('server_list',
                                    'tenant_absolute_limits')})
     def test_index_server_list_exception(self):
@@ -90,9 +114,11 @@ class InstanceTests(test.TestCase):
         api.nova.server_list(IsA(http.HttpRequest)).AndReturn(servers)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndRaise(self.exceptions.nova)
-        for server in servers:
-            api.nova.flavor_get(IsA(http.HttpRequest), server.flavor["id"]). \
-                                AndReturn(full_flavors[server.flavor["id"]])
+        # Each flavor is fetched once, however many servers use it.
+        flavor_ids = SortedDict([(s.flavor["id"], s) for s in servers])
+        for flavor_id in flavor_ids:
+            api.nova.flavor_get(IsA(http.HttpRequest), flavor_id). \
+                                AndReturn(full_flavors[flavor_id])
         api.nova.tenant_absolute_limits(IsA(http.HttpRequest), reserved=True) \
            .MultipleTimes().AndReturn(self.limits['absolute'])
 
@@ -608,7 +634,9 @@ class InstanceTests(test.TestCase):
         api.glance.snapshot_list_detailed(IsA(http.HttpRequest),
                                           marker=None).AndReturn([[], False])
         api.glance.image_list_detailed(IsA(http.HttpRequest),
-                                       marker=None).AndReturn([[], False])
+                                       marker=None, paginate=True,
+                                       exclude=IMAGE_EXCLUDES) \
+            .AndReturn([[], False])
         cinder.volume_snapshot_list(IsA(http.HttpRequest)).AndReturn([])
 
         self.mox.ReplayAll()
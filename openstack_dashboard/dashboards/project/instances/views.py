@@ -66,17 +66,18 @@ class IndexView(tables.DataTableView):
 
             full_flavors = SortedDict([(str(flavor.id), flavor)
                                         for flavor in flavors])
+            # Flavors missing from the list (e.g. deleted ones) are fetched
+            # via nova api, once per flavor rather than once per instance.
+            full_flavors = api.base.RelatedResources(
+                [instance.flavor["id"] for instance in instances],
+                lambda flavor_id: api.nova.flavor_get(self.request,
+                                                      flavor_id),
+                known=full_flavors)
             # Loop through instances to get flavor info.
             for instance in instances:
                 try:
                     flavor_id = instance.flavor["id"]
-                    if flavor_id in full_flavors:
-                        instance.full_flavor = full_flavors[flavor_id]
-                    else:
-                        # If the flavor_id is not in full_flavors list,
-                        # get it via nova api.
-                        instance.full_flavor = api.nova.flavor_get(
-                            self.request, flavor_id)
+                    instance.full_flavor = full_flavors[flavor_id]
                 except:
                     msg = _('Unable to retrieve instance size information.')
                     exceptions.handle(self.request, msg)
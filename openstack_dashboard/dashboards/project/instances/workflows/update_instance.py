@@ -18,6 +18,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from functools import partial
 
 from django.utils.translation import ugettext as _
 from django.core.urlresolvers import reverse
@@ -83,26 +84,21 @@ class UpdateInstanceSecurityGroupsAction(workflows.Action):
                                          % instance_id))
             return False
 
-        current_group_names = set(map(lambda g: g.name, current_groups))
-        groups_to_add = wanted_groups - current_group_names
-        groups_to_remove = current_group_names - wanted_groups
-
-        num_groups_to_modify = len(groups_to_add | groups_to_remove)
+        groups = workflows.MembershipDiff([group.name for group
+                                           in current_groups],
+                                          wanted_groups)
         try:
-            for group in groups_to_add:
-                api.nova.server_add_security_group(request,
-                                                   instance_id,
-                                                   group)
-                num_groups_to_modify -= 1
-            for group in groups_to_remove:
-                api.nova.server_remove_security_group(request,
-                                                      instance_id,
-                                                      group)
-                num_groups_to_modify -= 1
+            # Nova updates the security groups of an instance one at a time,
+            # so concurrent changes to the same instance would race.
+            groups.apply(partial(api.nova.server_add_security_group,
+                                 request, instance_id),
+                         partial(api.nova.server_remove_security_group,
+                                 request, instance_id),
+                         concurrent=False)
         except Exception:
             exceptions.handle(request, _('Failed to modify %d instance '
                                          'security groups.'
-                                         % num_groups_to_modify))
+                                         % len(groups.failures)))
             return False
 
         return True
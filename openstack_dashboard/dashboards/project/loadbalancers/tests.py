@@ -37,29 +37,22 @@ class LoadBalancerTests(test.TestCase):
 
     def set_up_expect(self):
         # retrieve pools
-        subnet = self.subnets.first()
-
-        vip1 = self.vips.first()
-
-        vip2 = self.vips.list()[1]
-
         api.lbaas.pools_get(
             IsA(http.HttpRequest)).AndReturn(self.pools.list())
 
-        api.lbaas.vip_get(IsA(http.HttpRequest), vip1.id).AndReturn(vip1)
-        api.lbaas.vip_get(IsA(http.HttpRequest), vip2.id).AndReturn(vip2)
+        # their subnets and vips are listed once
+        api.quantum.subnet_list(
+            IsA(http.HttpRequest)).AndReturn(self.subnets.list())
+        api.lbaas.vips_get(
+            IsA(http.HttpRequest)).AndReturn(self.vips.list())
 
         # retrieves members
         api.lbaas.members_get(
             IsA(http.HttpRequest)).AndReturn(self.members.list())
 
-        pool1 = self.pools.first()
-        pool2 = self.pools.list()[1]
-
-        api.lbaas.pool_get(IsA(http.HttpRequest),
-                           self.members.list()[0].pool_id).AndReturn(pool1)
-        api.lbaas.pool_get(IsA(http.HttpRequest),
-                           self.members.list()[1].pool_id).AndReturn(pool2)
+        # their pools are listed once
+        api.lbaas.pools_get(
+            IsA(http.HttpRequest)).AndReturn(self.pools.list())
 
         # retrieves monitors
         api.lbaas.pool_health_monitors_get(
@@ -73,10 +66,10 @@ class LoadBalancerTests(test.TestCase):
         api.lbaas.pool_health_monitors_get(
             IsA(http.HttpRequest)).AndRaise(self.exceptions.quantum)
 
-    @test.create_stubs({api.lbaas: ('pools_get', 'vip_get',
-                                    'members_get', 'pool_get',
+    @test.create_stubs({api.lbaas: ('pools_get', 'vips_get',
+                                    'members_get',
                                     'pool_health_monitors_get'),
-                        api.quantum: ('subnet_get',)})
+                        api.quantum: ('subnet_list',)})
     def test_index_pools(self):
         self.set_up_expect()
 
@@ -89,11 +82,14 @@ class LoadBalancerTests(test.TestCase):
         self.assertTemplateUsed(res, 'horizon/common/_detail_table.html')
         self.assertEqual(len(res.context['table'].data),
                          len(self.pools.list()))
+        pool = res.context['table'].data[0]
+        self.assertEqual(pool.subnet_name, self.subnets.first().cidr)
+        self.assertEqual(pool.vip_name, self.vips.first().name)
 
-    @test.create_stubs({api.lbaas: ('pools_get', 'vip_get',
-                                    'members_get', 'pool_get',
+    @test.create_stubs({api.lbaas: ('pools_get', 'vips_get',
+                                    'members_get',
                                     'pool_health_monitors_get'),
-                        api.quantum: ('subnet_get',)})
+                        api.quantum: ('subnet_list',)})
     def test_index_members(self):
         self.set_up_expect()
 
@@ -107,10 +103,10 @@ class LoadBalancerTests(test.TestCase):
         self.assertEqual(len(res.context['memberstable_table'].data),
                               len(self.members.list()))
 
-    @test.create_stubs({api.lbaas: ('pools_get', 'vip_get',
-                                    'pool_health_monitors_get',
-                                    'members_get', 'pool_get'),
-                        api.quantum: ('subnet_get',)})
+    @test.create_stubs({api.lbaas: ('pools_get', 'vips_get',
+                                    'members_get',
+                                    'pool_health_monitors_get'),
+                        api.quantum: ('subnet_list',)})
     def test_index_monitors(self):
         self.set_up_expect()
 
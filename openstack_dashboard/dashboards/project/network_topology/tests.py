@@ -0,0 +1,98 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+import json
+
+from django.core.urlresolvers import reverse
+
+from openstack_dashboard.test import helpers as test
+
+
+JSON_URL = reverse('horizon:project:network_topology:json')
+
+
+class NetworkTopologyTests(test.APITestCase):
+    def _stub_lists(self, servers, ports):
+        novaclient = self.stub_novaclient()
+        if not hasattr(novaclient, 'servers'):
+            novaclient.servers = self.mox.CreateMockAnything()
+        novaclient.servers.list().AndReturn(servers)
+        quantumclient = self.stub_quantumclient()
+        quantumclient.list_networks().AndReturn(
+            {'networks': copy.deepcopy(self.api_networks.list())})
+        quantumclient.list_subnets().AndReturn(
+            {'subnets': copy.deepcopy(self.api_subnets.list())})
+        quantumclient.list_ports().AndReturn(
+            {'ports': copy.deepcopy(ports)})
+        quantumclient.list_routers().AndReturn(
+            {'routers': copy.deepcopy(self.api_routers.list())})
+
+    def test_json_view(self):
+        self._stub_lists(self.servers.list(), self.api_ports.list())
+        self.mox.ReplayAll()
+
+        data = json.loads(self.client.get(JSON_URL).content)
+        self.assertEqual(len(data['servers']), len(self.servers.list()))
+        # External networks come first.
+        self.assertTrue(data['networks'][0]['router:external'])
+        own_networks = [network for network in data['networks']
+                        if network['tenant_id'] == self.tenant.id]
+        for network in own_networks:
+            self.assertEqual(network['url'],
+                             reverse('horizon:project:networks:detail',
+                                     args=[network['id']]))
+        # Both routers get a port on the external network, which the user
+        # can't see.
+        fake_ports = [port for port in data['ports']
+                      if port['id'].startswith('fake')]
+        self.assertItemsEqual([port['device_id'] for port in fake_ports],
+                              [router['id'] for router
+                               in self.api_routers.list()])
+
+        # The topology is cached, so no more API calls are made.
+        cached = json.loads(self.client.get(JSON_URL).content)
+        self.assertEqual(cached, data)
+
+    def test_json_view_changes(self):
+        servers = self.servers.list()
+        ports = self.api_ports.list()
+        self._stub_lists(servers, ports)
+        changed_server = copy.copy(servers[0])
+        changed_server.status = "SHUTOFF"
+        self._stub_lists([changed_server] + servers[1:], ports[1:])
+        self.mox.ReplayAll()
+
+        with self.settings(API_CATALOG_CACHE_TIMEOUTS={'topology': 0}):
+            data = json.loads(self.client.get(JSON_URL).content)
+            changes = json.loads(self.client.get(
+                                    JSON_URL,
+                                    {'since': data['version']}).content)
+        self.assertNotEqual(changes['version'], data['version'])
+        self.assertEqual(changes['since'], data['version'])
+        self.assertEqual([server['status'] for server
+                          in changes['changed']['servers']], ['SHUTOFF'])
+        self.assertEqual(changes['removed']['ports'], [ports[0]['id']])
+        for collection in ('networks', 'subnets', 'ports', 'routers'):
+            self.assertEqual(changes['changed'][collection], [])
+        self.assertEqual(changes['removed']['servers'], [])
+
+    def test_json_view_unknown_version(self):
+        self._stub_lists(self.servers.list(), self.api_ports.list())
+        self.mox.ReplayAll()
+
+        data = json.loads(self.client.get(JSON_URL,
+                                          {'since': 'gone-3'}).content)
+        self.assertNotIn('changed', data)
+        self.assertEqual(len(data['routers']), len(self.api_routers.list()))
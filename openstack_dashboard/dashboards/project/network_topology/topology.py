@@ -0,0 +1,209 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Assembles the network topology of a project and tracks how it changes.
+
+The servers, networks, subnets, ports and routers of a project are fetched
+concurrently and the resulting graph is cached for a few seconds (the
+``topology`` entry of ``API_CATALOG_CACHE_TIMEOUTS``), so the browsers of
+the project's members share a single set of API calls.
+
+Each time the graph is rebuilt its version is increased, and every resource
+records the version in which it last changed. This lets a browser which
+already has version ``n`` ask for only the resources which changed or were
+removed since then.
+"""
+
+import hashlib
+import time
+import uuid
+
+from django.core.urlresolvers import reverse
+
+from horizon.utils import concurrency
+
+from openstack_dashboard import api
+
+
+COLLECTIONS = ('servers', 'networks', 'subnets', 'ports', 'routers')
+
+# Removals are remembered for this many versions; browsers lagging further
+# behind are sent the whole graph.
+HISTORY = 100
+
+# The tracked state outlives the cached graph so that diffs can still be
+# computed after it is rebuilt.
+STATE_TIMEOUT = 60 * 60
+
+RESOURCE_VIEWS = {'servers': 'horizon:project:instances:detail',
+                  'networks': 'horizon:project:networks:detail',
+                  'ports': 'horizon:project:networks:ports:detail',
+                  'routers': 'horizon:project:routers:detail'}
+
+
+def _list_servers(request):
+    servers = api.nova.novaclient(request).servers.list()
+    return [{'name': server.name,
+             'status': server.status,
+             'id': server.id} for server in servers]
+
+
+def _list_quantum(request, collection):
+    # Quantum resources are plain dicts already.
+    client = api.quantum.quantumclient(request)
+    return getattr(client, 'list_%s' % collection)().get(collection, [])
+
+
+def fetch(request):
+    """ Fetches the project's resources and returns them as a graph. """
+    servers, networks, subnets, ports, routers = \
+        concurrency.run_concurrently(
+            [lambda: _list_servers(request)] +
+            [lambda name=name: _list_quantum(request, name)
+             for name in COLLECTIONS[1:]])
+
+    graph = {'servers': servers,
+             'networks': sorted(networks,
+                                key=lambda x: x.get('router:external'),
+                                reverse=True),
+             'subnets': subnets,
+             'ports': ports,
+             'routers': routers}
+    tenant_id = request.user.tenant_id
+    for collection, view in RESOURCE_VIEWS.items():
+        for resource in graph[collection]:
+            if (resource.get('tenant_id')
+                    and tenant_id != resource.get('tenant_id')):
+                continue
+            resource['url'] = reverse(view, None, [str(resource['id'])])
+
+    # Users can't see the ports of external networks, so a fake port is
+    # added for router gateways which have no visible port.
+    router_ports = set((port['device_id'], port['network_id'])
+                       for port in ports)
+    for router in routers:
+        external_network = (router.get('external_gateway_info') or {}) \
+            .get('network_id')
+        if not external_network:
+            continue
+        if (router['id'], external_network) in router_ports:
+            continue
+        ports.append({'id': 'fake%s%s' % (router['id'], external_network),
+                      'network_id': external_network,
+                      'device_id': router['id'],
+                      'fixed_ips': []})
+    return graph
+
+
+def _cache_key(request):
+    # Administrators see the resources of other projects, so the graph is
+    # only shared between users of a project with the same roles.
+    roles = sorted(role['name'] for role in request.user.roles)
+    return "horizon:topology:%s:%s" % (request.user.tenant_id,
+                                       hashlib.md5(repr(roles)).hexdigest())
+
+
+def _update(state, graph):
+    """ Applies a newly fetched graph to the tracked state. """
+    version = state['version'] + 1
+    for collection in COLLECTIONS:
+        old = state['resources'].get(collection, {})
+        new = {}
+        for index, resource in enumerate(graph[collection]):
+            previous = old.get(resource['id'])
+            changed = previous is None or previous[2] != resource
+            new[resource['id']] = (version if changed else previous[0],
+                                   index, resource)
+        removed = state['removed'].setdefault(collection, {})
+        for resource_id in old:
+            if resource_id not in new:
+                removed[resource_id] = version
+        for resource_id in new:
+            removed.pop(resource_id, None)
+        state['resources'][collection] = new
+    # Forget the removals which are too old to be asked about.
+    state['floor'] = max(state['floor'], version - HISTORY)
+    for removed in state['removed'].values():
+        for resource_id, removed_in in removed.items():
+            if removed_in <= state['floor']:
+                del removed[resource_id]
+    state['version'] = version
+    state['fetched'] = time.time()
+
+
+def _version_number(state, version):
+    """
+    Returns the number of a version string of the tracked state, or ``None``
+    if it doesn't belong to it (e.g. the state was evicted from the cache).
+    """
+    try:
+        state_id, number = version.rsplit("-", 1)
+        number = int(number)
+    except (AttributeError, ValueError):
+        return None
+    if state_id != state['id'] or not state['floor'] <= number <= \
+            state['version']:
+        return None
+    return number
+
+
+def get_topology(request, since=None):
+    """
+    Returns the project's topology as a dict holding its ``version`` and,
+    for each collection, the list of resources.
+
+    When ``since`` is a version the caller already has, the dict holds the
+    resources which were added or ``changed`` since then and the ids of
+    those ``removed`` instead, keyed by collection. Versions which are too
+    old (or unknown) get the whole topology.
+    """
+    backend = api.base.catalog_cache.backend
+    key = _cache_key(request)
+    state = backend.get(key) or {'id': uuid.uuid4().hex[:8],
+                                 'version': 0,
+                                 'floor': 0,
+                                 'fetched': None,
+                                 'resources': {},
+                                 'removed': {}}
+    ttl = api.base.catalog_cache.timeout('topology')
+    if state['fetched'] is None or time.time() - state['fetched'] >= ttl:
+        _update(state, fetch(request))
+        backend.set(key, state, STATE_TIMEOUT)
+
+    version = "%s-%s" % (state['id'], state['version'])
+    resources = state['resources']
+    since_number = _version_number(state, since)
+    if since_number is not None:
+        changed = {}
+        for collection in COLLECTIONS:
+            changed[collection] = [
+                item[2] for item in sorted(resources[collection].values(),
+                                           key=lambda item: item[1])
+                if item[0] > since_number]
+        removed = dict((collection, [resource_id for resource_id, removed_in
+                                     in state['removed'][collection].items()
+                                     if removed_in > since_number])
+                       for collection in COLLECTIONS)
+        return {'version': version,
+                'since': since,
+                'changed': changed,
+                'removed': removed}
+
+    topology = {'version': version}
+    for collection in COLLECTIONS:
+        topology[collection] = [item[2] for item in
+                                sorted(resources[collection].values(),
+                                       key=lambda item: item[1])]
+    return topology
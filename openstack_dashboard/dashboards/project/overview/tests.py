@@ -92,6 +92,16 @@ class UsageViewTests(test.TestCase):
                               "?format=csv")
         self.assertTemplateUsed(res, 'project/overview/usage.csv')
         self.assertTrue(isinstance(res.context['usage'], usage.TenantUsage))
+        hdr = 'Name,VCPUs,RamMB,DiskGB,Usage(Hours),Uptime(Seconds),State'
+        server = usage_obj.server_usages[0]
+        row = '%s,%s,%s,%s,%.2f,%s,%s' % (server['name'],
+                                          server['vcpus'],
+                                          server['memory_mb'],
+                                          server['local_gb'],
+                                          server['hours'],
+                                          server['uptime'],
+                                          server['state'].capitalize())
+        self.assertContains(res, '\n\n%s\n%s\n' % (hdr, row))
 
     def test_usage_exception_usage(self):
         now = timezone.now()
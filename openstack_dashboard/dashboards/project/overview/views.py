@@ -18,15 +18,34 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from django.template.defaultfilters import capfirst
 from django.views.generic import TemplateView
 
+from horizon.utils import csvbase
+
 from openstack_dashboard import usage
 
 
+class ProjectUsageCsvRenderer(csvbase.BaseCsvResponse):
+    columns = ('Name', 'VCPUs', 'RamMB', 'DiskGB', 'Usage(Hours)',
+               'Uptime(Seconds)', 'State')
+
+    def get_row_data(self):
+        for s in self.context['usage'].get_instances():
+            yield (s['name'],
+                   s['vcpus'],
+                   s['memory_mb'],
+                   s['local_gb'],
+                   '%.2f' % s['hours'],
+                   s['uptime'],
+                   capfirst(s['state']))
+
+
 class ProjectOverview(usage.UsageView):
     table_class = usage.TenantUsageTable
     usage_class = usage.TenantUsage
     template_name = 'project/overview/usage.html'
+    csv_response_class = ProjectUsageCsvRenderer
 
     def get_data(self):
         super(ProjectOverview, self).get_data()
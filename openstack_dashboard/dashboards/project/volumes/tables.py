@@ -38,6 +38,7 @@ class DeleteVolume(tables.DeleteAction):
     data_type_singular = _("Volume")
     data_type_plural = _("Volumes")
     action_past = _("Scheduled deletion of")
+    concurrent = True
 
     def delete(self, request, obj_id):
         obj = self.table.get_object_by_id(obj_id)
@@ -20,6 +20,8 @@
 
 from __future__ import absolute_import
 
+from novaclient.v1_1 import flavors as nova_flavors
+
 from horizon import exceptions
 
 from openstack_dashboard.test import helpers as test
@@ -147,3 +149,114 @@ class ApiHelperTests(test.TestCase):
                          'Select a new nonexistent service catalog key')
         with self.assertRaises(exceptions.ServiceCatalogException):
             url = api_base.url_for(self.request, 'notAnApi')
+
+
+class ClientCacheTests(test.TestCase):
+    def setUp(self):
+        super(ClientCacheTests, self).setUp()
+        self.cache = api_base.ClientCache()
+
+    def test_cached_client_reused(self):
+        created = []
+
+        def factory():
+            created.append(object())
+            return created[-1]
+
+        first = self.cache.get(('compute', 'url', 'token'), factory)
+        second = self.cache.get(('compute', 'url', 'token'), factory)
+        self.assertIs(first, second)
+        self.assertEqual(len(created), 1)
+
+        other = self.cache.get(('compute', 'url', 'other_token'), factory)
+        self.assertIsNot(first, other)
+        self.assertEqual(len(created), 2)
+
+    def test_idle_clients_evicted(self):
+        with self.settings(API_CLIENT_CACHE_TIMEOUT=60):
+            self.cache.clients[('image', 'url', 'token')] = (object(), 0)
+            self.cache.evict(now=61)
+            self.assertEqual(self.cache.clients, {})
+
+    def test_cache_size_limit(self):
+        with self.settings(API_CLIENT_CACHE_SIZE=2):
+            for i in range(3):
+                self.cache.clients[('volume', 'url', i)] = (object(), i)
+            self.cache.evict(now=3)
+            self.assertEqual(len(self.cache.clients), 2)
+            self.assertNotIn(('volume', 'url', 0), self.cache.clients)
+
+    def test_cache_disabled(self):
+        with self.settings(API_CLIENT_CACHE_SIZE=0):
+            first = self.cache.get(('network', 'url', 'token'), object)
+            second = self.cache.get(('network', 'url', 'token'), object)
+            self.assertIsNot(first, second)
+
+
+class RelatedResourcesTests(test.TestCase):
+    def test_distinct_missing_ids_fetched_once(self):
+        fetched = []
+
+        def fetch(resource_id):
+            fetched.append(resource_id)
+            return resource_id.upper()
+
+        related = api_base.RelatedResources(['a', 'b', 'a', 'c', 'b'],
+                                            fetch, known={'c': 'known'})
+        self.assertEqual(fetched, ['a', 'b'])
+        self.assertEqual(related['a'], 'A')
+        self.assertEqual(related['b'], 'B')
+        self.assertEqual(related['c'], 'known')
+        self.assertNotIn('d', related)
+
+    def test_failed_fetch_reraised_on_lookup(self):
+        def fetch(resource_id):
+            if resource_id == 'bad':
+                raise exceptions.NotFound()
+            return resource_id
+
+        related = api_base.RelatedResources(['good', 'bad'], fetch)
+        self.assertEqual(related['good'], 'good')
+        self.assertNotIn('bad', related)
+        with self.assertRaises(exceptions.NotFound):
+            related['bad']
+
+
+class CatalogCacheTests(test.TestCase):
+    def setUp(self):
+        super(CatalogCacheTests, self).setUp()
+        self.cache = api_base.CatalogCache()
+        self.fetched = 0
+
+    def fetch(self):
+        self.fetched += 1
+        return [self.flavors.first()]
+
+    def test_hits_and_misses(self):
+        key = ('url', 'tenant')
+        flavors = self.cache.get('flavors', key, self.fetch)
+        manager = nova_flavors.FlavorManager(None)
+        cached = self.cache.get('flavors', key, self.fetch,
+                                manager=lambda: manager)
+        self.assertEqual(self.fetched, 1)
+        self.assertEqual(cached, flavors)
+        self.assertEqual(cached[0].name, flavors[0].name)
+        self.assertIs(cached[0].manager, manager)
+        self.assertEqual(self.cache.stats['flavors'],
+                         {'hits': 1, 'misses': 1})
+
+        self.cache.get('flavors', ('url', 'other_tenant'), self.fetch)
+        self.assertEqual(self.fetched, 2)
+
+    def test_invalidate(self):
+        self.cache.get('flavors', ('url',), self.fetch)
+        self.cache.invalidate('flavors')
+        self.cache.get('flavors', ('url',), self.fetch)
+        self.assertEqual(self.fetched, 2)
+
+    def test_cache_disabled(self):
+        with self.settings(API_CATALOG_CACHE_TIMEOUTS={'flavors': 0}):
+            self.cache.get('flavors', ('url',), self.fetch)
+            self.cache.get('flavors', ('url',), self.fetch)
+        self.assertEqual(self.fetched, 2)
+        self.assertNotIn('flavors', self.cache.stats)
@@ -18,9 +18,17 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
+
 from django.conf import settings
 from django.test.utils import override_settings
 
+import glanceclient as glance_client
+from mox import IsA
+
+from horizon import exceptions
+from horizon.utils import jobs
+
 from openstack_dashboard import api
 from openstack_dashboard.test import helpers as test
 
@@ -44,6 +52,27 @@ class GlanceApiTests(test.APITestCase):
         self.assertItemsEqual(images, api_images)
         self.assertFalse(has_more)
 
+    def test_image_list_detailed_cached_per_roles(self):
+        api_images = self.images.list()
+        limit = getattr(settings, 'API_RESULT_LIMIT', 1000)
+
+        glanceclient = self.stub_glanceclient()
+        glanceclient.images = self.mox.CreateMockAnything()
+        for i in range(2):
+            glanceclient.images.list(page_size=limit,
+                                     limit=limit,
+                                     filters={}).AndReturn(iter(api_images))
+        self.mox.ReplayAll()
+
+        self.request.user.roles = [self.roles.admin._info]
+        api.glance.image_list_detailed(self.request)
+        api.glance.image_list_detailed(self.request)
+        # The listing of an admin isn't shown to the other members of the
+        # project.
+        self.request.user.roles = [self.roles.member._info]
+        images, has_more = api.glance.image_list_detailed(self.request)
+        self.assertItemsEqual(images, api_images)
+
     def test_snapshot_list_detailed(self):
         # The total image count is under page size, should return all images.
         api_images = self.images.list()
@@ -119,3 +148,144 @@ class GlanceApiTests(test.APITestCase):
         self.assertTrue(has_more)
         self.assertEqual(len(list(images_iter)),
                          len(api_images) - len(expected_images) - 1)
+
+    @override_settings(API_RESULT_PAGE_SIZE=1)
+    def test_image_list_detailed_exclude(self):
+        # Excluded images are skipped as they stream past, and only as many
+        # images are read as needed to fill the page.
+        page_size = settings.API_RESULT_PAGE_SIZE
+        limit = getattr(settings, 'API_RESULT_LIMIT', 1000)
+        exclude = {'container_format': ('aki', 'ari')}
+
+        api_images = self.images.list()
+        images_iter = iter(api_images)
+        expected = [image for image in api_images
+                    if image.container_format not in ('aki', 'ari')]
+
+        glanceclient = self.stub_glanceclient()
+        glanceclient.images = self.mox.CreateMockAnything()
+        glanceclient.images.list(limit=limit,
+                                 page_size=page_size + 1,
+                                 filters={}).AndReturn(images_iter)
+        self.mox.ReplayAll()
+
+        images, has_more = api.glance.image_list_detailed(self.request,
+                                                          paginate=True,
+                                                          exclude=exclude)
+        self.assertEqual(images, expected[:page_size])
+        self.assertTrue(has_more)
+        # Reading stops at the image after the page.
+        consumed = api_images.index(expected[page_size]) + 1
+        self.assertEqual(len(list(images_iter)), len(api_images) - consumed)
+
+    def test_image_data_back_pressure(self):
+        data = api.glance.ImageData(max_chunks=2, timeout=0.1)
+        data.write('a' * 3)
+        data.write('b' * 3)
+        # The writer waits while the buffer is full, and gives up once the
+        # reader doesn't move.
+        self.assertRaises(IOError, data.write, 'c')
+        self.assertEqual(data.read(2), 'aa')
+        self.assertEqual(data.read(), 'a')
+        data.write('c')
+        self.assertEqual(data.read(), 'bbb')
+        data.end()
+        self.assertEqual(data.read(), 'c')
+        self.assertEqual(data.read(), '')
+        self.assertEqual(data.size, 7)
+        self.assertEqual(data.checksum, hashlib.md5('aaabbbc').hexdigest())
+        data.close()
+        self.assertRaises(IOError, data.write, 'd')
+
+    def _stream_image(self, checksum):
+        image = self.images.first()
+        image.checksum = checksum
+        data = api.glance.ImageData()
+        data.write('image data')
+        data.end()
+
+        def send(**kwargs):
+            while kwargs['data'].read(4):
+                pass
+
+        glanceclient = self.stub_glanceclient()
+        glanceclient.images = self.mox.CreateMockAnything()
+        glanceclient.images.create(name='Test Image', data=data) \
+                           .WithSideEffects(send).AndReturn(image)
+        return image, data
+
+    def test_image_create_streamed(self):
+        image, data = self._stream_image(
+            hashlib.md5('image data').hexdigest())
+        self.mox.ReplayAll()
+
+        self.assertEqual(api.glance.image_create(self.request,
+                                                 name='Test Image',
+                                                 data=data),
+                         image)
+        self.assertTrue(data.closed)
+
+    def test_image_create_streamed_corrupted(self):
+        image, data = self._stream_image('0' * 32)
+        self.glanceclient.images.delete(image.id)
+        self.mox.ReplayAll()
+
+        self.assertRaises(glance_client.exc.HTTPException,
+                          api.glance.image_create, self.request,
+                          name='Test Image', data=data)
+
+    def test_image_create_streamed_stalled(self):
+        data = api.glance.ImageData(timeout=0.1)
+        data.write('image data')
+
+        def send(**kwargs):
+            while kwargs['data'].read(4):
+                pass
+
+        glanceclient = self.stub_glanceclient()
+        glanceclient.images = self.mox.CreateMockAnything()
+        glanceclient.images.create(name='Test Image', data=data) \
+                           .WithSideEffects(send)
+        self.mox.ReplayAll()
+
+        # The end of the data never comes.
+        self.assertRaises(glance_client.exc.HTTPException,
+                          api.glance.image_create, self.request,
+                          name='Test Image', data=data)
+
+    def test_image_create_copy_from(self):
+        image = self.images.first()
+        copy_from = 'http://example.com/image.img'
+
+        glanceclient = self.stub_glanceclient()
+        glanceclient.images = self.mox.CreateMockAnything()
+        glanceclient.images.create(name='Test Image').AndReturn(image)
+        glanceclient.images.update(image.id, copy_from=copy_from) \
+                           .AndReturn(image)
+        self.mox.ReplayAll()
+
+        ret_val = api.glance.image_create(self.request, name='Test Image',
+                                          copy_from=copy_from)
+        self.assertEqual(ret_val, image)
+        # The image is copied by a background job.
+        job_id = self.request.session['horizon_jobs'][-1]
+        status = jobs.get_status(job_id)
+        self.assertEqual((status['name'], status['status']),
+                         ('image_copy_from', jobs.SUCCEEDED))
+
+    def test_image_create_copy_from_queue_full(self):
+        image = self.images.first()
+
+        glanceclient = self.stub_glanceclient()
+        glanceclient.images = self.mox.CreateMockAnything()
+        glanceclient.images.create(name='Test Image').AndReturn(image)
+        glanceclient.images.delete(image.id)
+        self.mox.StubOutWithMock(jobs, 'submit')
+        jobs.submit(self.request, IsA(jobs.Job)) \
+            .AndRaise(exceptions.JobQueueFull())
+        self.mox.ReplayAll()
+
+        self.assertRaises(exceptions.JobQueueFull,
+                          api.glance.image_create, self.request,
+                          name='Test Image',
+                          copy_from='http://example.com/image.img')
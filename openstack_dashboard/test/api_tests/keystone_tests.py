@@ -72,6 +72,26 @@ class RoleAPITests(test.APITestCase):
         self.mox.ReplayAll()
         api.keystone.remove_tenant_user(self.request, tenant.id, self.user.id)
 
+    def test_project_role_grants(self):
+        keystoneclient = self.stub_keystoneclient()
+        tenant = self.tenants.first()
+        users = self.users.list()[:2]
+
+        keystoneclient.users = self.mox.CreateMockAnything()
+        keystoneclient.users.list(tenant_id=tenant.id).AndReturn(users)
+        keystoneclient.roles = self.mox.CreateMockAnything()
+        keystoneclient.roles.roles_for_user(users[0].id,
+                                            tenant.id).AndReturn(self.roles)
+        keystoneclient.roles.roles_for_user(users[1].id,
+                                            tenant.id).AndReturn([self.role])
+        self.mox.ReplayAll()
+
+        grants = api.keystone.project_role_grants(self.request, tenant.id)
+        self.assertEqual(grants.keys(), [users[0].id, users[1].id])
+        self.assertEqual(grants[users[0].id],
+                         set(role.id for role in self.roles))
+        self.assertEqual(grants[users[1].id], set([self.role.id]))
+
     def test_get_default_role(self):
         keystoneclient = self.stub_keystoneclient()
         keystoneclient.roles = self.mox.CreateMockAnything()
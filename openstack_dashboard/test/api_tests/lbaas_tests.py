@@ -314,6 +314,36 @@ class LbaasApiTests(test.APITestCase):
         for v in ret_val:
             self.assertIsInstance(v, api.lbaas.Member)
 
+    @test.create_stubs({quantumclient: ('list_pools',)})
+    def test_members_readable(self):
+        members = self.members.list()
+        quantumclient.list_pools().AndReturn({'pools': self.api_pools.list()})
+        self.mox.ReplayAll()
+
+        ret_val = api.lbaas.members_readable(self.request, members)
+        self.assertEqual([m.pool_name for m in ret_val],
+                         [self.pools.first().name] * len(members))
+
+    @test.create_stubs({api.lbaas: ('vips_get', 'vip_get'),
+                        api.quantum: ('subnet_list',)})
+    def test_pools_readable(self):
+        pools = self.pools.list()
+        vip = self.vips.first()
+        api.quantum.subnet_list(IsA(http.HttpRequest)) \
+            .AndReturn(self.subnets.list())
+        # A vip which isn't listed is fetched on its own, and its id is
+        # shown if that fails too.
+        api.lbaas.vips_get(IsA(http.HttpRequest)).AndReturn([vip])
+        api.lbaas.vip_get(IsA(http.HttpRequest), pools[1].vip_id) \
+            .AndRaise(self.exceptions.quantum)
+        self.mox.ReplayAll()
+
+        ret_val = api.lbaas.pools_readable(self.request, pools)
+        self.assertEqual([p.subnet_name for p in ret_val],
+                         [self.subnets.first().cidr] * len(pools))
+        self.assertEqual([p.vip_name for p in ret_val],
+                         [vip.name, pools[1].vip_id])
+
     @test.create_stubs({quantumclient: ('show_member',)})
     def test_member_get(self):
         member = {'member': {'id': 'abcdef-c3eb-4fee-9763-12de3338041e',
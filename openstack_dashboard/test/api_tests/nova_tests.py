@@ -21,10 +21,14 @@
 
 from __future__ import absolute_import
 
+import datetime
+
 from django import http
 from mox import IsA
 from novaclient.v1_1 import servers
 
+from horizon import instrumentation
+
 from openstack_dashboard import api
 from openstack_dashboard.test import helpers as test
 
@@ -140,6 +144,47 @@ class ComputeApiTests(test.APITestCase):
         for usage in ret_val:
             self.assertIsInstance(usage, api.nova.NovaUsage)
 
+    def test_usage_of_closed_month_is_cached(self):
+        usages = self.usages.list()
+        start = datetime.datetime(2012, 1, 1)
+        end = datetime.datetime(2012, 1, 31, 23, 59, 59)
+
+        novaclient = self.stub_novaclient()
+        novaclient.usage = self.mox.CreateMockAnything()
+        novaclient.usage.list(start, end, True).AndReturn(usages)
+        self.mox.ReplayAll()
+
+        api.nova.usage_list(self.request, start, end)
+        # Neither the list nor the usage of a single project of the same
+        # month are fetched again.
+        ret_val = api.nova.usage_list(self.request, start, end)
+        self.assertEqual([usage.tenant_id for usage in ret_val],
+                         [usage.tenant_id for usage in usages])
+        usage = api.nova.usage_get(self.request, usages[0].tenant_id,
+                                   start, end)
+        self.assertIsInstance(usage, api.nova.NovaUsage)
+        self.assertEqual(usage.tenant_id, usages[0].tenant_id)
+
+    def test_calls_are_instrumented(self):
+        usages = self.usages.list()
+        start = datetime.datetime(2012, 1, 1)
+        end = datetime.datetime(2012, 1, 31, 23, 59, 59)
+
+        novaclient = self.stub_novaclient()
+        novaclient.usage = self.mox.CreateMockAnything()
+        novaclient.usage.list(start, end, True).AndReturn(usages)
+        self.mox.ReplayAll()
+
+        trace = instrumentation.RequestTrace()
+        with instrumentation.activate(trace):
+            api.nova.usage_list(self.request, start, end)
+            api.nova.usage_list(self.request, start, end)
+        self.assertEqual([(call['service'], call['operation'],
+                           call['size'], call['cache'])
+                          for call in trace.calls],
+                         [('compute', 'usage_list', len(usages), 'miss'),
+                          ('compute', 'usage_list', len(usages), 'hit')])
+
     def test_server_get(self):
         server = self.servers.first()
 
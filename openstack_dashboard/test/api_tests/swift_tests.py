@@ -20,7 +20,10 @@
 
 from __future__ import absolute_import
 
-from mox import IsA
+import hashlib
+from StringIO import StringIO
+
+from mox import IgnoreArg, IsA
 
 from openstack_dashboard import api
 from horizon import exceptions
@@ -43,7 +46,7 @@ class SwiftApiTests(test.APITestCase):
 
     def test_swift_create_duplicate_container(self):
         container = self.containers.first()
-        swift_api = self.stub_swiftclient(expected_calls=2)
+        swift_api = self.stub_swiftclient()
         # Check for existence, then create
         exc = self.exceptions.swift
         swift_api.head_container(container.name).AndRaise(exc)
@@ -79,6 +82,70 @@ class SwiftApiTests(test.APITestCase):
         self.assertEqual(len(objs), len(objects))
         self.assertFalse(more)
 
+    def test_swift_filter_objects(self):
+        container = self.containers.first()
+        listing = [{'name': 'photos/2013_a.jpg'},
+                   {'name': 'photos/2013_b.png'},
+                   {'subdir': 'photos/2013_jpg/'}]
+
+        swift_api = self.stub_swiftclient()
+        swift_api.get_container(container.name,
+                                limit=1001,
+                                marker=None,
+                                prefix='photos/2013',
+                                delimiter='/').AndReturn([{}, listing])
+        self.mox.ReplayAll()
+
+        objs, more, marker = api.swift.swift_filter_objects(self.request,
+                                                            '2013* JPG',
+                                                            container.name,
+                                                            prefix='photos/')
+        self.assertEqual([obj.name for obj in objs],
+                         ['photos/2013_a.jpg', 'photos/2013_jpg'])
+        self.assertFalse(more)
+        self.assertIsNone(marker)
+
+    def test_swift_filter_objects_paged(self):
+        container = self.containers.first()
+
+        swift_api = self.stub_swiftclient()
+        swift_api.get_container(container.name,
+                                limit=2,
+                                marker=None,
+                                prefix='',
+                                delimiter='/') \
+            .AndReturn([{}, [{'name': 'obj1'}, {'subdir': 'other/'}]])
+        swift_api.get_container(container.name,
+                                limit=2,
+                                marker='other0',
+                                prefix='',
+                                delimiter='/') \
+            .AndReturn([{}, [{'name': 'obj2'}]])
+        self.mox.ReplayAll()
+
+        objs, more, marker = api.swift.swift_filter_objects(self.request,
+                                                            'obj',
+                                                            container.name,
+                                                            limit=1)
+        self.assertEqual([obj.name for obj in objs], ['obj1'])
+        self.assertTrue(more)
+        self.assertEqual(marker, 'other/')
+
+    def test_object_filter(self):
+        object_filter = api.swift.ObjectFilter('Img* .JPG')
+        self.assertTrue(object_filter.matches('img_01.jpg'))
+        self.assertTrue(object_filter.matches('IMG_01.jpg.bak'))
+        # Every term has to match.
+        self.assertFalse(object_filter.matches('img_01.png'))
+        self.assertFalse(object_filter.matches('my_img.jpg'))
+        self.assertEqual(object_filter.prefixes(),
+                         ['img', 'imG', 'iMg', 'iMG',
+                          'Img', 'ImG', 'IMg', 'IMG'])
+
+        object_filter = api.swift.ObjectFilter('2013-0*.tar*')
+        self.assertEqual(object_filter.prefixes(), ['2013-0'])
+        self.assertEqual(api.swift.ObjectFilter('*.jpg').prefixes(), [''])
+
     def test_swift_upload_object(self):
         container = self.containers.first()
         obj = self.objects.first()
@@ -104,11 +171,68 @@ class SwiftApiTests(test.APITestCase):
                                       obj.name,
                                       FakeFile())
 
+    def test_swift_get_object_chunked(self):
+        container = self.containers.first()
+        obj = self.objects.first()
+        chunks = iter(['Fake ', 'Data'])
+        headers = {'content-length': '9',
+                   'x-object-meta-orig-filename': 'fake.txt'}
+
+        swift_api = self.stub_swiftclient()
+        swift_api.get_object(container.name,
+                             obj.name,
+                             resp_chunk_size=5).AndReturn((headers, chunks))
+        self.mox.ReplayAll()
+
+        stored = api.swift.swift_get_object(self.request,
+                                            container.name,
+                                            obj.name,
+                                            resp_chunk_size=5)
+        self.assertEqual(stored.bytes, 9)
+        self.assertEqual(stored.orig_name, 'fake.txt')
+        self.assertIs(stored.data, chunks)
+
+    def test_swift_upload_object_segmented(self):
+        container = self.containers.first()
+        obj = self.objects.first()
+        segments_container = container.name + '_segments'
+
+        class FakeFile(StringIO):
+            name = 'fake_object.txt'
+            size = 9
+
+        def read_segment(container, name, pipe, **kwargs):
+            pipe.read()
+
+        # One cached connection plus one per segment.
+        swift_api = self.stub_swiftclient(expected_calls=4)
+        swift_api.put_container(segments_container)
+        for segment in ('Fake', ' Dat', 'a'):
+            swift_api.put_object(segments_container,
+                                 IgnoreArg(),
+                                 IgnoreArg(),
+                                 chunk_size=IgnoreArg()) \
+                .WithSideEffects(read_segment) \
+                .AndReturn(hashlib.md5(segment).hexdigest())
+        headers = {'X-Object-Meta-Orig-Filename': FakeFile.name,
+                   'X-Object-Manifest': IgnoreArg()}
+        swift_api.put_object(container.name, obj.name, None, headers=headers)
+        self.mox.ReplayAll()
+
+        with self.settings(SWIFT_SEGMENTED_UPLOAD_THRESHOLD=4,
+                           SWIFT_SEGMENT_SIZE=4,
+                           SWIFT_SEGMENT_UPLOAD_CONCURRENCY=1):
+            stored = api.swift.swift_upload_object(self.request,
+                                                   container.name,
+                                                   obj.name,
+                                                   FakeFile('Fake Data'))
+        self.assertEqual(stored.bytes, 9)
+
     def test_swift_object_exists(self):
         container = self.containers.first()
         obj = self.objects.first()
 
-        swift_api = self.stub_swiftclient(expected_calls=2)
+        swift_api = self.stub_swiftclient()
         swift_api.head_object(container.name, obj.name).AndReturn(container)
 
         exc = self.exceptions.swift
@@ -0,0 +1,127 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import resource
+import sys
+import time
+
+from django.utils import unittest
+
+from openstack_dashboard import api
+from openstack_dashboard.test import helpers as test
+
+from .fakes import FakeAPI
+
+
+def _rows():
+    return [int(rows) for rows
+            in os.environ.get('BENCHMARK_ROWS', '100,1000').split(',')]
+
+
+def _load(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def _process_peak_memory():
+    # The high-water mark of the whole process, in kilobytes on Linux. It
+    # never goes down, so it can't tell how much memory a single page used.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@unittest.skipUnless(os.environ.get('WITH_BENCHMARKS', False),
+                     "The WITH_BENCHMARKS env variable is not set.")
+class BenchmarkTestCase(test.BaseAdminViewTests):
+    """
+    Measures how long pages take to build against fake API backends holding
+    synthetic data sets of each of the sizes listed in ``BENCHMARK_ROWS``
+    (e.g. ``100,1000,5000``).
+
+    Each measurement is the best of ``BENCHMARK_REPEAT`` runs with a fake
+    latency of ``BENCHMARK_LATENCY`` seconds per API call. Along with the
+    time, the number of API calls made and the peak memory of the process so
+    far are recorded, and saved to the JSON file named by
+    ``BENCHMARK_RESULTS``. The peak memory is the high-water mark of the
+    whole test run, not the memory used by the page: it only rises for pages
+    which need more memory than any run before them.
+
+    The results of a previous run can be given as ``BENCHMARK_BASELINE``, in
+    which case a page which is more than ``BENCHMARK_TOLERANCE`` (a ratio,
+    ``0.2`` by default) slower than it was, or makes more API calls, fails.
+    """
+    rows = _rows()
+
+    def setUp(self):
+        super(BenchmarkTestCase, self).setUp()
+        self.fake_api = FakeAPI(self.mox.stubs,
+                                float(os.environ.get('BENCHMARK_LATENCY', 0)))
+        self.repeat = int(os.environ.get('BENCHMARK_REPEAT', 3))
+        self.tolerance = float(os.environ.get('BENCHMARK_TOLERANCE', 0.2))
+
+    def measure(self, name, rows, page):
+        """
+        Calls ``page`` and records how it performed as ``name`` with
+        ``rows`` rows of data. Returns the value of its last call.
+        """
+        timings = []
+        for run in range(self.repeat):
+            # Nothing may be taken from the caches filled by the last run.
+            api.base.client_cache.clear()
+            api.base.catalog_cache.clear()
+            self.fake_api.reset()
+            start = time.time()
+            value = page()
+            timings.append(time.time() - start)
+        result = {'rows': rows,
+                  'seconds': min(timings),
+                  'mean_seconds': sum(timings) / len(timings),
+                  'latency': self.fake_api.latency,
+                  'api_calls': self.fake_api.call_count,
+                  'api_calls_by_function': dict(self.fake_api.calls),
+                  'process_peak_memory_kb': _process_peak_memory()}
+        key = "%s:%s" % (name, rows)
+        self.record(key, result)
+        self.compare(key, result)
+        return value
+
+    def record(self, key, result):
+        path = os.environ.get('BENCHMARK_RESULTS', None)
+        sys.stdout.write("\n%s: %.3fs, %d API calls, process peak memory "
+                         "%dkB\n" % (key, result['seconds'],
+                                     result['api_calls'],
+                                     result['process_peak_memory_kb']))
+        if not path:
+            return
+        # Each benchmark adds its result to those already saved, so that a
+        # subset can be run again without losing the others.
+        results = _load(path)
+        results[key] = result
+        with open(path, 'w') as results_file:
+            json.dump(results, results_file, indent=2, sort_keys=True)
+
+    def compare(self, key, result):
+        baseline = _load(os.environ.get('BENCHMARK_BASELINE', None)).get(key)
+        if not baseline or baseline['latency'] != result['latency']:
+            return
+        limit = baseline['seconds'] * (1 + self.tolerance)
+        self.assertTrue(result['seconds'] <= limit,
+                        "%s took %.3fs, %.3fs in the baseline."
+                        % (key, result['seconds'], baseline['seconds']))
+        self.assertTrue(result['api_calls'] <= baseline['api_calls'],
+                        "%s made %d API calls, %d in the baseline."
+                        % (key, result['api_calls'], baseline['api_calls']))
@@ -0,0 +1,105 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Fake API backends for the benchmarks.
+
+Unlike the mox stubs used by the unit tests, the fakes don't expect a given
+sequence of calls: they answer any number of them from a synthetic data set,
+count them and take a configurable time to do so, standing in for the
+latency of the real services.
+"""
+
+import collections
+import copy
+import threading
+import time
+
+
+def synthesize(items, count, **attrs):
+    """
+    Returns ``count`` copies of the given test data objects, taken in turn,
+    each with a unique ``id`` and ``name`` if it has them.
+
+    The values of ``attrs`` are callables which are passed the index of a
+    copy and return the value of the attribute of that name, e.g. to spread
+    the copies over several projects.
+    """
+    copies = []
+    for index in range(count):
+        item = copy.copy(items[index % len(items)])
+        # Resources keep their attributes in their own __dict__, which
+        # would otherwise be shared with the original.
+        item.__dict__ = dict(item.__dict__)
+        values = {}
+        for name in ('id', 'name'):
+            value = getattr(item, name, None)
+            if value is not None:
+                values[name] = "%s-%05d" % (value, index)
+        for name, value in attrs.items():
+            values[name] = value(index)
+        for name, value in values.items():
+            try:
+                setattr(item, name, value)
+            except AttributeError:
+                # A property derived from another attribute, e.g. the id
+                # of a keypair is its name.
+                pass
+            # Wrappers read some attributes from their raw data instead.
+            info = getattr(item, '_info', None)
+            if isinstance(info, dict) and name in info:
+                info = item._info = dict(info)
+                info[name] = value
+        copies.append(item)
+    return copies
+
+
+class FakeAPI(object):
+    """
+    Replaces API functions with fakes for the duration of a test, using the
+    test's ``mox.stubs`` so that they are restored on tear down.
+
+    Each call sleeps for ``latency`` seconds before returning its result.
+    Calls to API functions which weren't faked reach the clients, whose
+    requests are refused by the test case.
+    """
+    def __init__(self, stubs, latency=0):
+        self.stubs = stubs
+        self.latency = latency
+        self.calls = collections.defaultdict(int)
+        self._lock = threading.Lock()
+
+    def fake(self, module, name, result):
+        """
+        Fakes ``module.name``. Calls return ``result``, or the value it
+        returns when called with their arguments if it is callable.
+        """
+        key = "%s.%s" % (module.__name__.rsplit(".", 1)[-1], name)
+
+        def fake_call(*args, **kwargs):
+            with self._lock:
+                self.calls[key] += 1
+            if self.latency:
+                time.sleep(self.latency)
+            if callable(result):
+                return result(*args, **kwargs)
+            return result
+        self.stubs.Set(module, name, fake_call)
+
+    @property
+    def call_count(self):
+        return sum(self.calls.values())
+
+    def reset(self):
+        self.calls.clear()
@@ -0,0 +1,178 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from django.core.urlresolvers import reverse
+from django.utils.http import urlencode
+
+from openstack_dashboard import api
+from openstack_dashboard.dashboards.admin.instances.tables import \
+    AdminInstancesTable
+from openstack_dashboard.usage import quotas
+
+from .base import BenchmarkTestCase
+from .fakes import synthesize
+
+
+def paginate(items, search_opts=None):
+    """ Pages through ``items`` the way nova does with limit and marker. """
+    search_opts = search_opts or {}
+    start = 0
+    if search_opts.get('marker'):
+        ids = [item.id for item in items]
+        start = ids.index(search_opts['marker']) + 1
+    limit = search_opts.get('limit', len(items))
+    return items[start:start + limit]
+
+
+class PageBenchmarks(BenchmarkTestCase):
+    def _servers(self, count, tenants=None):
+        attrs = {}
+        if tenants:
+            attrs['tenant_id'] = lambda i: tenants[i % len(tenants)].id
+        return synthesize(self.servers.list(), count, **attrs)
+
+    def _get(self, url, status_code=200):
+        def page():
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status_code)
+            return res
+        return page
+
+    def test_project_instances(self):
+        for rows in self.rows:
+            servers = self._servers(rows)
+            self.fake_api.fake(api.nova, 'server_list', servers)
+            self.fake_api.fake(api.nova, 'flavor_list', self.flavors.list())
+            self.fake_api.fake(api.nova, 'tenant_absolute_limits',
+                               self.limits['absolute'])
+            res = self.measure('project_instances', rows,
+                               self._get(reverse('horizon:project:instances:'
+                                                 'index')))
+            self.assertEqual(len(res.context['instances_table'].data), rows)
+
+    def test_admin_instances(self):
+        for rows in self.rows:
+            tenants = synthesize(self.tenants.list(), max(rows / 10, 1))
+            servers = self._servers(rows, tenants)
+            self.fake_api.fake(api.nova, 'server_list',
+                               lambda request, search_opts=None,
+                               all_tenants=False: paginate(servers,
+                                                           search_opts))
+            self.fake_api.fake(api.nova, 'flavor_list', self.flavors.list())
+            self.fake_api.fake(api.keystone, 'tenant_list', tenants)
+            # Only the first page is built, the table below renders them all.
+            self.measure('admin_instances', rows,
+                         self._get(reverse('horizon:admin:instances:index')))
+
+    def test_admin_instances_table(self):
+        flavors = dict((flavor.id, flavor) for flavor in self.flavors.list())
+        for rows in self.rows:
+            tenants = synthesize(self.tenants.list(), max(rows / 10, 1))
+            servers = self._servers(rows, tenants)
+            for server in servers:
+                server.full_flavor = flavors[server.flavor['id']]
+                server.tenant_name = tenants[0].name
+
+            def render():
+                table = AdminInstancesTable(self.request, data=servers)
+                return table.render()
+            self.measure('admin_instances_table', rows, render)
+
+    def test_volumes(self):
+        for rows in self.rows:
+            servers = self._servers(rows)
+            volumes = synthesize(
+                self.volumes.list(), rows,
+                attachments=lambda i: [{'id': str(i),
+                                        'server_id': servers[i].id,
+                                        'device': '/dev/vdb'}])
+            self.fake_api.fake(api.cinder, 'volume_list', volumes)
+            self.fake_api.fake(api.nova, 'server_list', servers)
+            self.measure('volumes', rows,
+                         self._get(reverse('horizon:project:volumes:index')))
+
+    def test_images_and_snapshots(self):
+        for rows in self.rows:
+            volumes = dict((volume.id, volume) for volume
+                           in synthesize(self.volumes.list(), rows))
+            volume_ids = volumes.keys()
+            snapshots = synthesize(self.volume_snapshots.list(), rows,
+                                   volume_id=lambda i: volume_ids[i])
+            self.fake_api.fake(api.glance, 'image_list_detailed',
+                               (synthesize(self.images.list(), rows), False))
+            self.fake_api.fake(api.glance, 'snapshot_list_detailed',
+                               (synthesize(self.snapshots.list(), rows),
+                                False))
+            self.fake_api.fake(api.cinder, 'volume_snapshot_list', snapshots)
+            self.fake_api.fake(api.cinder, 'volume_get',
+                               lambda request, volume_id: volumes[volume_id])
+            self.measure('images_and_snapshots', rows,
+                         self._get(reverse('horizon:project:'
+                                           'images_and_snapshots:index')))
+
+    def test_admin_projects(self):
+        for rows in self.rows:
+            self.fake_api.fake(api.keystone, 'tenant_list',
+                               synthesize(self.tenants.list(), rows))
+            self.measure('admin_projects', rows,
+                         self._get(reverse('horizon:admin:projects:index')))
+
+    def test_admin_usage(self):
+        for rows in self.rows:
+            tenants = synthesize(self.tenants.list(), rows)
+            usages = synthesize(self.usages.list(), rows,
+                                tenant_id=lambda i: tenants[i].id)
+            self.fake_api.fake(api.keystone, 'tenant_list', tenants)
+            self.fake_api.fake(api.nova, 'usage_list',
+                               [api.nova.NovaUsage(usage) for usage in usages])
+            self.fake_api.fake(quotas, 'tenant_quota_usages',
+                               self.quota_usages.first())
+            self.measure('admin_usage', rows,
+                         self._get(reverse('horizon:admin:overview:index')))
+
+    def test_launch_instance(self):
+        url = "%s?%s" % (reverse('horizon:project:instances:launch'),
+                         urlencode({'source_type': 'image_id',
+                                    'source_id': self.images.first().id}))
+        for rows in self.rows:
+            images = synthesize(self.images.list(), rows)
+            self.fake_api.fake(api.glance, 'image_list_detailed',
+                               (images, False))
+            self.fake_api.fake(api.cinder, 'volume_list',
+                               synthesize(self.volumes.list(), rows))
+            self.fake_api.fake(api.cinder, 'volume_snapshot_list',
+                               synthesize(self.volume_snapshots.list(), rows))
+            self.fake_api.fake(api.nova, 'flavor_list', self.flavors.list())
+            self.fake_api.fake(api.nova, 'keypair_list',
+                               synthesize(self.keypairs.list(), rows))
+            self.fake_api.fake(api.nova, 'security_group_list',
+                               synthesize(self.security_groups.list(), rows))
+            self.fake_api.fake(api.quantum, 'network_list',
+                               self.networks.list())
+            self.fake_api.fake(quotas, 'tenant_quota_usages',
+                               self.quota_usages.first())
+            self.measure('launch_instance', rows, self._get(url))
+
+    def test_instance_detail(self):
+        server = self.servers.first()
+        url = reverse('horizon:project:instances:detail', args=[server.id])
+        for rows in self.rows:
+            self.fake_api.fake(api.nova, 'server_get', server)
+            self.fake_api.fake(api.nova, 'flavor_get', self.flavors.first())
+            self.fake_api.fake(api.nova, 'instance_volumes_list',
+                               synthesize(self.volumes.list(), rows,
+                                          device=lambda i: '/dev/vd%d' % i))
+            self.fake_api.fake(api.nova, 'server_security_groups',
+                               synthesize(self.security_groups.list(), rows))
+            self.measure('instance_detail', rows, self._get(url))
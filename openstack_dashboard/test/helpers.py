@@ -141,6 +141,10 @@ class TestCase(horizon_helpers.TestCase):
         self.request.session['token'] = self.token.id
         middleware.HorizonMiddleware().process_request(self.request)
         AuthenticationMiddleware().process_request(self.request)
+        # Don't let clients or catalog data cached by one test leak into
+        # the next.
+        api.base.client_cache.clear()
+        api.base.catalog_cache.clear()
         os.environ["HORIZON_TEST_RUN"] = "True"
 
     def tearDown(self):
@@ -53,6 +53,10 @@ HORIZON_CONFIG = {
     'exceptions': {'recoverable': RECOVERABLE,
                    'not_found': NOT_FOUND,
                    'unauthorized': UNAUTHORIZED},
+    # mox mocks aren't thread-safe, so load data and run background jobs
+    # in the request thread.
+    'concurrent_workers': 0,
+    'background_workers': 0,
 }
 
 # Set to True to allow users to upload images to glance via Horizon server.
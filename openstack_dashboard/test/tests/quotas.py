@@ -21,8 +21,10 @@
 
 from __future__ import absolute_import
 
+from django.conf import settings
 from django import http
 from mox import IsA
+from openstack_auth import user
 
 from openstack_dashboard import api
 from openstack_dashboard.api import cinder
@@ -33,13 +35,17 @@ from openstack_dashboard.usage import quotas
 class QuotaTests(test.APITestCase):
     @test.create_stubs({api.nova: ('server_list',
                                    'flavor_list',
-                                   'tenant_quota_get',),
+                                   'tenant_quota_get',
+                                   'tenant_absolute_limits',),
                         api.network: ('tenant_floating_ip_list',),
                         quotas: ('is_service_enabled',),
-                        cinder: ('volume_list', 'tenant_quota_get',)})
+                        cinder: ('volume_list', 'tenant_quota_get',
+                                 'tenant_absolute_limits',)})
     def test_tenant_quota_usages(self):
         quotas.is_service_enabled(IsA(http.HttpRequest),
                                   'volume').AndReturn(True)
+        api.nova.tenant_absolute_limits(IsA(http.HttpRequest)) \
+                .AndReturn({})
         api.nova.flavor_list(IsA(http.HttpRequest)) \
                 .AndReturn(self.flavors.list())
         api.nova.tenant_quota_get(IsA(http.HttpRequest), '1') \
@@ -48,6 +54,8 @@ class QuotaTests(test.APITestCase):
                 .AndReturn(self.floating_ips.list())
         api.nova.server_list(IsA(http.HttpRequest)) \
                 .AndReturn(self.servers.list())
+        cinder.tenant_absolute_limits(IsA(http.HttpRequest)) \
+                .AndReturn({})
         cinder.volume_list(IsA(http.HttpRequest)) \
                 .AndReturn(self.volumes.list())
         cinder.tenant_quota_get(IsA(http.HttpRequest), '1') \
@@ -75,12 +83,15 @@ class QuotaTests(test.APITestCase):
 
     @test.create_stubs({api.nova: ('server_list',
                                    'flavor_list',
-                                   'tenant_quota_get',),
+                                   'tenant_quota_get',
+                                   'tenant_absolute_limits',),
                         api.network: ('tenant_floating_ip_list',),
                         quotas: ('is_service_enabled',)})
     def test_tenant_quota_usages_without_volume(self):
         quotas.is_service_enabled(IsA(http.HttpRequest),
                                   'volume').AndReturn(False)
+        api.nova.tenant_absolute_limits(IsA(http.HttpRequest)) \
+                .AndReturn({})
         api.nova.flavor_list(IsA(http.HttpRequest)) \
                 .AndReturn(self.flavors.list())
         api.nova.tenant_quota_get(IsA(http.HttpRequest), '1') \
@@ -110,12 +121,15 @@ class QuotaTests(test.APITestCase):
 
     @test.create_stubs({api.nova: ('server_list',
                                    'flavor_list',
-                                   'tenant_quota_get',),
+                                   'tenant_quota_get',
+                                   'tenant_absolute_limits',),
                         api.network: ('tenant_floating_ip_list',),
                         quotas: ('is_service_enabled',)})
     def test_tenant_quota_usages_no_instances_running(self):
         quotas.is_service_enabled(IsA(http.HttpRequest),
                                   'volume').AndReturn(False)
+        api.nova.tenant_absolute_limits(IsA(http.HttpRequest)) \
+                .AndReturn({})
         api.nova.flavor_list(IsA(http.HttpRequest)) \
                 .AndReturn(self.flavors.list())
         api.nova.tenant_quota_get(IsA(http.HttpRequest), '1') \
@@ -144,16 +158,20 @@ class QuotaTests(test.APITestCase):
 
     @test.create_stubs({api.nova: ('server_list',
                                    'flavor_list',
-                                   'tenant_quota_get',),
+                                   'tenant_quota_get',
+                                   'tenant_absolute_limits',),
                         api.network: ('tenant_floating_ip_list',),
                         quotas: ('is_service_enabled',),
-                        cinder: ('volume_list', 'tenant_quota_get',)})
+                        cinder: ('volume_list', 'tenant_quota_get',
+                                 'tenant_absolute_limits',)})
     def test_tenant_quota_usages_unlimited_quota(self):
         inf_quota = self.quotas.first()
         inf_quota['ram'] = -1
 
         quotas.is_service_enabled(IsA(http.HttpRequest),
                                   'volume').AndReturn(True)
+        api.nova.tenant_absolute_limits(IsA(http.HttpRequest)) \
+                .AndReturn({})
         api.nova.flavor_list(IsA(http.HttpRequest)) \
                 .AndReturn(self.flavors.list())
         api.nova.tenant_quota_get(IsA(http.HttpRequest), '1') \
@@ -162,6 +180,8 @@ class QuotaTests(test.APITestCase):
                 .AndReturn(self.floating_ips.list())
         api.nova.server_list(IsA(http.HttpRequest)) \
                 .AndReturn(self.servers.list())
+        cinder.tenant_absolute_limits(IsA(http.HttpRequest)) \
+                .AndReturn({})
         cinder.volume_list(IsA(http.HttpRequest)) \
                 .AndReturn(self.volumes.list())
         cinder.tenant_quota_get(IsA(http.HttpRequest), '1') \
@@ -187,3 +207,99 @@ class QuotaTests(test.APITestCase):
 
         # Compare internal structure of usages to expected.
         self.assertEquals(quota_usages.usages, expected_output)
+
+    @test.create_stubs({api.nova: ('tenant_quota_get',
+                                   'tenant_absolute_limits',),
+                        api.network: ('tenant_floating_ip_list',),
+                        quotas: ('is_service_enabled',),
+                        cinder: ('tenant_quota_get',
+                                 'tenant_absolute_limits',)})
+    def test_tenant_quota_usages_from_limits(self):
+        limits = dict(self.limits['absolute'],
+                      totalInstancesUsed=3,
+                      totalCoresUsed=6,
+                      totalRAMUsed=3072)
+        quotas.is_service_enabled(IsA(http.HttpRequest),
+                                  'volume').AndReturn(True)
+        api.nova.tenant_quota_get(IsA(http.HttpRequest), '1') \
+                .AndReturn(self.quotas.first())
+        cinder.tenant_quota_get(IsA(http.HttpRequest), '1') \
+            .AndReturn(self.quotas.first())
+        api.network.tenant_floating_ip_list(IsA(http.HttpRequest)) \
+                .AndReturn(self.floating_ips.list())
+        api.nova.tenant_absolute_limits(IsA(http.HttpRequest)) \
+                .AndReturn(limits)
+        cinder.tenant_absolute_limits(IsA(http.HttpRequest)) \
+            .AndReturn({'totalVolumesUsed': 1, 'totalGigabytesUsed': 40})
+
+        self.mox.ReplayAll()
+
+        quota_usages = quotas.tenant_quota_usages(self.request)
+        self.assertEqual(quota_usages['instances'],
+                         {'available': 7, 'used': 3, 'quota': 10})
+        self.assertEqual(quota_usages['cores'],
+                         {'available': 4, 'used': 6, 'quota': 10})
+        self.assertEqual(quota_usages['ram'],
+                         {'available': 6928, 'used': 3072, 'quota': 10000})
+        self.assertEqual(quota_usages['volumes'],
+                         {'available': 0, 'used': 1, 'quota': 1})
+        self.assertEqual(quota_usages['gigabytes'],
+                         {'available': 960, 'used': 40, 'quota': 1000})
+
+    @test.create_stubs({api.nova: ('tenant_absolute_limits',),
+                        api.network: ('tenant_floating_ip_list',)})
+    def test_tenant_usage_tallies_cached(self):
+        limits = self.limits['absolute']
+        api.network.tenant_floating_ip_list(IsA(http.HttpRequest)) \
+                .AndReturn(self.floating_ips.list())
+        api.nova.tenant_absolute_limits(IsA(http.HttpRequest)) \
+                .AndReturn(limits)
+        api.network.tenant_floating_ip_list(IsA(http.HttpRequest)) \
+                .AndReturn([])
+        api.nova.tenant_absolute_limits(IsA(http.HttpRequest)) \
+                .AndReturn(limits)
+
+        self.mox.ReplayAll()
+
+        disabled = quotas.CINDER_QUOTA_FIELDS
+        tallies = quotas.get_tenant_usage_tallies(self.request, disabled)
+        self.assertEqual(tallies, {'floating_ips': 2, 'instances': 0,
+                                   'cores': 0, 'ram': 0})
+        self.assertEqual(quotas.get_tenant_usage_tallies(self.request,
+                                                         disabled),
+                         tallies)
+        # Releasing a floating IP discards the cached figures.
+        api.base.invalidate_quota_usages(self.request)
+        tallies = quotas.get_tenant_usage_tallies(self.request, disabled)
+        self.assertEqual(tallies['floating_ips'], 0)
+
+    @test.create_stubs({api.nova: ('tenant_absolute_limits',),
+                        api.network: ('tenant_floating_ip_list',)})
+    def test_tenant_usage_tallies_invalidated_by_admin(self):
+        limits = self.limits['absolute']
+        api.network.tenant_floating_ip_list(IsA(http.HttpRequest)) \
+                .AndReturn(self.floating_ips.list())
+        api.nova.tenant_absolute_limits(IsA(http.HttpRequest)) \
+                .AndReturn(limits)
+        api.network.tenant_floating_ip_list(IsA(http.HttpRequest)) \
+                .AndReturn([])
+        api.nova.tenant_absolute_limits(IsA(http.HttpRequest)) \
+                .AndReturn(limits)
+
+        self.mox.ReplayAll()
+
+        disabled = quotas.CINDER_QUOTA_FIELDS
+        quotas.get_tenant_usage_tallies(self.request, disabled)
+        # An administrator of another project releasing a floating IP may
+        # have released one of this project's.
+        endpoint = settings.OPENSTACK_KEYSTONE_URL
+        admin_request = http.HttpRequest()
+        admin_request.user = user.User(id='admin',
+                                       token=self.token,
+                                       tenant_id='other_tenant',
+                                       service_catalog=self.service_catalog,
+                                       roles=[self.roles.admin._info],
+                                       endpoint=endpoint)
+        api.base.invalidate_quota_usages(admin_request)
+        tallies = quotas.get_tenant_usage_tallies(self.request, disabled)
+        self.assertEqual(tallies['floating_ips'], 0)
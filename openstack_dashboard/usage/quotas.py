@@ -2,10 +2,12 @@ from collections import defaultdict
 import itertools
 
 from horizon import exceptions
-from horizon.utils.memoized import memoized
+from horizon.utils import concurrency
+from horizon.utils.memoized import request_memoized
 
 from openstack_dashboard.api import nova, cinder, network
-from openstack_dashboard.api.base import is_service_enabled, QuotaSet
+from openstack_dashboard.api.base import (is_service_enabled, QuotaSet,
+                                          catalog_cache, quota_usages_key)
 
 NOVA_QUOTA_FIELDS = ("metadata_items",
                      "cores",
@@ -22,6 +24,14 @@ CINDER_QUOTA_FIELDS = ("volumes",
 
 QUOTA_FIELDS = NOVA_QUOTA_FIELDS + CINDER_QUOTA_FIELDS
 
+# The absolute limits which give the usage of each quota.
+NOVA_LIMIT_FIELDS = {"instances": "totalInstancesUsed",
+                     "cores": "totalCoresUsed",
+                     "ram": "totalRAMUsed"}
+
+CINDER_LIMIT_FIELDS = {"volumes": "totalVolumesUsed",
+                       "gigabytes": "totalGigabytesUsed"}
+
 
 class QuotaUsage(dict):
     """ Tracks quota limit, used, and available for a given set of quotas."""
@@ -105,18 +115,11 @@ def get_disabled_quotas(request):
     return disabled_quotas
 
 
-@memoized
-def tenant_quota_usages(request):
-    # Get our quotas and construct our usage object.
-    disabled_quotas = get_disabled_quotas(request)
-
-    usages = QuotaUsage()
-    for quota in get_tenant_quota_data(request,
-                                       disabled_quotas=disabled_quotas):
-        usages.add_quota(quota)
-
-    # Get our usages.
-    floating_ips = network.tenant_floating_ip_list(request)
+def _count_instances(request):
+    """
+    Tallies the instances, cores and RAM of the project from its list of
+    instances and their flavors, for clouds which don't report them.
+    """
     flavors = dict([(f.id, f) for f in nova.flavor_list(request)])
     instances = nova.server_list(request)
     # Fetch deleted flavors if necessary.
@@ -130,22 +133,95 @@ def tenant_quota_usages(request):
                 flavors[missing] = {}
                 exceptions.handle(request, ignore=True)
 
-    usages.tally('instances', len(instances))
-    usages.tally('floating_ips', len(floating_ips))
-
-    if 'volumes' not in disabled_quotas:
-        volumes = cinder.volume_list(request)
-        usages.tally('gigabytes', sum([int(v.size) for v in volumes]))
-        usages.tally('volumes', len(volumes))
-
     # Sum our usage based on the flavors of the instances.
+    tallies = {'instances': len(instances), 'cores': 0, 'ram': 0}
     for flavor in [flavors[instance.flavor['id']] for instance in instances]:
-        usages.tally('cores', getattr(flavor, 'vcpus', None))
-        usages.tally('ram', getattr(flavor, 'ram', None))
+        tallies['cores'] += getattr(flavor, 'vcpus', None) or 0
+        tallies['ram'] += getattr(flavor, 'ram', None) or 0
+    return tallies
+
+
+def _count_volumes(request):
+    """ Tallies the volumes and gigabytes of the project from its volumes. """
+    volumes = cinder.volume_list(request)
+    return {'volumes': len(volumes),
+            'gigabytes': sum([int(v.size) for v in volumes])}
+
+
+def _tally_from_limits(limits, fields):
+    """
+    Returns the figures named by ``fields`` (a dict of quota names to limit
+    names) from the absolute ``limits`` of a project, or ``None`` unless
+    all of them are given.
+    """
+    if not all(name in limits for name in fields.values()):
+        return None
+    return dict((quota, limits[name]) for quota, name in fields.items())
+
+
+def _get_instance_tallies(request):
+    tallies = _tally_from_limits(nova.tenant_absolute_limits(request),
+                                 NOVA_LIMIT_FIELDS)
+    if tallies is None:
+        tallies = _count_instances(request)
+    return tallies
+
 
-    # Initialise the tally if no instances have been launched yet
-    if len(instances) == 0:
-        usages.tally('cores', 0)
-        usages.tally('ram', 0)
+def _get_volume_tallies(request):
+    tallies = _tally_from_limits(cinder.tenant_absolute_limits(request),
+                                 CINDER_LIMIT_FIELDS)
+    if tallies is None:
+        tallies = _count_volumes(request)
+    return tallies
+
+
+def _get_floating_ip_tallies(request):
+    # Nova's figure misses the floating IPs allocated through Quantum.
+    return {'floating_ips': len(network.tenant_floating_ip_list(request))}
+
+
+def get_tenant_usage_tallies(request, disabled_quotas=None):
+    """
+    Returns the resources the request's project uses, keyed by quota name.
+
+    The figures computed by the services are used where available, which
+    saves listing every instance and volume of the project. They are cached
+    for each project and compute endpoint for the ``quota_usages`` entry of
+    ``API_CATALOG_CACHE_TIMEOUTS``; the API wrappers creating and deleting
+    resources discard them.
+    """
+    if disabled_quotas is None:
+        disabled_quotas = get_disabled_quotas(request)
+
+    def fetch():
+        providers = [_get_floating_ip_tallies, _get_instance_tallies]
+        if 'volumes' not in disabled_quotas:
+            providers.append(_get_volume_tallies)
+        tallies = {}
+        for result in concurrency.run_concurrently(
+                [lambda provider=provider: provider(request)
+                 for provider in providers]):
+            tallies.update(result)
+        return tallies
+
+    return catalog_cache.get('quota_usages', quota_usages_key(request),
+                             fetch)
+
+
+@request_memoized
+def tenant_quota_usages(request):
+    # Get our quotas and construct our usage object.
+    disabled_quotas = get_disabled_quotas(request)
+
+    usages = QuotaUsage()
+    for quota in get_tenant_quota_data(request,
+                                       disabled_quotas=disabled_quotas):
+        usages.add_quota(quota)
+
+    # Get our usages.
+    tallies = get_tenant_usage_tallies(request,
+                                       disabled_quotas=disabled_quotas)
+    for name, value in tallies.items():
+        usages.tally(name, value)
 
     return usages
@@ -10,6 +10,7 @@ LOG = logging.getLogger(__name__)
 class UsageView(tables.DataTableView):
     usage_class = None
     show_terminated = True
+    csv_response_class = None
 
     def __init__(self, *args, **kwargs):
         super(UsageView, self).__init__(*args, **kwargs)
@@ -43,6 +44,14 @@ class UsageView(tables.DataTableView):
         return context
 
     def render_to_response(self, context, **response_kwargs):
+        if (self.request.GET.get('format', 'html') == 'csv'
+                and self.csv_response_class):
+            return self.csv_response_class(request=self.request,
+                                           template=self.get_template_names(),
+                                           context=context,
+                                           content_type='text/csv',
+                                           filename='usage.csv',
+                                           **response_kwargs)
         resp = self.response_class(request=self.request,
                                    template=self.get_template_names(),
                                    context=context,
@@ -31,6 +31,9 @@ function usage {
   echo "                           Implies -V if -N is not set."
   echo "  --only-selenium          Run only the Selenium unit tests"
   echo "  --with-selenium          Run unit tests including Selenium tests"
+  echo "  --benchmark              Run the page benchmarks against fake API"
+  echo "                           backends. See the BENCHMARK_* variables in"
+  echo "                           openstack_dashboard/test/benchmarks/base.py"
   echo "  --runserver              Run the Django development server for"
   echo "                           openstack_dashboard in the virtual"
   echo "                           environment."
@@ -69,6 +72,7 @@ restore_env=0
 runserver=0
 only_selenium=0
 with_selenium=0
+benchmark=0
 testopts=""
 testargs=""
 with_coverage=0
@@ -95,6 +99,7 @@ function process_option {
     --compilemessages) compilemessages=1;;
     --only-selenium) only_selenium=1;;
     --with-selenium) with_selenium=1;;
+    --benchmark) benchmark=1;;
     --docs) just_docs=1;;
     --runserver) runserver=1;;
     --backup-environment) backup_env=1;;
@@ -281,6 +286,12 @@ function run_tests {
   fi
 }
 
+function run_benchmarks {
+  sanity_check
+  export WITH_BENCHMARKS=1
+  ${command_wrapper} python $root/manage.py test openstack_dashboard.test.benchmarks --settings=openstack_dashboard.test.settings $testopts
+}
+
 function run_tests_subset {
   project=`echo $testargs | awk -F. '{print $1}'`
   ${command_wrapper} python $root/manage.py test --settings=$project.test.settings $testopts $testargs
@@ -438,5 +449,11 @@ if [ $runserver -eq 1 ]; then
     exit $?
 fi
 
+# Benchmarks
+if [ $benchmark -eq 1 ]; then
+    run_benchmarks
+    exit $?
+fi
+
 # Full test suite
 run_tests || exit